@@ -1,22 +1,18 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, Header, HTTPException, Query, WebSocketException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 
-from app.core.database import get_db
+from app.core.database import get_async_db
 from app.core.security import decode_token
-from app.models.user import User, UserRole
+from app.models.user import UserRole
+from app.repositories.user import user_repo
+from app.services.principal_cache import Principal, principal_cache
+from app.services.task_access import task_access
 
 security = HTTPBearer()
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
-    """
-    Dependency to get the current authenticated user from JWT token.
-    """
-    token = credentials.credentials
+async def _authenticate(token: str, db: AsyncSession) -> Principal:
     payload = decode_token(token)
     
     if payload is None:
@@ -32,42 +28,94 @@ async def get_current_user(
             detail="Invalid token type",
         )
     
-    user_id: int = payload.get("sub")
-    if user_id is None:
+    try:
+        # "sub" is a string in the token; asyncpg won't compare it to an integer column
+        user_id = int(payload.get("sub"))
+    except (TypeError, ValueError):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
         )
     
-    user = db.query(User).filter(User.id == user_id).first()
-    if user is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found",
-        )
+    return await _load_principal(user_id, db)
+
+async def _load_principal(user_id: int, db: AsyncSession) -> Principal:
+    principal = principal_cache.get(user_id)
+    if principal is None:
+        user = await user_repo.aget(db, id=user_id)
+        if user is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="User not found",
+            )
+        principal = Principal.from_user(user)
+        principal_cache.set(principal)
     
-    if not user.is_active:
+    if not principal.is_active:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Inactive user",
         )
     
-    return user
+    return principal
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
+) -> Principal:
+    """
+    Dependency to get the current authenticated principal from JWT token.
+    The user lookup is cached for PRINCIPAL_CACHE_TTL_SECONDS (and dropped on
+    deactivation or role change); the session only connects on a miss.
+    """
+    return await _authenticate(credentials.credentials, db)
 
 async def get_current_active_user(
-    current_user: User = Depends(get_current_user)
-) -> User:
+    current_user: Principal = Depends(get_current_user)
+) -> Principal:
     """Dependency to ensure user is active."""
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
+async def get_stream_user(
+    ticket: Optional[str] = Query(None, description="Single-use ticket from POST /tasks/events/ticket"),
+    authorization: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
+) -> Principal:
+    """
+    get_current_user for event streams. EventSource and browser WebSockets can't
+    send headers, so they pass a short-lived single-use ticket instead of the
+    token, which would otherwise end up in access logs.
+    """
+    if authorization and authorization.lower().startswith("bearer "):
+        return await _authenticate(authorization[len("bearer "):], db)
+    user_id = task_access.redeem_ticket(ticket) if ticket else None
+    if user_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return await _load_principal(user_id, db)
+
+async def get_websocket_user(
+    ticket: Optional[str] = Query(None),
+    authorization: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
+) -> Principal:
+    """get_stream_user for WebSockets, which reject the handshake with a policy violation."""
+    try:
+        return await get_stream_user(ticket, authorization, db)
+    except HTTPException as e:
+        raise WebSocketException(code=status.WS_1008_POLICY_VIOLATION, reason=e.detail)
+
 def require_role(required_role: UserRole):
     """
     Dependency factory to check if user has required role.
     Usage: Depends(require_role(UserRole.ADMIN))
     """
-    async def role_checker(current_user: User = Depends(get_current_user)) -> User:
+    async def role_checker(current_user: Principal = Depends(get_current_user)) -> Principal:
         if current_user.role != required_role and current_user.role != UserRole.ADMIN:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
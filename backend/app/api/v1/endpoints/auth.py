@@ -1,11 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
 
-from app.core.database import get_db
+from app.core.database import get_async_db
 from app.core.security import (
-    verify_password,
-    get_password_hash,
+    verify_password_async,
+    get_password_hash_async,
     create_access_token,
     create_refresh_token,
     decode_token
@@ -18,19 +18,19 @@ router = APIRouter()
 from app.repositories.user import user_repo
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def register(user_data: UserRegister, db: Session = Depends(get_db)):
+async def register(user_data: UserRegister, db: AsyncSession = Depends(get_async_db)):
     """
     Register a new user.
     """
     # Check if email already exists
-    if user_repo.get_by_email(db, email=user_data.email):
+    if await user_repo.aget_by_email(db, email=user_data.email):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
     
     # Check if username already exists
-    if user_repo.get_by_username(db, username=user_data.username):
+    if await user_repo.aget_by_username(db, username=user_data.username):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Username already taken"
@@ -40,26 +40,30 @@ def register(user_data: UserRegister, db: Session = Depends(get_db)):
     user_in = {
         "email": user_data.email,
         "username": user_data.username,
-        "hashed_password": get_password_hash(user_data.password),
+        "hashed_password": await get_password_hash_async(user_data.password),
         "full_name": user_data.full_name
     }
     
-    new_user = user_repo.create(db, obj_in=user_in)
+    new_user = await user_repo.acreate(db, obj_in=user_in)
     
     return new_user
 
 @router.post("/login", response_model=Token)
-def login(credentials: UserLogin, db: Session = Depends(get_db)):
+async def login(credentials: UserLogin, db: AsyncSession = Depends(get_async_db)):
     """
     Login with username/email and password.
     Returns access and refresh tokens.
     """
     # Try to find user by username or email
-    user = user_repo.get_by_username(db, username=credentials.username)
+    user = await user_repo.aget_by_username(db, username=credentials.username)
     if not user:
-        user = user_repo.get_by_email(db, email=credentials.username)
+        user = await user_repo.aget_by_email(db, email=credentials.username)
     
-    if not user or not verify_password(credentials.password, user.hashed_password):
+    # bcrypt runs in the hashing pool, off the event loop
+    valid, new_hash = (False, None)
+    if user:
+        valid, new_hash = await verify_password_async(credentials.password, user.hashed_password)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -72,13 +76,15 @@ def login(credentials: UserLogin, db: Session = Depends(get_db)):
             detail="User account is inactive"
         )
     
-    # Update last login
+    # Update last login, upgrading the hash if the bcrypt cost changed
     user.last_login = datetime.utcnow()
-    db.commit()
+    if new_hash:
+        user.hashed_password = new_hash
+    await db.commit()
     
     # Create tokens
-    access_token = create_access_token(data={"sub": user.id})
-    refresh_token = create_refresh_token(data={"sub": user.id})
+    access_token = create_access_token(data={"sub": str(user.id)})
+    refresh_token = create_refresh_token(data={"sub": str(user.id)})
     
     return {
         "access_token": access_token,
@@ -87,7 +93,7 @@ def login(credentials: UserLogin, db: Session = Depends(get_db)):
     }
 
 @router.post("/refresh", response_model=Token)
-def refresh_token(token_data: TokenRefresh, db: Session = Depends(get_db)):
+async def refresh_token(token_data: TokenRefresh, db: AsyncSession = Depends(get_async_db)):
     """
     Refresh access token using refresh token.
     """
@@ -99,8 +105,14 @@ def refresh_token(token_data: TokenRefresh, db: Session = Depends(get_db)):
             detail="Invalid refresh token"
         )
     
-    user_id = payload.get("sub")
-    user = user_repo.get(db, id=user_id)
+    try:
+        user_id = int(payload.get("sub"))
+    except (TypeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token"
+        )
+    user = await user_repo.aget(db, id=user_id)
     
     if not user or not user.is_active:
         raise HTTPException(
@@ -109,8 +121,8 @@ def refresh_token(token_data: TokenRefresh, db: Session = Depends(get_db)):
         )
     
     # Create new tokens
-    access_token = create_access_token(data={"sub": user.id})
-    refresh_token = create_refresh_token(data={"sub": user.id})
+    access_token = create_access_token(data={"sub": str(user.id)})
+    refresh_token = create_refresh_token(data={"sub": str(user.id)})
     
     return {
         "access_token": access_token,
@@ -119,11 +131,26 @@ def refresh_token(token_data: TokenRefresh, db: Session = Depends(get_db)):
     }
 
 # Import dependency here to avoid circular import
-from app.api.dependencies import get_current_user
+from app.api.dependencies import get_current_user, require_role
+from app.models.user import UserRole
+from app.services.principal_cache import Principal, principal_cache
 
 @router.get("/me", response_model=UserResponse)
-def get_current_user_info(current_user: User = Depends(get_current_user)):
+async def get_current_user_info(
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
     """
     Get current user information.
     """
-    return current_user
+    user = await user_repo.aget(db, id=current_user.id)
+    if user is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    return user
+
+@router.get("/principal-cache")
+def get_principal_cache_stats(current_user: Principal = Depends(require_role(UserRole.ADMIN))):
+    """
+    Hit/miss counters of the principal cache used by authentication (admins only).
+    """
+    return principal_cache.stats()
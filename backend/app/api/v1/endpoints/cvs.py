@@ -1,12 +1,17 @@
-from fastapi import APIRouter, HTTPException, Depends
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, HTTPException, Depends, Header, Query, Response
+from fastapi.responses import FileResponse, StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+from datetime import datetime
+from urllib.parse import quote
+import base64
 from app.core.database import get_db
 from app.models.candidate import Candidate
-from app.models.user import User
 from app.services.pdf_generator import generate_pdf_report
+from app.services.report_cache import report_analysis, report_cache, report_version
+from app.services.blob_store import blob_store
 from app.api.dependencies import get_current_user
+from app.services.principal_cache import Principal
 from app.schemas.cv import CVAnalysisResponse
 
 router = APIRouter()
@@ -14,40 +19,130 @@ router = APIRouter()
 from app.repositories.candidate import candidate_repo
 
 from typing import Any
+
+# Analysis field -> Candidate column
+ANALYSIS_FIELDS = {
+    "filename": "filename",
+    "keywords": "keywords",
+    "format": "format",
+    "structure": "structure",
+    "recommendations": "recommendations",
+    "match_score": "match_score",
+    "missing_keywords": "missing_keywords",
+    "ai_extracted": "ai_data",
+}
+
+MEDIA_TYPES = {
+    "PDF": "application/pdf",
+    "DOCX": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "TXT": "text/plain; charset=utf-8",
+}
+
+def _serialize_candidate(c: Candidate, fields: Optional[List[str]] = None) -> dict:
+    analysis = {
+        "filename": c.filename,
+        "keywords": c.keywords,
+        "format": c.format,
+        "structure": c.structure,
+        "recommendations": c.recommendations,
+        "match_score": c.match_score,
+        "missing_keywords": c.missing_keywords or [],
+        "ai_extracted": c.ai_data
+    } if fields is None else {
+        field: getattr(c, ANALYSIS_FIELDS[field]) for field in fields
+    }
+    return {
+        "id": c.id,
+        "filename": c.filename,
+        "analysis": analysis,
+        "upload_date": c.upload_date
+    }
+
+def _encode_cursor(c: Candidate) -> str:
+    # Rows without an upload_date (older imports) page by id alone
+    upload_date = c.upload_date.isoformat() if c.upload_date is not None else ""
+    raw = f"{upload_date}|{c.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def _decode_cursor(cursor: str):
+    try:
+        upload_date, last_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return (datetime.fromisoformat(upload_date) if upload_date else None), int(last_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
 @router.get("/cvs", response_model=List[Any])
 def list_cvs(
-    current_user: User = Depends(get_current_user),
+    response: Response,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated analysis fields to return"),
+    min_score: Optional[float] = Query(None, ge=0, le=100),
+    format: Optional[str] = Query(None),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    # Filter candidates by current user
-    candidates = candidate_repo.get_by_user(db, user_id=current_user.id)
+    """
+    List the user's CVs, newest first, with keyset pagination.
+    The cursor for the next page is returned in the X-Next-Cursor header.
+    """
+    selected = None
+    columns = None
+    if fields:
+        selected = [f.strip() for f in fields.split(",") if f.strip()]
+        unknown = [f for f in selected if f not in ANALYSIS_FIELDS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+        columns = ["filename"] + [ANALYSIS_FIELDS[f] for f in selected]
     
-    results = []
-    for c in candidates:
-        analysis = {
-            "filename": c.filename,
-            "keywords": c.keywords,
-            "format": c.format,
-            "structure": c.structure,
-            "recommendations": c.recommendations,
-            "match_score": c.match_score,
-            "missing_keywords": c.missing_keywords or [],
-            "ai_extracted": c.ai_data
-        }
-        results.append({
-            "id": c.id,
-            "filename": c.filename,
-            "analysis": analysis,
-            "upload_date": c.upload_date
-        })
-    return results
+    # Filter candidates by current user; one extra row tells us if there is a next page
+    candidates = candidate_repo.get_page_by_user(
+        db,
+        user_id=current_user.id,
+        limit=limit + 1,
+        after=_decode_cursor(cursor) if cursor else None,
+        columns=columns,
+        min_score=min_score,
+        format=format
+    )
+    if len(candidates) > limit:
+        candidates = candidates[:limit]
+        response.headers["X-Next-Cursor"] = _encode_cursor(candidates[-1])
+    return [_serialize_candidate(c, selected) for c in candidates]
+
+@router.get("/cvs/search", response_model=List[Any])
+def search_cvs(
+    skills: List[str] = Query(..., description="Skills to look for; comma-separated or repeated"),
+    match: str = Query("all", pattern="^(all|any)$"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=100),
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Search the user's CVs by skill through the skill index.
+    match=all requires every skill, match=any at least one.
+    """
+    wanted = [s for value in skills for s in value.split(",") if s.strip()]
+    if not wanted:
+        raise HTTPException(status_code=400, detail="At least one skill is required")
+    
+    candidates = candidate_repo.search_by_skills(
+        db, user_id=current_user.id, skills=wanted, match_all=(match == "all"), skip=skip, limit=limit
+    )
+    return [_serialize_candidate(c) for c in candidates]
 
 @router.get("/export-pdf/{candidate_id}")
 def export_pdf(
     candidate_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db),
+    if_none_match: Optional[str] = Header(None)
 ):
+    """
+    Download the PDF report of a CV. Reports are cached per analysis version
+    and carry an ETag, so repeat downloads are served from disk or as 304.
+    """
     # Get candidate and verify ownership
     candidate = candidate_repo.get_by_id_and_user(db, id=candidate_id, user_id=current_user.id)
     
@@ -55,18 +150,49 @@ def export_pdf(
         raise HTTPException(status_code=404, detail="CV not found or access denied")
         
     # Reconstruct analysis dict for the PDF generator
-    analysis = {
-        "filename": candidate.filename,
-        "format": candidate.format,
-        "keywords": candidate.keywords,
-        "structure": candidate.structure,
-        "recommendations": candidate.recommendations
+    analysis = report_analysis(candidate)
+    version = report_version(analysis)
+    headers = {
+        "ETag": f'"{candidate_id}-{version}"',
+        "Cache-Control": "private, no-cache",  # Always revalidate; the ETag makes that cheap
+        "Content-Disposition": f"attachment; filename=analysis_{candidate_id}.pdf"
     }
+    if if_none_match and headers["ETag"] in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers={k: v for k, v in headers.items() if k != "Content-Disposition"})
     
-    pdf_buffer = generate_pdf_report(analysis)
+    path = report_cache.get(candidate_id, version)
+    if path is None:
+        pdf_buffer = generate_pdf_report(analysis)
+        path = report_cache.put(candidate_id, version, pdf_buffer.getvalue())
+        if path is None:
+            # Caching disabled or failed: serve the freshly built report from memory
+            return StreamingResponse(pdf_buffer, media_type="application/pdf", headers=headers)
     
-    return StreamingResponse(
-        pdf_buffer, 
-        media_type="application/pdf", 
-        headers={"Content-Disposition": f"attachment; filename=analysis_{candidate_id}.pdf"}
-    )
+    return FileResponse(path, media_type="application/pdf", headers=headers)
+
+@router.get("/cvs/{candidate_id}/file")
+def download_cv_file(
+    candidate_id: int,
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Download the original uploaded file of a CV. From the filesystem blob store
+    it is sent with sendfile, without passing through the process.
+    """
+    candidate = candidate_repo.get_by_id_and_user(db, id=candidate_id, user_id=current_user.id)
+    if not candidate or not candidate.blob_key:
+        raise HTTPException(status_code=404, detail="CV file not found or access denied")
+    
+    media_type = MEDIA_TYPES.get((candidate.format or "").upper(), "application/octet-stream")
+    headers = {
+        "ETag": f'"{candidate.blob_key}"',  # Content-addressed: the key never changes
+        "Cache-Control": "private, max-age=86400, immutable",
+        "Content-Disposition": f"attachment; filename*=utf-8''{quote(candidate.filename or 'cv')}"
+    }
+    path = blob_store.local_path(candidate.blob_key)
+    if path is not None:
+        return FileResponse(path, media_type=media_type, headers=headers)
+    if not blob_store.exists(candidate.blob_key):
+        raise HTTPException(status_code=404, detail="CV file not found or access denied")
+    return StreamingResponse(blob_store.iter_chunks(candidate.blob_key), media_type=media_type, headers=headers)
@@ -0,0 +1,132 @@
+import io
+import os
+import csv
+import json
+import logging
+from typing import Iterator
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse, StreamingResponse
+
+from celery.result import AsyncResult
+
+from app.celery_app import celery_app
+from app.core.database import SessionLocal
+from app.api.dependencies import get_current_user
+from app.services.principal_cache import Principal
+from app.repositories.candidate import candidate_repo
+from app.schemas.export import ExportRequest, ExportTaskResponse
+from app.services.task_access import task_access
+from app.services.task_events import completion_event
+from app.tasks.exports import export_path, export_reports_task
+
+router = APIRouter()
+logger = logging.getLogger("ats.api.export")
+
+# Exported Candidate columns (term vectors and skill index rows are internal)
+EXPORT_COLUMNS = [
+    "id", "filename", "format", "upload_date", "match_score", "ai_status",
+    "keywords", "missing_keywords", "structure", "recommendations", "ai_data",
+    "extraction_engine", "extraction_ms",
+]
+ROWS_PER_CHUNK = 500  # Rows per streamed chunk, and per database fetch
+
+def _csv_value(value):
+    if isinstance(value, list):
+        return "; ".join(str(v) for v in value)
+    if isinstance(value, dict):
+        return json.dumps(value, ensure_ascii=False)
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+def _stream_rows(user_id: int, export: ExportRequest) -> Iterator[str]:
+    """
+    Encodes the selected candidates chunk by chunk. Owns its session, since the
+    response body is produced after the request's dependencies are closed.
+    """
+    db = SessionLocal()
+    try:
+        candidates = candidate_repo.iter_by_user(
+            db,
+            user_id=user_id,
+            ids=export.ids,
+            columns=EXPORT_COLUMNS,
+            min_score=export.filter.min_score,
+            format=export.filter.file_format,
+            batch_size=ROWS_PER_CHUNK
+        )
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if export.format == "csv":
+            writer.writerow(EXPORT_COLUMNS)
+        rows = 0
+        for c in candidates:
+            if export.format == "csv":
+                writer.writerow([_csv_value(getattr(c, column)) for column in EXPORT_COLUMNS])
+            else:
+                row = {column: getattr(c, column) for column in EXPORT_COLUMNS}
+                buffer.write(json.dumps(row, ensure_ascii=False, default=str) + "\n")
+            rows += 1
+            if rows % ROWS_PER_CHUNK == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+    finally:
+        db.close()
+
+@router.post("/export")
+def export_candidates(
+    export: ExportRequest,
+    current_user: Principal = Depends(get_current_user)
+):
+    """
+    Export the user's candidates (all, filtered, or the given ids).
+    csv and ndjson stream the rows directly; zip starts a background task
+    that builds the PDF reports, downloadable from GET /export/{task_id}.
+    """
+    if export.format == "zip":
+        task = export_reports_task.delay(
+            user_id=current_user.id,
+            ids=export.ids,
+            min_score=export.filter.min_score,
+            file_format=export.filter.file_format
+        )
+        task_access.register([task.id], current_user.id)
+        return ExportTaskResponse(task_id=task.id, status="processing", message="Export started.")
+
+    media_type = "text/csv" if export.format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        _stream_rows(current_user.id, export),
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename=candidates.{export.format}"}
+    )
+
+@router.get("/export/{task_id}")
+def download_export(
+    task_id: str,
+    current_user: Principal = Depends(get_current_user)
+):
+    """
+    Download a finished zip export. Exports are kept for EXPORT_TTL_HOURS.
+    A failed export answers 500 with its error rather than "not ready".
+    """
+    path = export_path(current_user.id, os.path.basename(task_id))
+    if not os.path.exists(path):
+        if task_access.owners([task_id])[0] == current_user.id:
+            result = AsyncResult(task_id, app=celery_app)
+            try:
+                event = completion_event(task_id, result.state, result.result) if result.ready() else None
+            except Exception as e:
+                logger.warning(f"Could not read the state of export {task_id}: {e}")
+                event = None
+            if event is not None and event["status"] == "FAILURE":
+                raise HTTPException(status_code=500, detail=f"Export failed: {event['error']}")
+        raise HTTPException(status_code=404, detail="Export not found or not ready")
+    return FileResponse(
+        path,
+        media_type="application/zip",
+        headers={"Content-Disposition": f"attachment; filename=export_{task_id}.zip"}
+    )
@@ -0,0 +1,73 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from app.core.database import get_db
+from app.api.dependencies import get_current_user
+from app.services.principal_cache import Principal
+from app.repositories.candidate import candidate_repo
+from app.schemas.job import JobScoreRequest, JobScoreResponse
+from app.core.config import settings
+from app.services.matching_service import embedding_matcher, missing_keywords_for, rank_candidates
+from app.services.vector_index import vector_index
+
+router = APIRouter()
+
+@router.post("/jobs/score", response_model=JobScoreResponse)
+def score_job(
+    job: JobScoreRequest,
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Rank all of the user's stored candidates against one job description.
+    """
+    if (job.matcher or settings.MATCHER_BACKEND) == embedding_matcher.name:
+        return _score_job_by_embedding(job, current_user.id, db)
+    
+    vectors = candidate_repo.get_term_vectors_by_user(db, user_id=current_user.id)
+    ranked = rank_candidates(
+        job.job_description,
+        [vector for _, vector, _ in vectors],
+        top_k=job.top_k,
+        top_n=job.missing_top_n,
+        skills=[keywords for _, _, keywords in vectors]
+    )
+    
+    top_ids = [vectors[row][0] for row, _, _ in ranked]
+    candidates = {c.id: c for c in candidate_repo.get_many_by_user(db, ids=top_ids, user_id=current_user.id)}
+    
+    results = []
+    for row, score, missing in ranked:
+        c = candidates[vectors[row][0]]
+        results.append({
+            "id": c.id,
+            "filename": c.filename,
+            "upload_date": c.upload_date,
+            "match_score": score,
+            "missing_keywords": missing
+        })
+    return {"scored": len(vectors), "results": results}
+
+def _score_job_by_embedding(job: JobScoreRequest, user_id: int, db: Session):
+    # One nearest-neighbour query over the vector index, then keywords for the hits only
+    query = embedding_matcher.embed([job.job_description])[0]
+    hits, scored = vector_index.search(query, user_id, top_k=job.top_k)
+    candidates = {c.id: c for c in candidate_repo.get_many_by_user(db, ids=[cid for cid, _ in hits], user_id=user_id)}
+    hits = [(cid, score) for cid, score in hits if cid in candidates]
+    missing = missing_keywords_for(
+        job.job_description,
+        [candidates[cid].term_vector for cid, _ in hits],
+        [candidates[cid].keywords for cid, _ in hits],
+        top_n=job.missing_top_n
+    )
+    
+    results = []
+    for (cid, score), row_missing in zip(hits, missing):
+        c = candidates[cid]
+        results.append({
+            "id": c.id,
+            "filename": c.filename,
+            "upload_date": c.upload_date,
+            "match_score": round(max(0.0, score) * 100, 2),
+            "missing_keywords": row_missing
+        })
+    return {"scored": scored, "results": results}
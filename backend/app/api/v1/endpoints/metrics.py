@@ -0,0 +1,18 @@
+from fastapi import APIRouter, HTTPException, Response
+
+from app.core.config import settings
+from app.services.metrics import render_latest
+
+router = APIRouter()
+
+@router.get("/metrics", include_in_schema=False)
+def get_metrics():
+    """
+    Prometheus exposition: request latency per route, CV pipeline stage
+    timings, task durations, LLM tokens, AI fallback rate, Celery queue depth
+    and DB pool usage.
+    """
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    content, content_type = render_latest()
+    return Response(content=content, media_type=content_type)
@@ -0,0 +1,50 @@
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import FileResponse, PlainTextResponse
+
+from app.api.dependencies import require_role
+from app.models.user import UserRole
+from app.services.principal_cache import Principal
+from app.services.profiling import profile_store
+
+router = APIRouter()
+
+@router.get("/admin/profiles")
+def list_profiles(
+    kind: Optional[Literal["request", "task"]] = Query(None),
+    current_user: Principal = Depends(require_role(UserRole.ADMIN))
+):
+    """
+    Stored profiles, newest first: profiled requests (X-Profile header) and
+    the slowest sampled CV tasks (admins only).
+    """
+    return profile_store.list(kind)
+
+@router.get("/admin/profiles/{profile_id}", response_class=PlainTextResponse)
+def get_profile_report(
+    profile_id: str,
+    sort: Literal["cumulative", "tottime", "calls", "ncalls", "time"] = Query("cumulative"),
+    limit: int = Query(50, ge=1, le=1000),
+    current_user: Principal = Depends(require_role(UserRole.ADMIN))
+):
+    """
+    Text report of a profile: the top functions by the given sort key.
+    """
+    report = profile_store.report(profile_id, sort=sort, limit=limit)
+    if report is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return report
+
+@router.get("/admin/profiles/{profile_id}/download")
+def download_profile(
+    profile_id: str,
+    current_user: Principal = Depends(require_role(UserRole.ADMIN))
+):
+    """
+    The raw cProfile dump, for pstats, snakeviz or similar tools.
+    """
+    path = profile_store.dump_path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="application/octet-stream", filename=f"{profile_id}.prof")
@@ -1,14 +1,165 @@
-from fastapi import APIRouter
+import json
+import logging
+from typing import Any, AsyncIterator, Dict, List
+
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from app.api.dependencies import get_current_user, get_stream_user, get_websocket_user
 from app.celery_app import celery_app
+from app.core.config import settings
+from app.schemas.task import TaskStatus, TaskStatusRequest
+from app.services.principal_cache import Principal
+from app.services.task_access import task_access
+from app.services.task_events import task_events
+from celery.backends.base import KeyValueStoreBackend
 from celery.result import AsyncResult
 
 router = APIRouter()
+logger = logging.getLogger("ats.api.tasks")
+
+def _task_ids(ids: str) -> List[str]:
+    task_ids = list(dict.fromkeys(i.strip() for i in ids.split(",") if i.strip()))
+    if not task_ids:
+        raise HTTPException(status_code=400, detail="No task ids given")
+    if len(task_ids) > settings.TASK_EVENTS_MAX_TASKS:
+        raise HTTPException(status_code=400, detail=f"At most {settings.TASK_EVENTS_MAX_TASKS} tasks per subscription")
+    return task_ids
+
+def _check_owner(task_ids: List[str], user: Principal) -> None:
+    # Unknown and foreign tasks look the same: nothing to tell about either
+    if any(owner != user.id for owner in task_access.owners(task_ids)):
+        raise HTTPException(status_code=404, detail="Task not found")
+
+def _subscribe(task_ids: List[str]):
+    return task_events.subscribe(
+        task_ids,
+        keepalive=settings.TASK_EVENTS_KEEPALIVE_SECONDS,
+        max_seconds=settings.TASK_EVENTS_MAX_STREAM_SECONDS,
+    )
+
+async def _sse(task_ids: List[str]) -> AsyncIterator[str]:
+    async for event in _subscribe(task_ids):
+        if event is None:
+            yield ": keepalive\n\n"
+        else:
+            yield f"data: {json.dumps(event, default=str)}\n\n"
+
+def _result_backend():
+    return celery_app.backend
+
+def _task_metas(backend, task_ids: List[str]) -> List[Dict[str, Any]]:
+    """
+    Stored metadata of many tasks. Key-value backends (Redis) answer with a
+    single MGET; others are read task by task.
+    """
+    if isinstance(backend, KeyValueStoreBackend):
+        keys = [backend.get_key_for_task(task_id) for task_id in task_ids]
+        try:
+            values = backend.mget(keys)
+        except NotImplementedError:
+            values = None
+        if values is not None:
+            if hasattr(values, "items"):  # Some clients map key -> value
+                values = [values.get(key) for key in keys]
+            return [
+                backend.decode_result(value) if value is not None else {"status": "PENDING", "result": None}
+                for value in values
+            ]
+    return [backend.get_task_meta(task_id) for task_id in task_ids]
+
+def _task_status(task_id: str, meta: Dict[str, Any], summary: bool) -> TaskStatus:
+    status = meta.get("status", "PENDING")
+    result = meta.get("result")
+    if status == "FAILURE":
+        return TaskStatus(task_id=task_id, status=status, error=str(result))
+    if status != "SUCCESS":
+        return TaskStatus(task_id=task_id, status=status)
+    if not summary:
+        return TaskStatus(task_id=task_id, status=status, result=result)
+    response = TaskStatus(task_id=task_id, status=status)
+    if isinstance(result, dict):
+        if result.get("status") == "failed":
+            response.error = result.get("error")
+        response.candidate_id = result.get("id")
+        if "items" in result:
+            response.candidate_ids = [item["id"] for item in result["items"] if item.get("id") is not None]
+    return response
+
+@router.post("/tasks/status", response_model=List[TaskStatus], response_model_exclude_none=True)
+def get_tasks_status(request: TaskStatusRequest, current_user: Principal = Depends(get_current_user)):
+    """
+    Status of many tasks in one backend round trip. With summary, successful
+    tasks report only the candidate id(s) they created, not the analysis.
+    """
+    task_ids = list(dict.fromkeys(request.task_ids))
+    _check_owner(task_ids, current_user)
+    metas = _task_metas(_result_backend(), task_ids)
+    return [_task_status(task_id, meta, request.summary) for task_id, meta in zip(task_ids, metas)]
+
+@router.post("/tasks/events/ticket")
+def create_stream_ticket(current_user: Principal = Depends(get_current_user)):
+    """
+    Single-use ticket for opening one /tasks/events or /tasks/ws connection
+    (?ticket=), for clients that cannot send the Authorization header.
+    """
+    return {"ticket": task_access.issue_ticket(current_user.id), "expires_in": settings.TASK_STREAM_TICKET_SECONDS}
+
+@router.get("/tasks/events")
+async def stream_task_events(
+    ids: str = Query(..., description="Comma-separated task ids"),
+    current_user: Principal = Depends(get_stream_user)
+):
+    """
+    Server-Sent Events stream of progress and completion events for one or
+    more tasks (STARTED, PROGRESS, then SUCCESS or FAILURE with the result).
+    The stream ends once every task has finished, or after
+    TASK_EVENTS_MAX_STREAM_SECONDS with a TIMEOUT event for each task still
+    running. EventSource cannot send headers: pass a ticket as ?ticket=.
+    """
+    task_ids = _task_ids(ids)
+    _check_owner(task_ids, current_user)
+    return StreamingResponse(
+        _sse(task_ids),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.websocket("/tasks/ws")
+async def task_events_ws(
+    websocket: WebSocket,
+    ids: str = Query(...),
+    current_user: Principal = Depends(get_websocket_user)
+):
+    """
+    WebSocket variant of /tasks/events: sends each event as a JSON message
+    and closes once every task has finished or timed out. If the event
+    stream fails the socket is closed with 1011.
+    """
+    try:
+        task_ids = _task_ids(ids)
+        _check_owner(task_ids, current_user)
+    except HTTPException as e:
+        await websocket.close(code=1008, reason=e.detail)
+        return
+    await websocket.accept()
+    try:
+        async for event in _subscribe(task_ids):
+            if event is not None:
+                await websocket.send_json(event)
+    except WebSocketDisconnect:
+        return
+    except Exception as e:
+        logger.error(f"Task event stream failed: {e}")
+        await websocket.close(code=1011, reason="Task events unavailable")
+        return
+    await websocket.close()
 
 @router.get("/tasks/{task_id}")
-def get_task_status(task_id: str):
+def get_task_status(task_id: str, current_user: Principal = Depends(get_current_user)):
     """
     Get the status and result of a Celery task.
     """
+    _check_owner([task_id], current_user)
     task_result = AsyncResult(task_id, app=celery_app)
     
     response = {
@@ -1,67 +1,190 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException, Request, Form, Header, Depends
 from fastapi.responses import JSONResponse
+import io
+import asyncio
 import logging
-from sqlalchemy.orm import Session
-from app.services.file_handler import extract_text_from_file
+from contextlib import aclosing
+from celery import group
+from app.services.file_handler import spool_upload, iter_zip_members, FileTooLargeError
+from app.services.blob_store import blob_store
 from app.services.cv_analyzer import analyze_cv_text
 from app.services.matching_service import calculate_match_score, get_missing_keywords
-from app.core.database import get_db
+from app.core.config import settings
 from app.models.candidate import Candidate
-from app.models.user import User
 from app.schemas.cv import CVAnalysisResponse
 from app.api.dependencies import get_current_user
+from app.services.principal_cache import Principal
+from app.services.task_access import task_access
 from app.repositories.candidate import candidate_repo
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, AsyncIterator, BinaryIO, Tuple
 
 router = APIRouter()
 logger = logging.getLogger("ats.api.upload")
 
-from app.tasks.cv_processing import process_cv_task
+from app.tasks.cv_processing import process_cv_task, process_cv_batch_task
+
+MAX_SIZE = 2 * 1024 * 1024  # 2MB
+MAX_ZIP_SIZE = 200 * 1024 * 1024  # 200MB
+MAX_BATCH_FILES = 5000  # Files and zip members, accepted or not
+MAX_BATCH_BYTES = 500 * 1024 * 1024  # Accepted CV content per batch
+ALLOWED_EXTS = {"pdf", "docx", "txt"}
+
+def _store_blob(filename: str, fileobj: BinaryIO) -> Tuple[Optional[str], Optional[str]]:
+    """(blob key, error) of one CV, streamed into the blob store."""
+    try:
+        return blob_store.put_file(fileobj), None
+    except Exception as e:
+        logger.error(f"Could not store {filename}: {e}")
+        return None, f"Error al guardar archivo: {str(e)}"
+
+def _size(fileobj: BinaryIO) -> int:
+    size = fileobj.seek(0, io.SEEK_END)
+    fileobj.seek(0)
+    return size
+
+async def _iter_batch_files(files: List[UploadFile]) -> AsyncIterator[Tuple[str, Optional[BinaryIO], Optional[str]]]:
+    """
+    Yields (filename, file, error) for every CV of a batch, separate files and zip
+    members alike, reading each one only when the previous one was handled. A file
+    is only valid until the next one is requested.
+    """
+    for file in files:
+        filename = file.filename
+        ext = filename.lower().split('.')[-1]
+        
+        if ext == "zip":
+            try:
+                spool = await spool_upload(file, MAX_ZIP_SIZE)
+            except FileTooLargeError:
+                yield filename, None, "Archivo zip demasiado grande (máx 200MB)."
+                continue
+            with spool:
+                members = iter_zip_members(spool, ALLOWED_EXTS, MAX_SIZE)
+                while True:
+                    try:
+                        # Decompressing a member is blocking work: keep it off the event loop
+                        member = await asyncio.to_thread(next, members, None)
+                    except Exception as e:
+                        yield filename, None, f"Zip inválido: {str(e)}"
+                        break
+                    if member is None:
+                        break
+                    name, content, error = member
+                    yield name, (io.BytesIO(content) if content is not None else None), error
+            continue
+        
+        if ext not in ALLOWED_EXTS:
+            yield filename, None, "Extensión no permitida."
+            continue
+        try:
+            spool = await spool_upload(file, MAX_SIZE)
+        except FileTooLargeError:
+            yield filename, None, "Archivo demasiado grande (máx 2MB)."
+            continue
+        with spool:
+            yield filename, spool, None
 
 @router.post("/upload-cv", response_model=Dict[str, Any])
 async def upload_cv(
     file: UploadFile = File(...), 
     job_description: Optional[str] = Form(None),
     x_groq_api_key: Optional[str] = Header(None),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
     request: Request = None
 ):
-    MAX_SIZE = 2 * 1024 * 1024  # 2MB
-    ALLOWED_EXTS = {"pdf", "docx", "txt"}
-
     filename = file.filename
     ext = filename.lower().split('.')[-1]
     
     if ext not in ALLOWED_EXTS:
         return JSONResponse(content={"error": "Extensión no permitida."}, status_code=400)
 
-    content = await file.read()
-    if len(content) > MAX_SIZE:
-        return JSONResponse(content={"error": "Archivo demasiado grande (máx 2MB)."}, status_code=400)
-    
-    # Reset cursor for service
-    await file.seek(0)
-    
     try:
-        # Extract text synchronously for now (or make this async too if needed)
-        # But we need text to pass to Celery task
-        text = await extract_text_from_file(file)
-    except Exception as e:
-        return JSONResponse(content={"error": f"Error al procesar archivo: {str(e)}"}, status_code=500)
+        spool = await spool_upload(file, MAX_SIZE)
+    except FileTooLargeError:
+        return JSONResponse(content={"error": "Archivo demasiado grande (máx 2MB)."}, status_code=400)
+    with spool:
+        # Only the blob key goes to the worker, which parses the file itself
+        blob, error = await asyncio.to_thread(_store_blob, filename, spool)
+    if error:
+        return JSONResponse(content={"error": error}, status_code=500)
 
     # Trigger async task
     task = process_cv_task.delay(
-        cv_text=text,
+        blob=blob,
         filename=filename,
         ext=ext,
         user_id=current_user.id,
         job_description=job_description,
         api_key=x_groq_api_key
     )
+    task_access.register([task.id], current_user.id)
     
     return {
         "task_id": task.id,
         "status": "processing",
         "message": "CV file received and processing started."
     }
+
+@router.post("/upload-cv/batch", response_model=Dict[str, Any])
+async def upload_cv_batch(
+    files: List[UploadFile] = File(...),
+    job_description: Optional[str] = Form(None),
+    x_groq_api_key: Optional[str] = Header(None),
+    current_user: Principal = Depends(get_current_user)
+):
+    """
+    Upload many CVs at once, as separate files and/or zip archives.
+    Every accepted CV is processed by one Celery group; rejected files are reported per file.
+    """
+    rejected = []
+    items = []
+    entries = 0
+    total = 0
+    
+    # Files are streamed into the blob store one at a time as they are read: only keys accumulate
+    async with aclosing(_iter_batch_files(files)) as entries_iter:
+        async for filename, fileobj, error in entries_iter:
+            entries += 1
+            if entries > MAX_BATCH_FILES:
+                return JSONResponse(content={"error": f"Demasiados archivos (máx {MAX_BATCH_FILES})."}, status_code=400)
+            if error:
+                rejected.append({"filename": filename, "error": error})
+                continue
+            total += _size(fileobj)
+            if total > MAX_BATCH_BYTES:
+                return JSONResponse(content={"error": "Lote demasiado grande (máx 500MB)."}, status_code=400)
+            # The workers extract the text from the blob store
+            blob, error = await asyncio.to_thread(_store_blob, filename, fileobj)
+            if error:
+                rejected.append({"filename": filename, "error": error})
+                continue
+            items.append({"blob": blob, "filename": filename, "ext": filename.lower().split('.')[-1]})
+    
+    if not items:
+        return JSONResponse(content={"error": "Ningún archivo válido.", "rejected": rejected}, status_code=400)
+    
+    # One batch task per chunk: one transaction and one Groq client per chunk
+    size = max(1, settings.CV_BATCH_CHUNK_SIZE)
+    chunks = [items[i:i + size] for i in range(0, len(items), size)]
+    result = group(
+        process_cv_batch_task.s(
+            items=chunk,
+            user_id=current_user.id,
+            job_description=job_description,
+            api_key=x_groq_api_key
+        )
+        for chunk in chunks
+    ).apply_async()
+    result.save()
+    task_access.register([r.id for r in result.results], current_user.id)
+    
+    return {
+        "group_id": result.id,
+        "tasks": [
+            {"task_id": r.id, "filenames": [item["filename"] for item in chunk]}
+            for chunk, r in zip(chunks, result.results)
+        ],
+        "rejected": rejected,
+        "status": "processing",
+        "message": f"{len(items)} CV files received and processing started."
+    }
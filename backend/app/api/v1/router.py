@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import upload, cvs, auth, tasks
+from app.api.v1.endpoints import upload, cvs, auth, tasks, jobs, export, metrics, profiles
 
 api_router = APIRouter()
 
@@ -8,3 +8,7 @@ api_router.include_router(auth.router, prefix="/auth", tags=["Authentication"])
 api_router.include_router(upload.router, tags=["Upload"])
 api_router.include_router(cvs.router, tags=["CVs"])
 api_router.include_router(tasks.router, tags=["Tasks"])
+api_router.include_router(jobs.router, tags=["Jobs"])
+api_router.include_router(export.router, tags=["Export"])
+api_router.include_router(metrics.router, tags=["Metrics"])
+api_router.include_router(profiles.router, tags=["Admin"])
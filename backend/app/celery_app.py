@@ -1,4 +1,7 @@
+import os
+import time
 from celery import Celery
+from celery.signals import before_task_publish, task_postrun, task_prerun, worker_process_init, worker_process_shutdown
 from app.core.config import settings
 
 # Default redis url if not in settings
@@ -12,6 +15,54 @@ celery_app.conf.update(
     result_serializer="json",
     timezone="UTC",
     enable_utc=True,
+    # Stored results expire; clients read them shortly after completion
+    result_expires=settings.TASK_RESULT_EXPIRES_SECONDS,
 )
 
 celery_app.autodiscover_tasks(["app.tasks"])
+
+# Start times of the tasks running in this process, by task id
+_task_started = {}
+
+
+@worker_process_init.connect
+def load_matching_model(**kwargs):
+    """Load (or fit once) the corpus matching model when a worker starts."""
+    from app.core.database import SessionLocal
+    from app.services.matching_service import corpus_model
+    corpus_model.load_or_fit(SessionLocal)
+
+@worker_process_shutdown.connect
+def save_matching_model(**kwargs):
+    from app.services.matching_service import corpus_model
+    from app.services.metrics import mark_process_dead
+    corpus_model.save()
+    mark_process_dead(os.getpid())
+
+
+@before_task_publish.connect
+def stamp_published_at(headers=None, **kwargs):
+    # Lets the worker measure how long the task waited in the queue
+    if headers is not None:
+        headers["published_at"] = time.time()
+
+@task_prerun.connect
+def publish_task_started(task_id=None, task=None, **kwargs):
+    from app.services.metrics import stage
+    from app.services.task_events import task_event, task_events
+    published_at = getattr(task.request, "published_at", None) if task is not None else None
+    if published_at:
+        stage("queue").observe(max(time.time() - published_at, 0.0))
+    _task_started[task_id] = time.perf_counter()
+    task_events.publish(task_event(task_id, "STARTED"))
+
+@task_postrun.connect
+def publish_task_finished(task_id=None, task=None, retval=None, state=None, **kwargs):
+    # Sent after the result is stored, so a client may fetch it on this event
+    from app.services.metrics import TASK_SECONDS
+    from app.services.task_events import completion_event, task_events
+    started = _task_started.pop(task_id, None)
+    event = completion_event(task_id, state, retval)
+    if started is not None and task is not None:
+        TASK_SECONDS.labels(task=task.name, state=event["status"]).observe(time.perf_counter() - started)
+    task_events.publish(event)
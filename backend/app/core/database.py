@@ -1,4 +1,5 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from app.core.config import settings
 
@@ -7,12 +8,40 @@ is_sqlite = settings.DATABASE_URL.startswith("sqlite")
 
 connect_args = {"check_same_thread": False} if is_sqlite else {}
 
+# SQLite uses a single-connection pool that takes no sizing options
+pool_args = {} if is_sqlite else {
+    "pool_size": settings.DB_POOL_SIZE,
+    "max_overflow": settings.DB_MAX_OVERFLOW,
+    "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+    "pool_pre_ping": settings.DB_POOL_PRE_PING,
+}
+
+def async_database_url(url: str) -> str:
+    """DATABASE_URL with its async driver: asyncpg for PostgreSQL, aiosqlite for SQLite."""
+    scheme, sep, rest = url.partition("://")
+    dialect = scheme.split("+")[0]
+    if dialect in ("postgresql", "postgres"):
+        return f"postgresql+asyncpg{sep}{rest}"
+    if dialect == "sqlite":
+        return f"sqlite+aiosqlite{sep}{rest}"
+    return url
+
+# Sync engine: Celery tasks, scripts and the sync (threadpool) endpoints
 engine = create_engine(
-    settings.DATABASE_URL, 
-    connect_args=connect_args
+    settings.DATABASE_URL,
+    connect_args=connect_args,
+    **pool_args
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine: async endpoints and dependencies, so DB round-trips don't block the event loop
+async_engine = create_async_engine(
+    settings.ASYNC_DATABASE_URL or async_database_url(settings.DATABASE_URL),
+    **pool_args
+)
+# Objects stay usable after commit; async sessions can't lazy-load expired attributes
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 def get_db():
@@ -21,3 +50,7 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,85 @@
+"""
+Upgrade of an existing database to the current models.
+
+    python -m app.core.schema
+
+create_all only creates missing tables; it never alters existing ones. This
+adds the columns and indexes that the models gained since a table was
+created. New columns must be nullable (or have a server default), so rows
+that already exist stay valid. It runs at API startup as well; run it by
+hand before starting Celery workers against an upgraded database.
+"""
+import sys
+import logging
+from typing import List
+
+from sqlalchemy import inspect
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.schema import CreateIndex
+
+from app.core.database import Base
+
+logger = logging.getLogger("ats.schema")
+
+
+def _add_column(engine: Engine, table, column) -> str:
+    preparer = engine.dialect.identifier_preparer
+    column_type = column.type.compile(dialect=engine.dialect)
+    # PostgreSQL tolerates API workers upgrading at the same time; SQLite has no IF NOT EXISTS here
+    if_not_exists = "IF NOT EXISTS " if engine.dialect.name == "postgresql" else ""
+    return (
+        f"ALTER TABLE {preparer.format_table(table)} "
+        f"ADD COLUMN {if_not_exists}{preparer.format_column(column)} {column_type}"
+    )
+
+
+def upgrade_schema(engine: Engine) -> List[str]:
+    """Adds the missing columns and indexes of existing tables; returns what was added."""
+    import app.models  # noqa: F401  Register the models
+
+    inspector = inspect(engine)
+    tables = set(inspector.get_table_names())
+    added = []
+    for table in Base.metadata.sorted_tables:
+        if table.name not in tables:
+            continue  # create_all creates it whole
+        columns = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in columns:
+                continue
+            if not column.nullable and column.server_default is None:
+                raise RuntimeError(f"Cannot add NOT NULL column {table.name}.{column.name} to existing rows")
+            try:
+                with engine.begin() as connection:
+                    connection.exec_driver_sql(_add_column(engine, table, column))
+            except DBAPIError:
+                # Another process may have added it meanwhile
+                if column.name not in {c["name"] for c in inspect(engine).get_columns(table.name)}:
+                    raise
+            added.append(f"{table.name}.{column.name}")
+
+        indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name in indexes:
+                continue
+            with engine.begin() as connection:
+                connection.execute(CreateIndex(index, if_not_exists=True))
+            added.append(index.name)
+
+    for name in added:
+        logger.info(f"Schema upgrade: added {name}")
+    return added
+
+
+def main() -> int:
+    from app.core.database import engine
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    Base.metadata.create_all(bind=engine)
+    added = upgrade_schema(engine)
+    print(f"{len(added)} columns/indexes added" if added else "Schema is up to date")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
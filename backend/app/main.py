@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse, JSONResponse
@@ -5,21 +6,35 @@ from fastapi.middleware.cors import CORSMiddleware
 import os
 import logging
 from app.api.v1.router import api_router
-from app.core.database import engine, Base
+from app.core.database import engine, async_engine, Base
 from app.core.config import settings
+from app.core.schema import upgrade_schema
+from app.core.security import shutdown_hash_pool
+from app.services.metrics import MetricsMiddleware
+from app.services.profiling import ProfilingMiddleware
+from app.services.task_events import task_events
 import app.models # Register models
 
-# Create tables
+# Create tables, and add the columns/indexes older databases lack (create_all never alters)
 Base.metadata.create_all(bind=engine)
+upgrade_schema(engine)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("ats")
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    shutdown_hash_pool()
+    await task_events.aclose()
+    await async_engine.dispose()
+
 app = FastAPI(
     title=settings.APP_NAME,
     version=settings.VERSION,
-    debug=settings.DEBUG
+    debug=settings.DEBUG,
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -29,8 +44,18 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Pagination cursor of GET /cvs; browsers hide non-safelisted headers otherwise
+    expose_headers=["X-Next-Cursor"],
 )
 
+# Request latency per route (see /metrics)
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+# Opt-in per-request profiles (see app/services/profiling.py); cheap header check otherwise
+if settings.PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
 # Include API routes
 # We include them at root to match original paths: /upload-cv, /cvs, etc.
 app.include_router(api_router)
@@ -59,7 +84,7 @@ if os.path.exists(frontend_dist):
         # Si la ruta no es de API ni archivo estático, servir index.html
         # Check against API routes?
         # A simple heuristic: if it doesn't start with recognized api paths (defined in router)
-        if full_path.startswith("upload-cv") or full_path.startswith("cvs") or full_path.startswith("export-pdf") or full_path.startswith("auth") or full_path.startswith("tasks"):
+        if full_path.startswith("upload-cv") or full_path.startswith("cvs") or full_path.startswith("export") or full_path.startswith("auth") or full_path.startswith("tasks") or full_path.startswith("jobs") or full_path.startswith("metrics") or full_path.startswith("admin"):
              # This should have been caught by the router if method matches? 
              # But this catch-all might shadow them if defined before? 
              # No, specific routes take precedence usually.
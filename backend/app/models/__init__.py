@@ -1,2 +1,3 @@
 from .candidate import Candidate
+from .candidate_skill import CandidateSkill
 from .user import User
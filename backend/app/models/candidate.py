@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, JSON, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, JSON, Text, DateTime, ForeignKey, LargeBinary, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.core.database import Base
@@ -11,6 +11,11 @@ class Candidate(Base):
     filename = Column(String, index=True)
     format = Column(String)
     upload_date = Column(DateTime, default=datetime.utcnow)
+    content_hash = Column(String(64), nullable=True, index=True)  # sha256 of the normalized CV text
+    blob_key = Column(String(64), nullable=True, index=True)  # sha256 of the original file (blob_store)
+    # How the text was extracted (see text_extraction.Extraction) and how long it took
+    extraction_engine = Column(String(32), nullable=True)
+    extraction_ms = Column(Float, nullable=True)
     
     # Analysis Data
     keywords = Column(JSON)
@@ -21,8 +26,19 @@ class Candidate(Base):
     match_score = Column(Float, default=0.0)
     missing_keywords = Column(JSON, default=[])
     
+    # Hashed term counts of the CV text (see matching_service.encode_term_vector)
+    term_vector = Column(LargeBinary, nullable=True)
+    
     # AI Extracted Data
     ai_data = Column(JSON, nullable=True)
+    # completed | fallback | deferred | disabled (see cv_analyzer.build_analysis)
+    ai_status = Column(String(16), nullable=True, index=True)
     
     # Relationship
     user = relationship("User", backref="candidates")
+    skills = relationship("CandidateSkill", cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        # Keyset pagination of a user's CVs, newest first
+        Index("ix_candidates_user_upload", "user_id", "upload_date", "id"),
+    )
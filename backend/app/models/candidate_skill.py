@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, Index
+from app.core.database import Base
+
+class CandidateSkill(Base):
+    """Inverted index of normalized skills -> candidates, used by skill search."""
+    __tablename__ = "candidate_skills"
+
+    candidate_id = Column(Integer, ForeignKey("candidates.id", ondelete="CASCADE"), primary_key=True)
+    skill = Column(String, primary_key=True)
+    # Denormalized so searches never touch the candidates table until the final page
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+
+    __table_args__ = (
+        Index("ix_candidate_skills_user_skill", "user_id", "skill", "candidate_id"),
+    )
+
+def normalize_skill(skill: str) -> str:
+    return " ".join(str(skill).lower().split())
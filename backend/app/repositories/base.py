@@ -1,4 +1,6 @@
 from typing import Generic, TypeVar, Type, List, Optional, Any
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.core.database import Base
 
@@ -11,6 +13,10 @@ class BaseRepository(Generic[ModelType]):
     def get(self, db: Session, id: Any) -> Optional[ModelType]:
         return db.query(self.model).filter(self.model.id == id).first()
 
+    async def aget(self, db: AsyncSession, id: Any) -> Optional[ModelType]:
+        result = await db.execute(select(self.model).where(self.model.id == id))
+        return result.scalars().first()
+
     def get_multi(self, db: Session, skip: int = 0, limit: int = 100) -> List[ModelType]:
         return db.query(self.model).offset(skip).limit(limit).all()
 
@@ -23,6 +29,13 @@ class BaseRepository(Generic[ModelType]):
         db.refresh(db_obj)
         return db_obj
 
+    async def acreate(self, db: AsyncSession, obj_in: Any) -> ModelType:
+        db_obj = self.model(**obj_in) if isinstance(obj_in, dict) else self.model(**obj_in.dict())
+        db.add(db_obj)
+        await db.commit()
+        await db.refresh(db_obj)
+        return db_obj
+
     def update(self, db: Session, *, db_obj: ModelType, obj_in: Any) -> ModelType:
         obj_data = obj_in if isinstance(obj_in, dict) else obj_in.dict(exclude_unset=True)
         for field in obj_data:
@@ -1,13 +1,189 @@
-from typing import List
-from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session, load_only
 from app.repositories.base import BaseRepository
 from app.models.candidate import Candidate
+from app.models.candidate_skill import CandidateSkill
+from app.services.skill_taxonomy import skill_key
+
+def skill_keys(keywords: Optional[Iterable[str]], ai_data: Optional[dict] = None) -> List[str]:
+    """Canonical, de-duplicated skills of a candidate for the skill index."""
+    skills = list(keywords or [])
+    if ai_data and isinstance(ai_data.get("skills"), list):
+        skills.extend(ai_data["skills"])
+    keys = []
+    for skill in skills:
+        if not isinstance(skill, str) or skill.startswith("("):  # Skip "(Ninguna keyword detectada)"
+            continue
+        key = skill_key(skill)
+        if key and key not in keys:
+            keys.append(key)
+    return keys
 
 class CandidateRepository(BaseRepository[Candidate]):
+    def _build(self, obj_in: Any) -> Candidate:
+        # Keep the skill index in sync with the stored keywords
+        obj_data = obj_in if isinstance(obj_in, dict) else obj_in.dict()
+        db_obj = Candidate(**obj_data)
+        db_obj.skills = [
+            CandidateSkill(skill=key, user_id=db_obj.user_id)
+            for key in skill_keys(db_obj.keywords, db_obj.ai_data)
+        ]
+        return db_obj
+
+    def create(self, db: Session, obj_in: Any) -> Candidate:
+        db_obj = self._build(obj_in)
+        db.add(db_obj)
+        db.commit()
+        db.refresh(db_obj)
+        return db_obj
+
+    def create_many(self, db: Session, objs_in: List[Any]) -> List[int]:
+        """
+        Inserts many candidates (and their skills) in one transaction.
+        Returns the new ids, read before commit so no row has to be refreshed.
+        """
+        db_objs = [self._build(obj_in) for obj_in in objs_in]
+        try:
+            db.add_all(db_objs)
+            db.flush()  # Batched INSERTs; assigns ids
+            ids = [obj.id for obj in db_objs]
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        return ids
+
+    def update_analysis(self, db: Session, db_obj: Candidate, obj_in: dict) -> Candidate:
+        """Stores a new analysis of a candidate, rebuilding its skill index."""
+        for field, value in obj_in.items():
+            setattr(db_obj, field, value)
+        db_obj.skills = [
+            CandidateSkill(skill=key, user_id=db_obj.user_id)
+            for key in skill_keys(db_obj.keywords, db_obj.ai_data)
+        ]
+        try:
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        return db_obj
+
     def get_by_user(self, db: Session, user_id: int, skip: int = 0, limit: int = 100) -> List[Candidate]:
         return db.query(Candidate).filter(Candidate.user_id == user_id).order_by(Candidate.upload_date.desc()).offset(skip).limit(limit).all()
 
+    def get_page_by_user(
+        self,
+        db: Session,
+        user_id: int,
+        limit: int = 100,
+        after: Optional[Tuple[Optional[datetime], int]] = None,
+        columns: Optional[List[str]] = None,
+        min_score: Optional[float] = None,
+        format: Optional[str] = None,
+    ) -> List[Candidate]:
+        """
+        Keyset page of a user's candidates ordered by (upload_date, id) descending,
+        rows without an upload_date first (the order of a backward index scan).
+        `after` is the (upload_date, id) of the last row of the previous page and
+        `columns` restricts which attributes are loaded (id and upload_date always are).
+        """
+        query = db.query(Candidate).filter(Candidate.user_id == user_id)
+        if columns is not None:
+            names = {"id", "upload_date", *columns}
+            query = query.options(load_only(*(getattr(Candidate, name) for name in names)))
+        if min_score is not None:
+            query = query.filter(Candidate.match_score >= min_score)
+        if format:
+            query = query.filter(Candidate.format == format.upper())
+        if after is not None:
+            upload_date, last_id = after
+            if upload_date is None:
+                query = query.filter(or_(
+                    and_(Candidate.upload_date.is_(None), Candidate.id < last_id),
+                    Candidate.upload_date.isnot(None)
+                ))
+            else:
+                query = query.filter(or_(
+                    Candidate.upload_date < upload_date,
+                    and_(Candidate.upload_date == upload_date, Candidate.id < last_id)
+                ))
+        order = (Candidate.upload_date.desc().nulls_first(), Candidate.id.desc())
+        return query.order_by(*order).limit(limit).all()
+
+    def iter_by_user(
+        self,
+        db: Session,
+        user_id: int,
+        ids: Optional[List[int]] = None,
+        columns: Optional[List[str]] = None,
+        min_score: Optional[float] = None,
+        format: Optional[str] = None,
+        batch_size: int = 1000,
+    ) -> Iterator[Candidate]:
+        """
+        Streams a user's candidates in id order, `batch_size` rows at a time, over a
+        server-side cursor where the driver supports one, so memory stays flat.
+        """
+        query = db.query(Candidate).filter(Candidate.user_id == user_id)
+        if columns is not None:
+            query = query.options(load_only(*(getattr(Candidate, name) for name in {"id", *columns})))
+        if ids is not None:
+            query = query.filter(Candidate.id.in_(ids))
+        if min_score is not None:
+            query = query.filter(Candidate.match_score >= min_score)
+        if format:
+            query = query.filter(Candidate.format == format.upper())
+        return iter(query.order_by(Candidate.id).yield_per(batch_size))
+
     def get_by_id_and_user(self, db: Session, id: int, user_id: int) -> Candidate:
         return db.query(Candidate).filter(Candidate.id == id, Candidate.user_id == user_id).first()
 
+    def get_term_vectors_by_user(self, db: Session, user_id: int) -> List[Tuple[int, bytes, Optional[list]]]:
+        """(id, term_vector, keywords) of every candidate of the user that has a stored vector."""
+        return db.query(Candidate.id, Candidate.term_vector, Candidate.keywords).filter(
+            Candidate.user_id == user_id, Candidate.term_vector.isnot(None)
+        ).all()
+
+    def get_many_by_user(self, db: Session, ids: List[int], user_id: int) -> List[Candidate]:
+        return db.query(Candidate).filter(Candidate.id.in_(ids), Candidate.user_id == user_id).all()
+
+    def get_ai_deferred(self, db: Session, limit: int = 100) -> List[Candidate]:
+        """Candidates whose AI extraction was deferred, oldest first, for re-enrichment."""
+        return db.query(Candidate).filter(Candidate.ai_status == "deferred").order_by(Candidate.id).limit(limit).all()
+
+    def get_reprocessable(
+        self,
+        db: Session,
+        after_id: int = 0,
+        limit: int = 100,
+        ai_status: Optional[str] = None,
+        user_id: Optional[int] = None,
+    ) -> List[Candidate]:
+        """Keyset page, in id order, of candidates whose original file is in the blob store."""
+        query = db.query(Candidate).filter(Candidate.id > after_id, Candidate.blob_key.isnot(None))
+        if ai_status:
+            query = query.filter(Candidate.ai_status == ai_status)
+        if user_id is not None:
+            query = query.filter(Candidate.user_id == user_id)
+        return query.order_by(Candidate.id).limit(limit).all()
+
+    def search_by_skills(self, db: Session, user_id: int, skills: List[str], match_all: bool = True, skip: int = 0, limit: int = 100) -> List[Candidate]:
+        """
+        Candidates having all (or any) of the given skills, resolved through the skill index.
+        """
+        keys = list(dict.fromkeys(skill_key(s) for s in skills if s.strip()))
+        if not keys:
+            return []
+        matches = db.query(CandidateSkill.candidate_id).filter(
+            CandidateSkill.user_id == user_id, CandidateSkill.skill.in_(keys)
+        ).group_by(CandidateSkill.candidate_id)
+        if match_all:
+            matches = matches.having(func.count(CandidateSkill.skill) == len(keys))
+        matches = matches.subquery()
+        return db.query(Candidate).join(matches, Candidate.id == matches.c.candidate_id).order_by(
+            Candidate.upload_date.desc(), Candidate.id.desc()
+        ).offset(skip).limit(limit).all()
+
 candidate_repo = CandidateRepository(Candidate)
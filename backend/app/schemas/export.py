@@ -0,0 +1,19 @@
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
+
+# Request schemas
+class ExportFilter(BaseModel):
+    min_score: Optional[float] = Field(None, ge=0, le=100)
+    file_format: Optional[str] = None  # PDF | DOCX | TXT
+
+class ExportRequest(BaseModel):
+    # zip: PDF reports built by a background task; csv/ndjson: streamed rows
+    format: Literal["zip", "csv", "ndjson"] = "csv"
+    ids: Optional[List[int]] = Field(None, max_length=10000)
+    filter: ExportFilter = ExportFilter()
+
+# Response schemas
+class ExportTaskResponse(BaseModel):
+    task_id: str
+    status: str
+    message: str
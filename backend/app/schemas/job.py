@@ -0,0 +1,23 @@
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
+from datetime import datetime
+
+# Request schemas
+class JobScoreRequest(BaseModel):
+    job_description: str = Field(..., min_length=1)
+    top_k: int = Field(20, ge=1, le=1000)
+    missing_top_n: int = Field(5, ge=0, le=50)
+    # tfidf scores stored term vectors; embedding queries the vector index. Default: MATCHER_BACKEND
+    matcher: Optional[Literal["tfidf", "embedding"]] = None
+
+# Response schemas
+class RankedCandidate(BaseModel):
+    id: int
+    filename: Optional[str]
+    upload_date: Optional[datetime]
+    match_score: float
+    missing_keywords: List[str] = []
+
+class JobScoreResponse(BaseModel):
+    scored: int
+    results: List[RankedCandidate]
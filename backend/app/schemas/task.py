@@ -0,0 +1,17 @@
+from pydantic import BaseModel, Field
+from typing import Any, List, Optional
+
+# Request schemas
+class TaskStatusRequest(BaseModel):
+    task_ids: List[str] = Field(..., min_length=1, max_length=1000)
+    # Only state and candidate id(s), not the stored analysis
+    summary: bool = False
+
+# Response schemas
+class TaskStatus(BaseModel):
+    task_id: str
+    status: str
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    candidate_id: Optional[int] = None  # Single-CV tasks (summary)
+    candidate_ids: Optional[List[int]] = None  # Batch tasks (summary)
@@ -1,49 +1,179 @@
 import os
 import json
+import time
+import asyncio
+import hashlib
 import logging
-from typing import Dict, Any
-from groq import Groq
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Union
+from groq import Groq, AsyncGroq, APIStatusError, RateLimitError, APIConnectionError, InternalServerError
+from app.core.config import settings
+from app.services.resilience import AIDeferredError, CircuitBreaker, rate_limiter, retry_delay
+from app.services import metrics
 
 logger = logging.getLogger("ats.ai")
 
+# Errors worth retrying (and counted by the circuit breaker); anything else falls back at once
+TRANSIENT_ERRORS = (RateLimitError, APIConnectionError, InternalServerError)
+
+class ClientPool:
+    """
+    Bounded LRU pool of API clients keyed by API key.
+    Reusing a client reuses its HTTP connections (and TLS sessions) across calls.
+    """
+    def __init__(self, factory: Callable[[str], Any], max_size: int, on_evict: Optional[Callable[[Any], None]] = None):
+        self.factory = factory
+        self.max_size = max_size
+        self.on_evict = on_evict
+        self._clients: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, api_key: str):
+        with self._lock:
+            client = self._clients.get(api_key)
+            if client is not None:
+                self._clients.move_to_end(api_key)
+                return client
+            client = self.factory(api_key)
+            self._clients[api_key] = client
+            evicted = []
+            while len(self._clients) > self.max_size:
+                evicted.append(self._clients.popitem(last=False)[1])
+        for old in evicted:
+            if self.on_evict:
+                try:
+                    self.on_evict(old)
+                except Exception as e:
+                    logger.warning(f"Error closing evicted Groq client: {e}")
+        return client
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
 class AIService:
-    def __init__(self):
+    def __init__(self, base_url: Optional[str] = None):
         self.api_key = os.environ.get("GROQ_API_KEY")
+        self.base_url = base_url or settings.GROQ_BASE_URL
+        self._clients = ClientPool(self._new_client, settings.GROQ_CLIENT_POOL_SIZE, on_evict=lambda c: c.close())
+        # Async clients belong to the background loop below and are only touched from it
+        self._async_clients = ClientPool(
+            self._new_async_client,
+            settings.GROQ_CLIENT_POOL_SIZE,
+            on_evict=lambda c: asyncio.get_running_loop().create_task(c.close())
+        )
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_lock = threading.Lock()
         self.client = None
         if self.api_key:
             try:
-                self.client = Groq(api_key=self.api_key)
+                self.client = self._clients.get(self.api_key)
             except Exception as e:
                 logger.error(f"Failed to initialize Groq client: {e}")
         else:
             logger.warning("GROQ_API_KEY not found. AI features will be disabled.")
 
-    def extract_cv_data(self, text: str, api_key: str = None) -> Dict[str, Any]:
+    # Retries are ours (see _call), so the SDK's own are disabled
+    def _new_client(self, api_key: str) -> Groq:
+        return Groq(api_key=api_key, base_url=self.base_url, timeout=settings.GROQ_TIMEOUT_SECONDS, max_retries=0)
+
+    def _new_async_client(self, api_key: str) -> AsyncGroq:
+        return AsyncGroq(api_key=api_key, base_url=self.base_url, timeout=settings.GROQ_TIMEOUT_SECONDS, max_retries=0)
+
+    def breaker(self, api_key: str) -> CircuitBreaker:
+        key = hashlib.sha256(api_key.encode()).hexdigest()
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            breaker = self._breakers.setdefault(
+                key, CircuitBreaker(settings.GROQ_BREAKER_FAILURE_THRESHOLD, settings.GROQ_BREAKER_RESET_SECONDS)
+            )
+        return breaker
+
+    def _call(self, api_key: str, request: Callable[[], Any]) -> Any:
         """
-        Uses Llama 3 via Groq to extract structured data from CV text.
+        Runs a Groq request under the shared rate limit, retrying transient errors
+        with backoff (honouring Retry-After) and failing fast while the breaker is open.
+        Raises AIDeferredError when the request could not be made.
         """
-        # Determine which key to use
-        current_key = api_key or self.api_key
-        
-        if not current_key:
-            return None
-            
-        # If a specific key is passed, we shouldn't use the cached self.client (which might use env var)
-        # unless it matches. For simplicity, let's create a client if key provided.
-        client = self.client
-        if api_key:
+        breaker = self.breaker(api_key)
+        for attempt in range(settings.GROQ_MAX_RETRIES + 1):
+            if not breaker.allow():
+                raise AIDeferredError("Groq circuit breaker is open")
             try:
-                client = Groq(api_key=api_key)
-            except Exception as e:
-                logger.error(f"Failed to initialize Groq client with provided key: {e}")
-                return None
-        
-        if not client:
-             return None
+                # Inside the try: a rate-limit timeout or cancellation must free a half-open trial
+                if not rate_limiter.acquire(api_key):
+                    raise AIDeferredError("Groq rate limit wait exceeded")
+                with metrics.stage("llm"):
+                    result = request()
+            except TRANSIENT_ERRORS as e:
+                breaker.record_failure()
+                if attempt == settings.GROQ_MAX_RETRIES:
+                    raise AIDeferredError(f"Groq unavailable: {e}") from e
+                delay = retry_delay(e, attempt)
+                logger.warning(f"Groq request failed ({e}); retrying in {delay:.1f}s")
+                time.sleep(delay)
+                continue
+            except APIStatusError:
+                # The service answered (bad request, bad key): it is reachable
+                breaker.record_success()
+                raise
+            except BaseException:
+                # No verdict on the service (rate limited, cancelled, client-side error): free a half-open trial
+                breaker.release()
+                raise
+            breaker.record_success()
+            metrics.record_llm_usage(result)
+            return result
+
+    async def _call_async(self, api_key: str, request: Callable[[], Any]) -> Any:
+        """Async variant of _call; request returns an awaitable."""
+        breaker = self.breaker(api_key)
+        for attempt in range(settings.GROQ_MAX_RETRIES + 1):
+            if not breaker.allow():
+                raise AIDeferredError("Groq circuit breaker is open")
+            try:
+                # Inside the try: a rate-limit timeout or cancellation must free a half-open trial
+                if not await rate_limiter.acquire_async(api_key):
+                    raise AIDeferredError("Groq rate limit wait exceeded")
+                with metrics.stage("llm"):
+                    result = await request()
+            except TRANSIENT_ERRORS as e:
+                breaker.record_failure()
+                if attempt == settings.GROQ_MAX_RETRIES:
+                    raise AIDeferredError(f"Groq unavailable: {e}") from e
+                delay = retry_delay(e, attempt)
+                logger.warning(f"Groq request failed ({e}); retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                continue
+            except APIStatusError:
+                # The service answered (bad request, bad key): it is reachable
+                breaker.record_success()
+                raise
+            except BaseException:
+                # No verdict on the service (rate limited, cancelled, client-side error): free a half-open trial
+                breaker.release()
+                raise
+            breaker.record_success()
+            metrics.record_llm_usage(result)
+            return result
 
+    def get_client(self, api_key: str = None):
+        """
+        Pooled Groq client for the given key, or the default client when no key is passed.
+        """
+        if not api_key:
+            return self.client
+        try:
+            return self._clients.get(api_key)
+        except Exception as e:
+            logger.error(f"Failed to initialize Groq client with provided key: {e}")
+            return None
+
+    def _build_request(self, text: str) -> Dict[str, Any]:
         prompt = f"""
         You are an expert ATS parser. Extract the following information from the Resume text below and return it strictly as a valid JSON object.
-        
+
         Fields to extract:
         - name: Candidate's full name (string)
         - email: Email address (string)
@@ -51,33 +181,114 @@ class AIService:
         - experience_years: Estimated total years of experience (number, 0 if unknown)
         - last_role: Most recent job title (string, or null)
         - summary: A brief professional summary generated from the text (string)
-        
+
         Rules:
         - Do not include any markdown formatting like ```json ... ```. Just return the raw JSON string.
         - If a field is not found, use null or empty list/string as appropriate.
-        
+
         Resume Text:
         {text[:15000]}  # Limit text to avoid token limits if extremely long
         """
+        return {
+            "messages": [
+                {
+                    "role": "user",
+                    "content": prompt,
+                }
+            ],
+            "model": settings.GROQ_MODEL,
+            "temperature": 0.1, # Low temperature for consistent formatting
+            "response_format": {"type": "json_object"}, # Enforce JSON mode
+        }
+
+    def extract_cv_data(self, text: str, api_key: str = None) -> Dict[str, Any]:
+        """
+        Uses Llama 3 via Groq to extract structured data from CV text.
+        Returns None if AI is disabled or the response is unusable, and raises
+        AIDeferredError when the provider is rate limited or down.
+        """
+        # Determine which key to use
+        current_key = api_key or self.api_key
+
+        if not current_key:
+            return None
+
+        # A caller-supplied key gets its own pooled client instead of the default one
+        client = self.get_client(api_key)
+
+        if not client:
+             return None
+
+        request = self._build_request(text)
+        try:
+            chat_completion = self._call(current_key, lambda: client.chat.completions.create(**request))
+
+            response_content = chat_completion.choices[0].message.content
+            return json.loads(response_content)
+
+        except AIDeferredError:
+            raise
+        except Exception as e:
+            logger.error(f"Error calling Groq API: {e}")
+            return None
+
+    async def extract_cv_data_async(self, text: str, api_key: str = None) -> Dict[str, Any]:
+        """
+        Async variant of extract_cv_data. Must run on the service loop (see extract_many).
+        """
+        current_key = api_key or self.api_key
+        if not current_key:
+            return None
 
         try:
-            chat_completion = self.client.chat.completions.create(
-                messages=[
-                    {
-                        "role": "user",
-                        "content": prompt,
-                    }
-                ],
-                model="llama3-70b-8192",
-                temperature=0.1, # Low temperature for consistent formatting
-                response_format={"type": "json_object"}, # Enforce JSON mode
-            )
-            
+            client = self._async_clients.get(current_key)
+        except Exception as e:
+            logger.error(f"Failed to initialize async Groq client: {e}")
+            return None
+
+        request = self._build_request(text)
+        try:
+            chat_completion = await self._call_async(current_key, lambda: client.chat.completions.create(**request))
+
             response_content = chat_completion.choices[0].message.content
             return json.loads(response_content)
-            
+
+        except AIDeferredError:
+            raise
         except Exception as e:
             logger.error(f"Error calling Groq API: {e}")
             return None
 
+    def extract_many(self, texts: List[str], api_key: str = None) -> List[Union[Dict[str, Any], AIDeferredError, None]]:
+        """
+        Extracts many CVs with up to GROQ_MAX_CONCURRENCY requests in flight.
+        Blocking; the requests run on a long-lived background event loop so pooled
+        async clients keep their connections between calls. Deferred CVs get their
+        AIDeferredError in place of a result.
+        """
+        if not texts or not (api_key or self.api_key):
+            return [None] * len(texts)
+
+        async def run():
+            limit = asyncio.Semaphore(settings.GROQ_MAX_CONCURRENCY)
+
+            async def extract(text: str):
+                async with limit:
+                    try:
+                        return await self.extract_cv_data_async(text, api_key=api_key)
+                    except AIDeferredError as e:
+                        return e
+
+            return await asyncio.gather(*(extract(text) for text in texts))
+
+        return asyncio.run_coroutine_threadsafe(run(), self._get_loop()).result()
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        with self._loop_lock:
+            if self._loop is None or self._loop.is_closed():
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="ai-service-loop", daemon=True).start()
+                self._loop = loop
+            return self._loop
+
 ai_service = AIService()
@@ -0,0 +1,111 @@
+import json
+import time
+import hashlib
+import logging
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger("ats.analysis_cache")
+
+KEY_PREFIX = "cv-analysis"
+REDIS_RETRY_SECONDS = 30
+
+
+def text_digest(text: str) -> str:
+    """Content hash of extracted CV text, insensitive to whitespace and Unicode form."""
+    normalized = " ".join(unicodedata.normalize("NFC", text or "").split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+class AnalysisCache:
+    """
+    Content-addressed cache of CV analysis results.
+
+    Redis is the primary store so every worker shares hits; an in-process LRU
+    with the same TTL is used when Redis is not configured or unreachable.
+    Values are stored as JSON, so callers always get their own copy.
+    """
+
+    def __init__(self, redis_url: Optional[str], ttl: int, max_entries: int):
+        self.redis_url = redis_url
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._local: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._redis = None
+        self._redis_down_until = 0.0
+
+    def get(self, digest: str, mode: str) -> Optional[Dict[str, Any]]:
+        key = f"{KEY_PREFIX}:{mode}:{digest}"
+        raw = None
+        client = self._client()
+        if client is not None:
+            try:
+                raw = client.get(key)
+            except Exception as e:
+                self._mark_down(e)
+        if raw is None:
+            raw = self._local_get(key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, digest: str, mode: str, value: Dict[str, Any]) -> None:
+        key = f"{KEY_PREFIX}:{mode}:{digest}"
+        raw = json.dumps(value)
+        client = self._client()
+        if client is not None:
+            try:
+                client.set(key, raw, ex=self.ttl)
+                return
+            except Exception as e:
+                self._mark_down(e)
+        self._local_set(key, raw)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._local.clear()
+
+    # --- Stores ----------------------------------------------------------
+
+    def _client(self):
+        if not self.redis_url or time.monotonic() < self._redis_down_until:
+            return None
+        if self._redis is None:
+            import redis
+            self._redis = redis.Redis.from_url(
+                self.redis_url, socket_connect_timeout=0.5, socket_timeout=0.5
+            )
+        return self._redis
+
+    def _mark_down(self, error: Exception) -> None:
+        logger.warning(f"Analysis cache falling back to in-process store: {error}")
+        self._redis_down_until = time.monotonic() + REDIS_RETRY_SECONDS
+
+    def _local_get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is None:
+                return None
+            expires_at, raw = entry
+            if expires_at < time.monotonic():
+                del self._local[key]
+                return None
+            self._local.move_to_end(key)
+            return raw
+
+    def _local_set(self, key: str, raw: str) -> None:
+        with self._lock:
+            self._local[key] = (time.monotonic() + self.ttl, raw)
+            self._local.move_to_end(key)
+            while len(self._local) > self.max_entries:
+                self._local.popitem(last=False)
+
+
+analysis_cache = AnalysisCache(
+    settings.REDIS_URL,
+    ttl=settings.ANALYSIS_CACHE_TTL_SECONDS,
+    max_entries=settings.ANALYSIS_CACHE_MAX_ENTRIES,
+)
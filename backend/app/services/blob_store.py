@@ -0,0 +1,210 @@
+import os
+import mmap
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator, Optional, Union
+
+from app.core.config import settings
+
+logger = logging.getLogger("ats.blob_store")
+
+CHUNK_SIZE = 64 * 1024
+HEX_DIGITS = set("0123456789abcdef")
+
+
+def blob_key(content) -> str:
+    """Key of a blob: the sha256 of its bytes, so identical uploads share one blob."""
+    return hashlib.sha256(content).hexdigest()
+
+
+def _check_key(key: str) -> None:
+    # Keys arrive through task arguments and DB rows; never let one escape the store
+    if not isinstance(key, str) or len(key) != 64 or not set(key) <= HEX_DIGITS:
+        raise ValueError(f"Invalid blob key: {key!r}")
+
+
+def _shard(key: str) -> str:
+    _check_key(key)
+    return f"{key[:2]}/{key[2:4]}/{key}"
+
+
+class FilesystemBlobStore:
+    """
+    Original CV files on disk, content-addressed and sharded two levels deep
+    (ab/cd/abcd...) to keep directories small. The directory has to be shared
+    by the API, which writes, and the Celery workers, which read.
+
+    Blobs are written to a temp file and renamed, so a reader never sees a
+    partial one; a blob that already exists is not written again.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, *_shard(key).split("/"))
+
+    def local_path(self, key: str) -> Optional[str]:
+        """Path of a stored blob, for zero-copy file responses."""
+        path = self.path(key)
+        return path if os.path.exists(path) else None
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self.path(key))
+
+    def put(self, content: bytes) -> str:
+        key = blob_key(content)
+        path = self.path(key)
+        if os.path.exists(path):
+            return key
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        return key
+
+    def put_file(self, fileobj: BinaryIO) -> str:
+        """Streams a file into the store, hashing it on the way, without reading it into memory."""
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = os.path.join(self.directory, f".incoming.{os.getpid()}.{threading.get_ident()}.tmp")
+        digest = hashlib.sha256()
+        try:
+            with open(tmp_path, "wb") as f:
+                while chunk := fileobj.read(CHUNK_SIZE):
+                    digest.update(chunk)
+                    f.write(chunk)
+            key = digest.hexdigest()
+            path = self.path(key)
+            if os.path.exists(path):
+                os.remove(tmp_path)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(tmp_path, path)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        return key
+
+    @contextmanager
+    def open(self, key: str) -> Iterator[Union[bytes, mmap.mmap]]:
+        """
+        The blob memory-mapped read-only: parsers read the pages they touch
+        from the page cache instead of a heap copy of the file.
+        """
+        with open(self.path(key), "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                yield b""  # Empty files cannot be mapped
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapping:
+                yield mapping
+
+    def iter_chunks(self, key: str) -> Iterator[bytes]:
+        with open(self.path(key), "rb") as f:
+            while chunk := f.read(CHUNK_SIZE):
+                yield chunk
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+
+class S3BlobStore:
+    """
+    Blobs in an S3-compatible bucket, with the same keys and shard layout as
+    the filesystem store under `prefix`. endpoint_url points it at MinIO or
+    another local stand-in; credentials come from the usual AWS_* variables.
+    Needs boto3.
+    """
+
+    def __init__(self, bucket: Optional[str], prefix: str = "", endpoint_url: Optional[str] = None):
+        self.bucket = bucket
+        self.prefix = prefix
+        self.endpoint_url = endpoint_url
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    import boto3
+                    self._client = boto3.client("s3", endpoint_url=self.endpoint_url)
+        return self._client
+
+    def object_key(self, key: str) -> str:
+        return f"{self.prefix}{_shard(key)}"
+
+    def local_path(self, key: str) -> Optional[str]:
+        return None
+
+    def exists(self, key: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self.object_key(key))
+        except Exception as e:
+            code = getattr(e, "response", {}).get("Error", {}).get("Code")
+            if code in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+        return True
+
+    def put(self, content: bytes) -> str:
+        key = blob_key(content)
+        if not self.exists(key):
+            self.client.put_object(Bucket=self.bucket, Key=self.object_key(key), Body=content)
+        return key
+
+    def put_file(self, fileobj: BinaryIO) -> str:
+        """Hashes a seekable file in chunks, then uploads it (multipart for large files) unless present."""
+        digest = hashlib.sha256()
+        while chunk := fileobj.read(CHUNK_SIZE):
+            digest.update(chunk)
+        key = digest.hexdigest()
+        if not self.exists(key):
+            fileobj.seek(0)
+            self.client.upload_fileobj(fileobj, self.bucket, self.object_key(key))
+        return key
+
+    @contextmanager
+    def open(self, key: str) -> Iterator[Union[bytes, mmap.mmap]]:
+        body = self.client.get_object(Bucket=self.bucket, Key=self.object_key(key))["Body"]
+        try:
+            yield body.read()
+        finally:
+            body.close()
+
+    def iter_chunks(self, key: str) -> Iterator[bytes]:
+        body = self.client.get_object(Bucket=self.bucket, Key=self.object_key(key))["Body"]
+        try:
+            yield from body.iter_chunks(CHUNK_SIZE)
+        finally:
+            body.close()
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=self.object_key(key))
+
+
+def create_blob_store():
+    if settings.BLOB_BACKEND == "s3":
+        if not settings.BLOB_S3_BUCKET:
+            raise ValueError("BLOB_BACKEND=s3 needs BLOB_S3_BUCKET")
+        return S3BlobStore(settings.BLOB_S3_BUCKET, prefix=settings.BLOB_S3_PREFIX, endpoint_url=settings.BLOB_S3_ENDPOINT_URL)
+    return FilesystemBlobStore(settings.BLOB_DIR)
+
+
+blob_store = create_blob_store()
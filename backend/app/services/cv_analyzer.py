@@ -1,9 +1,35 @@
-from typing import List, Dict
+from typing import List, Dict, Optional, Union
 from app.services.ai_service import ai_service
+from app.services.resilience import AIDeferredError
+from app.services.keyword_scanner import get_scanner
+from app.services import metrics
+
+# Canonical section names (see app/data/cv_dictionary.json) that satisfy the recommendations
+EXPERIENCE_SECTIONS = ("Experiencia", "Experience")
+SUMMARY_SECTIONS = ("Summary", "Resumen")
 
 def analyze_cv_text(text: str, filename: str, ext: str, api_key: str = None) -> Dict:
     # Try AI extraction first
-    ai_data = ai_service.extract_cv_data(text, api_key=api_key)
+    try:
+        ai_data = ai_service.extract_cv_data(text, api_key=api_key)
+    except AIDeferredError as e:
+        ai_data = e
+    return build_analysis(text, filename, ext, ai_data, ai_enabled=bool(api_key or ai_service.api_key))
+
+def build_analysis(text: str, filename: str, ext: str, ai_data: Union[Dict, AIDeferredError, None], ai_enabled: bool = True) -> Dict:
+    """
+    Builds the analysis from AI-extracted data, or with the regex fallback when there is none.
+    ai_status records why: "completed", "fallback" (AI failed), "deferred" (AI rate
+    limited or down; re-enrich later) or "disabled" (no API key).
+    """
+    if isinstance(ai_data, AIDeferredError):
+        ai_status = "deferred"
+        ai_data = None
+    elif ai_data:
+        ai_status = "completed"
+    else:
+        ai_status = "fallback" if ai_enabled else "disabled"
+    metrics.CV_ANALYSES.labels(ai_status=ai_status).inc()
     
     if ai_data:
         # Map AI data to our internal structure
@@ -33,30 +59,20 @@ def analyze_cv_text(text: str, filename: str, ext: str, api_key: str = None) ->
             "format": ext.upper(),
             "structure": ", ".join(structure_items) if structure_items else "Estructura básica",
             "recommendations": recommendations,
-            "ai_extracted": ai_data # Pass raw AI data if we want to show it in frontend later
+            "ai_extracted": ai_data, # Pass raw AI data if we want to show it in frontend later
+            "ai_status": ai_status
         }
 
-    # Fallback to Regex / Simple logic if AI fails or no key
-    keywords = []
-    target_keywords = ["python", "react", "fastapi", "sql", "docker", "aws", "javascript", "html", "css"]
-    
-    lower_text = text.lower()
-    
-    for kw in target_keywords:
-        if kw in lower_text:
-            keywords.append(kw.capitalize())
-
-    structure = []
-    target_sections = ["experiencia", "experience", "educación", "education", "skills", "habilidades", "summary", "resumen"]
-    
-    for section in target_sections:
-        if section in lower_text:
-            structure.append(section.capitalize())
+    # Fallback to the dictionary scanner if AI fails or no key
+    with metrics.stage("fallback"):
+        found = get_scanner().scan(text)
+    keywords = found.get("skills", [])
+    structure = found.get("sections", [])
 
     recommendations = [
         "Agrega más keywords relevantes." if len(keywords) < 3 else "Buen uso de keywords.",
-        "Incluye sección de experiencia." if not any(s in lower_text for s in ["experiencia", "experience"]) else "",
-        "Incluye un resumen profesional." if not any(s in lower_text for s in ["summary", "resumen"]) else ""
+        "Incluye sección de experiencia." if not any(s in structure for s in EXPERIENCE_SECTIONS) else "",
+        "Incluye un resumen profesional." if not any(s in structure for s in SUMMARY_SECTIONS) else ""
     ]
     
     # Limpiar recomendaciones vacías
@@ -68,6 +84,7 @@ def analyze_cv_text(text: str, filename: str, ext: str, api_key: str = None) ->
         "format": ext.upper(),
         "structure": f"Secciones detectadas: {', '.join(structure) if structure else '(Ninguna)'}",
         "recommendations": recommendations,
-        "ai_extracted": None
+        "ai_extracted": None,
+        "ai_status": ai_status
     }
 
@@ -1,30 +1,70 @@
-import io
-import logging
+import asyncio
+import tempfile
+import zipfile
+from typing import BinaryIO, Iterator, Optional, Tuple
 from fastapi import UploadFile
 
-logger = logging.getLogger("ats.file_handler")
+CHUNK_SIZE = 64 * 1024
+SPOOL_MEMORY_SIZE = 1024 * 1024  # Spill to disk above this
 
-async def extract_text_from_file(file: UploadFile) -> str:
-    filename = file.filename
-    ext = filename.lower().split('.')[-1]
-    content = await file.read()
-    
-    text = ""
+class FileTooLargeError(Exception):
+    pass
+
+def _copy_upload(source: BinaryIO, spool: BinaryIO, max_size: int, filename: str) -> None:
+    total = 0
+    while True:
+        chunk = source.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        total += len(chunk)
+        if total > max_size:
+            raise FileTooLargeError(filename)
+        spool.write(chunk)
+
+async def spool_upload(file: UploadFile, max_size: int) -> BinaryIO:
+    """
+    Copies an upload in chunks into a temporary spool, rejecting it once it exceeds max_size.
+    Starlette has already received the whole request body by then: this bounds what is kept
+    per file, not what is read from the client. Both files may be on disk, so the copy runs
+    in a thread, off the event loop. The returned spool is rewound; the caller closes it.
+    """
+    if file.size is not None and file.size > max_size:
+        raise FileTooLargeError(file.filename)
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY_SIZE)
     try:
-        if ext == "pdf":
-            import pdfplumber
-            with pdfplumber.open(io.BytesIO(content)) as pdf:
-                text = "\n".join(page.extract_text() or '' for page in pdf.pages)
-        elif ext == "docx":
-            from docx import Document
-            doc = Document(io.BytesIO(content))
-            text = "\n".join([p.text for p in doc.paragraphs])
-        elif ext == "txt":
-            text = content.decode(errors="ignore")
-        else:
-            text = "" # Should be handled by validation before calling this or return empty
-    except Exception as e:
-        logger.error(f"Error extracting text from {filename}: {e}")
-        raise e
-        
-    return text
+        await asyncio.to_thread(_copy_upload, file.file, spool, max_size, file.filename)
+    except BaseException:
+        spool.close()
+        raise
+    spool.seek(0)
+    return spool
+
+def iter_zip_members(archive: BinaryIO, allowed_exts: set, max_size: int) -> Iterator[Tuple[str, Optional[bytes], Optional[str]]]:
+    """
+    Yields (filename, content, error) for every file in a zip of CVs.
+    Sizes are enforced while decompressing, not trusted from the archive header.
+    """
+    with zipfile.ZipFile(archive) as zf:
+        for info in zf.infolist():
+            if info.is_dir():
+                continue
+            name = info.filename.rsplit("/", 1)[-1]
+            if not name or name.startswith("."):
+                continue
+            if name.lower().split('.')[-1] not in allowed_exts:
+                yield name, None, "Extensión no permitida."
+                continue
+            if info.file_size > max_size:
+                yield name, None, "Archivo demasiado grande."
+                continue
+            content = bytearray()
+            with zf.open(info) as member:
+                while len(content) <= max_size:
+                    chunk = member.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    content.extend(chunk)
+            if len(content) > max_size:
+                yield name, None, "Archivo demasiado grande."
+            else:
+                yield name, bytes(content), None
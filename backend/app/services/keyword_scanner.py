@@ -0,0 +1,103 @@
+import os
+import re
+import json
+import logging
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger("ats.keyword_scanner")
+
+DEFAULT_DICTIONARY_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "cv_dictionary.json")
+
+_END = ""  # Trie marker for "an alias ends here"
+
+
+def normalize_term(term: str) -> str:
+    return " ".join(term.lower().split())
+
+
+class KeywordScanner:
+    """
+    Finds every dictionary term in a text in one pass.
+
+    All aliases of all groups ("skills", "sections", ...) are compiled into a
+    single regex built from a character trie, so shared prefixes are tested
+    once and the text is scanned once however large the dictionary is. Matches
+    respect word boundaries ("css" does not match inside "access") and spaces
+    in multi-word terms match any run of whitespace. Only the listed aliases
+    are matched, so short names like "Go" or "R" need explicit, unambiguous ones.
+    """
+
+    def __init__(self, groups: Dict[str, Dict[str, List[str]]]):
+        # alias -> (group, canonical name); the first definition of an alias wins
+        self.aliases: Dict[str, Tuple[str, str]] = {}
+        self.order: Dict[Tuple[str, str], int] = {}
+        for group, terms in groups.items():
+            for canonical, aliases in terms.items():
+                self.order.setdefault((group, canonical), len(self.order))
+                for alias in aliases:
+                    alias = normalize_term(alias)
+                    if alias:
+                        self.aliases.setdefault(alias, (group, canonical))
+        self.groups = list(groups)
+        self.pattern = self._compile(self.aliases)
+
+    @classmethod
+    def from_file(cls, path: str) -> "KeywordScanner":
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    @staticmethod
+    def _compile(aliases) -> Optional["re.Pattern"]:
+        if not aliases:
+            return None
+        trie: dict = {}
+        for alias in aliases:
+            node = trie
+            for char in alias:
+                node = node.setdefault(char, {})
+            node[_END] = {}
+        return re.compile(r"(?<!\w)" + _trie_regex(trie) + r"(?!\w)")
+
+    def scan(self, text: str) -> Dict[str, List[str]]:
+        """Canonical names found in the text, per group, in dictionary order."""
+        found = {group: [] for group in self.groups}
+        if not text or self.pattern is None:
+            return found
+        hits = set()
+        for match in self.pattern.finditer(text.lower()):
+            hit = self.aliases.get(normalize_term(match.group()))
+            if hit:
+                hits.add(hit)
+        for group, canonical in sorted(hits, key=self.order.__getitem__):
+            found[group].append(canonical)
+        return found
+
+
+def _trie_regex(node: dict) -> str:
+    alternatives = []
+    for char in sorted(c for c in node if c != _END):
+        atom = r"\s+" if char == " " else re.escape(char)
+        alternatives.append(atom + _trie_regex(node[char]))
+    if not alternatives:
+        return ""
+    body = alternatives[0] if len(alternatives) == 1 else "(?:" + "|".join(alternatives) + ")"
+    if _END in node:
+        # Greedy optional: try the longer alias first, backtrack to the shorter one
+        return body + "?" if len(alternatives) == 1 and len(body) == 1 else "(?:" + body + ")?"
+    return body
+
+
+@lru_cache(maxsize=1)
+def get_scanner() -> KeywordScanner:
+    """Scanner for the configured dictionary, compiled once per process."""
+    path = settings.CV_DICTIONARY_PATH or DEFAULT_DICTIONARY_PATH
+    if path == DEFAULT_DICTIONARY_PATH:
+        logger.info("Using the bundled seed CV dictionary; set CV_DICTIONARY_PATH to the full skill taxonomy")
+    try:
+        return KeywordScanner.from_file(path)
+    except Exception as e:
+        logger.error(f"Could not load CV dictionary from {path}: {e}")
+        return KeywordScanner({})
@@ -1,61 +1,530 @@
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+import os
+import io
+import time
 import logging
+import threading
+from abc import ABC, abstractmethod
+from collections import Counter
+from contextlib import contextmanager
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction import FeatureHasher
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+
+from app.core.config import settings
+from app.services.skill_taxonomy import get_skill_taxonomy
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to unlocked saves
+    fcntl = None
 
 logger = logging.getLogger("ats.matching")
 
-def calculate_match_score(resume_text: str, job_description: str) -> float:
+N_FEATURES = 2 ** 18
+
+
+class CorpusModel:
+    """
+    Corpus-level TF-IDF model shared by every match in the process.
+
+    Terms are hashed into a fixed feature space, so document frequencies can
+    be updated incrementally as new CVs arrive instead of refitting a
+    vectorizer per call. Scoring is a single transform plus a sparse dot
+    product, and IDF weights come from the whole candidate corpus.
+    """
+
+    def __init__(self, path: Optional[str] = None, n_features: int = N_FEATURES):
+        self.path = path
+        self.n_features = n_features
+        self._vectorizer = HashingVectorizer(
+            n_features=n_features,
+            stop_words="english",
+            alternate_sign=False,
+            norm=None,
+            dtype=np.float32,
+        )
+        # Same hashing as the vectorizer, used to map single terms to columns
+        self._hasher = FeatureHasher(
+            n_features=n_features,
+            input_type="string",
+            alternate_sign=False,
+            dtype=np.float32,
+        )
+        self._analyzer = self._vectorizer.build_analyzer()
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._version = None  # (inode, mtime) of the model file as last read; saves replace the file
+        self._next_check = 0.0
+        self._idf = None
+        self._pending = 0
+        self.doc_freq = np.zeros(n_features, dtype=np.int64)
+        self.n_docs = 0
+        # Updates not yet merged into the file on disk
+        self._delta_freq = np.zeros(n_features, dtype=np.int64)
+        self._delta_docs = 0
+
+    # --- Vectorizing -----------------------------------------------------
+
+    def counts(self, texts: Iterable[str]) -> sparse.csr_matrix:
+        """Raw hashed term counts, one row per text."""
+        return self._vectorizer.transform(list(texts))
+
+    def analyze(self, text: str) -> List[str]:
+        """Terms of a text as the vectorizer sees them."""
+        return self._analyzer(text)
+
+    def term_indices(self, terms: List[str]) -> np.ndarray:
+        """Column index of each term in the hashed feature space."""
+        if not terms:
+            return np.zeros(0, dtype=np.int64)
+        return self._hasher.transform([[t] for t in terms]).indices.astype(np.int64)
+
+    @property
+    def idf(self) -> np.ndarray:
+        self.ensure_loaded()
+        idf = self._idf
+        if idf is None:
+            # Same smoothing as sklearn's TfidfVectorizer
+            idf = (np.log((1.0 + self.n_docs) / (1.0 + self.doc_freq)) + 1.0).astype(np.float32)
+            self._idf = idf
+        return idf
+
+    def weigh(self, counts: sparse.spmatrix) -> sparse.csr_matrix:
+        """Apply IDF weights to term counts and L2-normalize each row."""
+        weighted = sparse.csr_matrix(counts, dtype=np.float32, copy=True)
+        weighted.data *= self.idf[weighted.indices]
+        return normalize(weighted, copy=False)
+
+    def transform(self, texts: Iterable[str]) -> sparse.csr_matrix:
+        return self.weigh(self.counts(texts))
+
+    def rank_terms(self, text: str) -> List[Tuple[str, float]]:
+        """Terms of a text ordered by their TF-IDF weight, highest first."""
+        tf = Counter(self._analyzer(text))
+        terms = list(tf)
+        weights = self.idf[self.term_indices(terms)]
+        scored = [(term, tf[term] * float(w)) for term, w in zip(terms, weights)]
+        return sorted(scored, key=lambda t: (-t[1], t[0]))
+
+    # --- Fitting ---------------------------------------------------------
+
+    def partial_fit(self, counts: sparse.spmatrix, replaced: Optional[sparse.spmatrix] = None) -> None:
+        """
+        Add documents (as term counts) to the corpus statistics. `replaced`
+        holds the counts these documents were previously added with, which
+        are taken back out, so a re-analyzed document is not counted twice.
+        """
+        self.ensure_loaded()
+        freq, n_docs = self._document_freq(counts)
+        if replaced is not None:
+            replaced_freq, replaced_docs = self._document_freq(replaced)
+            freq, n_docs = freq - replaced_freq, n_docs - replaced_docs
+        with self._lock:
+            self.doc_freq += freq
+            self._delta_freq += freq
+            self.n_docs += n_docs
+            self._delta_docs += n_docs
+            self._idf = None
+            self._pending += counts.shape[0]
+            should_save = self.path and self._pending >= settings.MATCHING_MODEL_SAVE_EVERY
+        if should_save:
+            self.save()
+
+    def _document_freq(self, counts: sparse.spmatrix) -> Tuple[np.ndarray, int]:
+        counts = sparse.csr_matrix(counts)
+        counts.sum_duplicates()
+        return np.bincount(counts.indices, minlength=self.n_features).astype(np.int64), counts.shape[0]
+
+    def fit_candidates(self, db) -> None:
+        """Refit the corpus from the term vectors stored on candidates."""
+        from app.models.candidate import Candidate
+
+        doc_freq = np.zeros(self.n_features, dtype=np.int64)
+        n_docs = 0
+        rows = (
+            db.query(Candidate.term_vector)
+            .filter(Candidate.term_vector.isnot(None))
+            .yield_per(1000)
+        )
+        for (blob,) in rows:
+            indices, _ = _split_term_vector(blob)
+            doc_freq[indices] += 1
+            n_docs += 1
+        with self._lock:
+            # The fit replaces the model; it is not an update to merge into the file
+            self.doc_freq = doc_freq
+            self.n_docs = n_docs
+            self._delta_freq = np.zeros(self.n_features, dtype=np.int64)
+            self._delta_docs = 0
+            self._idf = None
+            self._loaded = True
+        logger.info(f"Matching model fitted over {n_docs} stored candidates")
+
+    # --- Persistence -----------------------------------------------------
+
+    def ensure_loaded(self, force: bool = False) -> None:
+        """
+        Loads the persisted model, and reloads it when the file changed (the
+        workers save their updates there; the API never fits). The file is
+        checked at most every MATCHING_MODEL_RELOAD_SECONDS unless forced.
+        """
+        now = time.monotonic()
+        if self._loaded and now < self._next_check and not force:
+            return
+        with self._lock:
+            if self._loaded and now < self._next_check and not force:
+                return
+            self._loaded = True
+            self._next_check = now + settings.MATCHING_MODEL_RELOAD_SECONDS
+            if not self.path:
+                return
+            try:
+                version = _file_version(self.path)
+            except FileNotFoundError:
+                return
+            if version == self._version:
+                return
+            try:
+                doc_freq, n_docs = self._read()
+            except Exception as e:
+                logger.error(f"Could not load matching model from {self.path}: {e}")
+                return
+            # Updates of this process not saved yet stay on top of the file
+            self.doc_freq = doc_freq + self._delta_freq
+            self.n_docs = n_docs + self._delta_docs
+            self._version = version
+            self._idf = None
+
+    def load_or_fit(self, db_factory) -> None:
+        """Load the persisted model, or fit it over stored candidates if there is none."""
+        if self.path and os.path.exists(self.path):
+            self.ensure_loaded()
+            return
+        self._fit_or_load(db_factory)
+
+    def _fit_or_load(self, db_factory) -> None:
+        # Every prefork child starts here at once: the first to get the lock fits
+        # and writes the model, the others then find the file and load it
+        if not self.path:
+            self._fit(db_factory)
+            return
+        with self._file_lock():
+            if not os.path.exists(self.path):
+                self._fit(db_factory)
+                try:
+                    version = self._write(self.doc_freq, self.n_docs)
+                except Exception as e:
+                    logger.error(f"Could not save matching model to {self.path}: {e}")
+                    return
+                with self._lock:
+                    self._version = version
+                return
+        self.ensure_loaded(force=True)
+
+    def _fit(self, db_factory) -> None:
+        db = db_factory()
+        try:
+            self.fit_candidates(db)
+        finally:
+            db.close()
+
+    @contextmanager
+    def _file_lock(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path + ".lock", "w") as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+
+    def _write(self, doc_freq: np.ndarray, n_docs: int) -> Tuple[int, int]:
+        """Replaces the file with these statistics; returns its new version."""
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer, doc_freq=doc_freq, n_docs=np.int64(n_docs))
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(buffer.getvalue())
+        os.replace(tmp_path, self.path)
+        return _file_version(self.path)
+
+    def save(self) -> None:
+        """Merge this process's updates into the file on disk."""
+        if not self.path:
+            return
+        with self._file_lock():
+            with self._lock:
+                delta_freq, delta_docs = self._delta_freq, self._delta_docs
+                self._delta_freq = np.zeros(self.n_features, dtype=np.int64)
+                self._delta_docs = 0
+                self._pending = 0
+            try:
+                if os.path.exists(self.path):
+                    disk_freq, disk_docs = self._read()
+                else:
+                    disk_freq, disk_docs = np.zeros(self.n_features, dtype=np.int64), 0
+                doc_freq, n_docs = disk_freq + delta_freq, disk_docs + delta_docs
+                version = self._write(doc_freq, n_docs)
+            except Exception as e:
+                logger.error(f"Could not save matching model to {self.path}: {e}")
+                with self._lock:
+                    self._delta_freq += delta_freq
+                    self._delta_docs += delta_docs
+                return
+            with self._lock:
+                # Pick up what other workers merged since we loaded
+                self.doc_freq = doc_freq + self._delta_freq
+                self.n_docs = n_docs + self._delta_docs
+                self._version = version
+                self._idf = None
+
+    def _read(self) -> Tuple[np.ndarray, int]:
+        with np.load(self.path) as data:
+            doc_freq = data["doc_freq"].astype(np.int64)
+            n_docs = int(data["n_docs"])
+        if doc_freq.shape[0] != self.n_features:
+            raise ValueError(f"expected {self.n_features} features, found {doc_freq.shape[0]}")
+        return doc_freq, n_docs
+
+
+def _file_version(path: str) -> Tuple[int, int]:
+    stat = os.stat(path)
+    return stat.st_ino, stat.st_mtime_ns
+
+
+def encode_term_vector(counts: sparse.spmatrix) -> bytes:
+    """Serialize a single row of hashed term counts for storage on a candidate."""
+    row = sparse.csr_matrix(counts)
+    row.sum_duplicates()
+    return row.indices.astype("<u4").tobytes() + row.data.astype("<f4").tobytes()
+
+
+def _split_term_vector(blob: bytes) -> Tuple[np.ndarray, np.ndarray]:
+    nnz = len(blob) // 8
+    indices = np.frombuffer(blob, dtype="<u4", count=nnz)
+    data = np.frombuffer(blob, dtype="<f4", count=nnz, offset=4 * nnz)
+    return indices, data
+
+
+def decode_term_vectors(blobs: List[Optional[bytes]], n_features: int = N_FEATURES) -> sparse.csr_matrix:
+    """Stack stored term vectors into a matrix; missing vectors become empty rows."""
+    parts = [_split_term_vector(blob) if blob else (np.zeros(0, "<u4"), np.zeros(0, "<f4")) for blob in blobs]
+    indptr = np.zeros(len(parts) + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum([len(indices) for indices, _ in parts])
+    indices = np.concatenate([p[0] for p in parts]) if parts else np.zeros(0, "<u4")
+    data = np.concatenate([p[1] for p in parts]) if parts else np.zeros(0, "<f4")
+    return sparse.csr_matrix(
+        (data.astype(np.float32), indices.astype(np.int32), indptr),
+        shape=(len(parts), n_features),
+    )
+
+
+corpus_model = CorpusModel(settings.MATCHING_MODEL_PATH)
+
+
+def score_counts(resume_counts: sparse.spmatrix, job_counts: sparse.spmatrix) -> float:
+    """Match score (0-100) between a resume and a JD given their term counts."""
+    resume_vec = corpus_model.weigh(resume_counts)
+    job_vec = corpus_model.weigh(job_counts)
+    return round(float(resume_vec.multiply(job_vec).sum()) * 100, 2)
+
+
+class Matcher(ABC):
+    """Scores how well a resume matches a job description, from 0 to 100."""
+
+    name: str = ""
+
+    @abstractmethod
+    def score(self, resume_text: str, job_description: str) -> float:
+        ...
+
+
+class TfidfMatcher(Matcher):
+    """Lexical overlap weighted by the corpus IDF (English stop words removed)."""
+
+    name = "tfidf"
+
+    def score(self, resume_text: str, job_description: str) -> float:
+        counts = corpus_model.counts([resume_text, job_description])
+        return score_counts(counts[0], counts[1])
+
+
+class EmbeddingMatcher(Matcher):
     """
-    Calculates the cosine similarity between the resume text and job description.
-    Returns a score between 0 and 100.
+    Dense embeddings from hashed character n-grams.
+
+    Character n-grams within word boundaries, accents stripped, are hashed
+    with random signs into `dim` buckets: a fixed random projection that needs
+    no model or training and works the same for Spanish and English, and
+    matches inflections and compounds ("desarrollador"/"desarrollo") that
+    whole-word TF-IDF misses. Vectors are L2-normalized float32, so a match is
+    a dot product and a JD can be compared to every stored CV at once.
+    """
+
+    name = "embedding"
+
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+        self._vectorizer = HashingVectorizer(
+            analyzer="char_wb",
+            ngram_range=(3, 5),
+            strip_accents="unicode",
+            n_features=dim,
+            alternate_sign=True,
+            norm=None,
+            dtype=np.float32,
+        )
+
+    def embed(self, texts: Iterable[str]) -> np.ndarray:
+        """One L2-normalized float32 row per text."""
+        counts = self._vectorizer.transform(list(texts))
+        counts.data = np.sign(counts.data) * np.log1p(np.abs(counts.data))  # Damp very frequent n-grams
+        return normalize(counts.toarray(), copy=False).astype(np.float32, copy=False)
+
+    @staticmethod
+    def similarity(resume_vec: np.ndarray, job_vec: np.ndarray) -> float:
+        return round(max(0.0, float(np.dot(resume_vec, job_vec))) * 100, 2)
+
+    def score(self, resume_text: str, job_description: str) -> float:
+        resume_vec, job_vec = self.embed([resume_text, job_description])
+        return self.similarity(resume_vec, job_vec)
+
+
+embedding_matcher = EmbeddingMatcher(settings.EMBEDDING_DIM)
+MATCHERS = {matcher.name: matcher for matcher in (TfidfMatcher(), embedding_matcher)}
+
+
+def get_matcher(name: Optional[str] = None) -> Matcher:
+    """The named matcher, or the configured MATCHER_BACKEND."""
+    name = name or settings.MATCHER_BACKEND
+    if name not in MATCHERS:
+        raise ValueError(f"Unknown matcher '{name}'; expected one of {', '.join(MATCHERS)}")
+    return MATCHERS[name]
+
+
+def rank_candidates(
+    job_description: str,
+    term_vectors: List[Optional[bytes]],
+    top_k: int = 20,
+    top_n: int = 5,
+    skills: Optional[List[Optional[Iterable[str]]]] = None
+) -> List[Tuple[int, float, list]]:
+    """
+    Scores every stored term vector against one JD in a single sparse multiply.
+    Returns (row index, match score, missing keywords) for the top_k rows, best first.
+    skills can hold each row's stored skills (e.g. extracted by the LLM); JD
+    skills the CV lacks are reported first, as in get_missing_keywords.
+    """
+    if not job_description or not term_vectors or top_k <= 0:
+        return []
+
+    counts = decode_term_vectors(term_vectors, corpus_model.n_features)
+    scores = (corpus_model.weigh(counts) @ corpus_model.transform([job_description]).T).toarray().ravel() * 100
+
+    k = min(top_k, len(scores))
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top], kind="stable")]
+
+    missing = _missing_by_row(job_description, counts, top, skills, top_n)
+    return [(int(row), round(float(scores[row]), 2), row_missing) for row, row_missing in zip(top, missing)]
+
+
+def missing_keywords_for(
+    job_description: str,
+    term_vectors: List[Optional[bytes]],
+    skills: Optional[List[Optional[Iterable[str]]]] = None,
+    top_n: int = 5
+) -> List[list]:
+    """Missing keywords of each stored candidate (term vector plus stored skills) for one JD."""
+    if not job_description or not term_vectors:
+        return [[] for _ in term_vectors]
+    counts = decode_term_vectors(term_vectors, corpus_model.n_features)
+    return _missing_by_row(job_description, counts, range(len(term_vectors)), skills, top_n)
+
+
+def _missing_by_row(job_description: str, counts: sparse.csr_matrix, rows: Iterable[int], skills, top_n: int) -> List[list]:
+    # JD terms by weight; a term is missing when its column is empty in the CV
+    job_terms = [term for term, _ in corpus_model.rank_terms(job_description) if len(term) > 2]
+    term_columns = corpus_model.term_indices(job_terms)
+    # A JD skill is present when the CV has every word of one of its aliases (or has it stored)
+    taxonomy = get_skill_taxonomy()
+    job_skills = taxonomy.find(job_description)
+    skill_columns = {
+        skill: [corpus_model.term_indices(words) for words in (corpus_model.analyze(alias) for alias in taxonomy.aliases(skill)) if words]
+        for skill in job_skills
+    }
+
+    result = []
+    for row in rows:
+        present = counts.indices[counts.indptr[row]:counts.indptr[row + 1]]
+        absent = ~np.isin(term_columns, present)
+        have = [skill for skill, alias_columns in skill_columns.items() if any(np.isin(c, present).all() for c in alias_columns)]
+        if skills is not None and skills[row]:
+            have.extend(skills[row])
+        result.append(_missing_keywords(
+            job_skills, have, [term for term, is_absent in zip(job_terms, absent) if is_absent], top_n
+        ))
+    return result
+
+
+def _missing_keywords(job_skills: List[str], resume_skills: Iterable[str], absent_terms: Iterable[str], top_n: int) -> List[str]:
+    """
+    Canonical JD skills the resume lacks, then the highest-weighted absent JD terms.
+    Terms that name a JD skill are left to the skill check, so a skill is never
+    reported twice or as missing when the resume has it under another alias.
+    """
+    taxonomy = get_skill_taxonomy()
+    have = set(taxonomy.normalize_many(resume_skills))
+    missing = [skill for skill in job_skills if skill not in have][:top_n]
+    for term in absent_terms:
+        if len(missing) >= top_n:
+            break
+        if taxonomy.normalize(term) not in job_skills:
+            missing.append(term)
+    return missing
+
+
+def calculate_match_score(resume_text: str, job_description: str, matcher: Optional[str] = None) -> float:
+    """
+    Calculates the similarity between the resume text and job description
+    with the given (or configured) matcher. Returns a score between 0 and 100.
     """
     if not resume_text or not job_description:
         return 0.0
-        
+
     try:
-        # Create vectors
-        text_list = [resume_text, job_description]
-        vectorizer = TfidfVectorizer(stop_words='english')
-        tfidf_matrix = vectorizer.fit_transform(text_list)
-        
-        # Calculate Cosine Similarity
-        # tfidf_matrix[0] is resume, tfidf_matrix[1] is JD
-        match_percentage = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:2])[0][0] * 100
-        
-        return round(match_percentage, 2)
+        return get_matcher(matcher).score(resume_text, job_description)
     except Exception as e:
         logger.error(f"Error formulating match score: {e}")
         return 0.0
 
-def get_missing_keywords(resume_text: str, job_description: str, top_n: int = 5) -> list:
+def get_missing_keywords(
+    resume_text: str,
+    job_description: str,
+    top_n: int = 5,
+    job_terms: Optional[List[Tuple[str, float]]] = None,
+    resume_skills: Optional[Iterable[str]] = None
+) -> list:
     """
     Identifies keywords present in the JD but missing or weak in the resume.
-    Simple approach: extract top TF-IDF words from JD and check presence in resume.
+    Skills from the taxonomy come first, by canonical name, so aliases
+    ("ReactJS" vs "React") don't count as missing. The rest are the top
+    TF-IDF words of the JD (weighted by the corpus IDF) absent from the resume.
+    job_terms can pass corpus_model.rank_terms(job_description) precomputed
+    when the same JD is matched against many resumes; resume_skills adds
+    skills already extracted from the resume (e.g. by the LLM).
     """
     try:
-        vectorizer = TfidfVectorizer(stop_words='english')
-        tfidf_matrix = vectorizer.fit_transform([job_description])
-        feature_names = vectorizer.get_feature_names_out()
-        
-        # Get scores for the JD
-        dense = tfidf_matrix.todense()
-        episode = dense[0].tolist()[0]
-        
-        # Create a list of (word, score)
-        phrase_scores = [pair for pair in zip(range(0, len(episode)), episode) if pair[1] > 0]
-        sorted_phrase_scores = sorted(phrase_scores, key=lambda t: t[1] * -1)
-        
-        missing = []
         resume_lower = resume_text.lower()
-        
-        for phrase, score in sorted_phrase_scores:
-            word = feature_names[phrase]
-            if word not in resume_lower and len(word) > 2: # Ignore short words
-                missing.append(word)
-                if len(missing) >= top_n:
-                    break
-                    
-        return missing
+        taxonomy = get_skill_taxonomy()
+
+        if job_terms is None:
+            job_terms = corpus_model.rank_terms(job_description)
+        absent = (word for word, score in job_terms if word not in resume_lower and len(word) > 2)  # Ignore short words
+        have = taxonomy.find(resume_text) + list(resume_skills or [])
+        return _missing_keywords(taxonomy.find(job_description), have, absent, top_n)
     except Exception as e:
         logger.error(f"Error extracting missing keywords: {e}")
         return []
@@ -0,0 +1,163 @@
+import os
+import time
+import logging
+from typing import Any, Iterator, Optional, Tuple
+
+from app.core.config import settings
+
+# Multiprocess mode (API workers + Celery children writing to one directory)
+# is chosen when prometheus_client is imported, so the variable is set first
+if settings.PROMETHEUS_MULTIPROC_DIR:
+    os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", settings.PROMETHEUS_MULTIPROC_DIR)
+    os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client import multiprocess
+
+logger = logging.getLogger("ats.metrics")
+
+REDIS_RETRY_SECONDS = 30
+
+# Seconds; LLM calls and whole tasks can take up to a minute or two
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+REQUEST_SECONDS = Histogram(
+    "nidus_http_request_duration_seconds", "API request latency",
+    ["method", "route", "status"], buckets=BUCKETS,
+)
+# queue, extraction, llm, fallback, matching, db_write
+STAGE_SECONDS = Histogram(
+    "nidus_cv_stage_duration_seconds", "Time spent per CV pipeline stage",
+    ["stage"], buckets=BUCKETS,
+)
+TASK_SECONDS = Histogram(
+    "nidus_task_duration_seconds", "Celery task run time",
+    ["task", "state"], buckets=BUCKETS,
+)
+CV_ANALYSES = Counter(
+    "nidus_cv_analyses_total", "CV analyses by AI outcome (fallback rate = fallback / all)",
+    ["ai_status"],
+)
+LLM_TOKENS = Counter("nidus_llm_tokens_total", "Tokens used by LLM calls", ["kind"])
+
+
+def stage(name: str):
+    """Times a pipeline stage: `with stage("matching"): ...`"""
+    return STAGE_SECONDS.labels(stage=name).time()
+
+
+def record_llm_usage(completion: Any) -> None:
+    usage = getattr(completion, "usage", None)
+    if usage is None:
+        return
+    LLM_TOKENS.labels(kind="prompt").inc(getattr(usage, "prompt_tokens", 0) or 0)
+    LLM_TOKENS.labels(kind="completion").inc(getattr(usage, "completion_tokens", 0) or 0)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware observing each request's latency, labelled with the route
+    template (/cvs/{candidate_id}) rather than the raw path to bound cardinality.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = 500
+        start = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            REQUEST_SECONDS.labels(
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=str(status),
+            ).observe(time.perf_counter() - start)
+
+
+class RuntimeCollector:
+    """
+    Point-in-time gauges read at scrape: Celery queue depth (Redis broker)
+    and the connection pools of this API process.
+    """
+
+    def __init__(self):
+        self._redis = None
+        self._redis_down_until = 0.0
+
+    def collect(self) -> Iterator[GaugeMetricFamily]:
+        depth = self._queue_depth()
+        if depth is not None:
+            yield depth
+        yield from self._pool_metrics()
+
+    def _queue_depth(self) -> Optional[GaugeMetricFamily]:
+        from app.celery_app import celery_app
+        broker_url = celery_app.conf.broker_url or ""
+        if not broker_url.startswith("redis") or time.monotonic() < self._redis_down_until:
+            return None
+        if self._redis is None:
+            import redis
+            self._redis = redis.Redis.from_url(broker_url, socket_connect_timeout=0.5, socket_timeout=0.5)
+        queue = celery_app.conf.task_default_queue
+        try:
+            length = self._redis.llen(queue)
+        except Exception as e:
+            logger.warning(f"Could not read Celery queue depth: {e}")
+            self._redis_down_until = time.monotonic() + REDIS_RETRY_SECONDS
+            return None
+        gauge = GaugeMetricFamily("nidus_celery_queue_depth", "Messages waiting in the Celery queue", labels=["queue"])
+        gauge.add_metric([queue], length)
+        return gauge
+
+    def _pool_metrics(self) -> Iterator[GaugeMetricFamily]:
+        from app.core.database import async_engine, engine
+        size = GaugeMetricFamily("nidus_db_pool_size", "Configured connections per pool", labels=["engine"])
+        connections = GaugeMetricFamily(
+            "nidus_db_pool_connections", "Pool connections by state", labels=["engine", "state"]
+        )
+        for name, pool in (("sync", engine.pool), ("async", async_engine.sync_engine.pool)):
+            # Only QueuePool-style pools report sizes (not SQLite's per-thread pools)
+            if not all(hasattr(pool, attr) for attr in ("size", "checkedin", "checkedout", "overflow")):
+                continue
+            size.add_metric([name], pool.size())
+            connections.add_metric([name, "checked_out"], pool.checkedout())
+            connections.add_metric([name, "idle"], pool.checkedin())
+            connections.add_metric([name, "overflow"], max(pool.overflow(), 0))
+        yield size
+        yield connections
+
+
+_runtime_registry = CollectorRegistry(auto_describe=False)
+_runtime_registry.register(RuntimeCollector())
+
+
+def render_latest() -> Tuple[bytes, str]:
+    """
+    The exposition for /metrics. In multiprocess mode the samples of every
+    process (API workers and Celery children) are merged from their files.
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry) + generate_latest(_runtime_registry), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead(pid: int) -> None:
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        multiprocess.mark_process_dead(pid)
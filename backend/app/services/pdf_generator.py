@@ -1,22 +1,114 @@
 import io
-from reportlab.pdfgen import canvas
-from typing import Dict
+from typing import Dict, Iterable, List
+from xml.sax.saxutils import escape
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.units import cm
+from reportlab.platypus import ListFlowable, ListItem, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+# Bump when the layout changes so cached reports are regenerated
+LAYOUT_VERSION = 2
+
+AI_FIELDS = [
+    ("name", "Nombre"),
+    ("email", "Email"),
+    ("last_role", "Último rol"),
+    ("experience_years", "Años de experiencia"),
+    ("summary", "Resumen"),
+]
+
+_styles = getSampleStyleSheet()
+
+
+def _text(value) -> str:
+    return escape(str(value)) if value not in (None, "") else "-"
+
+
+def _bullets(items: Iterable, style) -> ListFlowable:
+    return ListFlowable(
+        [ListItem(Paragraph(_text(item), style), leftIndent=12) for item in items],
+        bulletType="bullet",
+        start="•",
+        leftIndent=12,
+    )
+
+
+def _section(title: str) -> List:
+    return [Spacer(1, 0.4 * cm), Paragraph(escape(title), _styles["Heading2"])]
+
+
+def _page_number(canvas, doc) -> None:
+    canvas.saveState()
+    canvas.setFont("Helvetica", 8)
+    canvas.drawRightString(A4[0] - 2 * cm, 1.2 * cm, f"Página {doc.page}")
+    canvas.restoreState()
+
 
 def generate_pdf_report(analysis: Dict) -> io.BytesIO:
+    """
+    Renders the analysis of a CV as a PDF. Content flows across as many
+    pages as it needs; optional fields (match, missing keywords, AI data)
+    are included when present.
+    """
     buffer = io.BytesIO()
-    c = canvas.Canvas(buffer)
-    
-    c.drawString(100, 800, f"Análisis de CV: {analysis['filename']}")
-    c.drawString(100, 780, f"Formato: {analysis['format']}")
-    c.drawString(100, 760, f"Keywords: {', '.join(analysis['keywords'])}")
-    c.drawString(100, 740, f"Estructura: {analysis['structure']}")
-    c.drawString(100, 720, "Recomendaciones:")
-    
-    y = 700
-    for rec in analysis['recommendations']:
-        c.drawString(120, y, f"- {rec}")
-        y -= 20
-        
-    c.save()
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=A4,
+        leftMargin=2 * cm,
+        rightMargin=2 * cm,
+        topMargin=2 * cm,
+        bottomMargin=2 * cm,
+        title=f"Análisis de CV: {analysis.get('filename') or ''}",
+    )
+    body = _styles["BodyText"]
+
+    story = [Paragraph(f"Análisis de CV: {_text(analysis.get('filename'))}", _styles["Title"])]
+
+    summary = [
+        ["Formato", _text(analysis.get("format"))],
+        ["Estructura", Paragraph(_text(analysis.get("structure")), body)],
+    ]
+    if analysis.get("match_score") is not None:
+        summary.append(["Puntaje de match", f"{float(analysis['match_score']):.2f} / 100"])
+    if analysis.get("ai_status"):
+        summary.append(["Análisis IA", _text(analysis["ai_status"])])
+    table = Table(summary, colWidths=[4.5 * cm, None])
+    table.setStyle(TableStyle([
+        ("FONTNAME", (0, 0), (0, -1), "Helvetica-Bold"),
+        ("VALIGN", (0, 0), (-1, -1), "TOP"),
+        ("LINEBELOW", (0, 0), (-1, -1), 0.25, colors.lightgrey),
+    ]))
+    story.append(table)
+
+    story += _section("Keywords")
+    story.append(Paragraph(_text(", ".join(analysis.get("keywords") or [])), body))
+
+    recommendations = analysis.get("recommendations") or []
+    story += _section("Recomendaciones")
+    story.append(_bullets(recommendations, body) if recommendations else Paragraph("-", body))
+
+    missing = analysis.get("missing_keywords") or []
+    if missing:
+        story += _section("Palabras clave faltantes")
+        story.append(_bullets(missing, body))
+
+    ai_data = analysis.get("ai_data")
+    if ai_data:
+        story += _section("Datos extraídos por IA")
+        rows = [[label, Paragraph(_text(ai_data.get(key)), body)] for key, label in AI_FIELDS if ai_data.get(key) not in (None, "")]
+        skills = ai_data.get("skills")
+        if isinstance(skills, list) and skills:
+            rows.append(["Habilidades", Paragraph(_text(", ".join(map(str, skills))), body)])
+        if rows:
+            ai_table = Table(rows, colWidths=[4.5 * cm, None])
+            ai_table.setStyle(TableStyle([
+                ("FONTNAME", (0, 0), (0, -1), "Helvetica-Bold"),
+                ("VALIGN", (0, 0), (-1, -1), "TOP"),
+            ]))
+            story.append(ai_table)
+
+    doc.build(story, onFirstPage=_page_number, onLaterPages=_page_number)
     buffer.seek(0)
     return buffer
@@ -0,0 +1,193 @@
+import json
+import time
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Dict, Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+
+from app.core.config import settings
+from app.models.user import User, UserRole
+
+logger = logging.getLogger("ats.principal_cache")
+
+KEY_PREFIX = "principal"
+REDIS_RETRY_SECONDS = 30
+
+
+@dataclass(frozen=True)
+class Principal:
+    """What authorization needs to know about the caller, without loading the user row."""
+    id: int
+    role: UserRole
+    is_active: bool
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(id=user.id, role=UserRole(user.role), is_active=bool(user.is_active))
+
+
+class PrincipalCache:
+    """
+    Short-TTL cache of principals keyed by token subject (the user id).
+
+    Redis is used when configured so an invalidation reaches every API
+    worker at once; otherwise (or while Redis is unreachable) entries live
+    in an in-process LRU. Either way an entry is at most `ttl` seconds old,
+    which bounds staleness for changes made outside the ORM.
+    """
+
+    def __init__(self, redis_url: Optional[str], ttl: int, max_entries: int):
+        self.redis_url = redis_url
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._local: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._redis = None
+        self._redis_down_until = 0.0
+
+    def get(self, subject) -> Optional[Principal]:
+        if self.ttl <= 0:
+            return None
+        key = f"{KEY_PREFIX}:{subject}"
+        raw = None
+        client = self._client()
+        if client is not None:
+            try:
+                raw = client.get(key)
+            except Exception as e:
+                self._mark_down(e)
+                raw = self._local_get(key)
+        else:
+            raw = self._local_get(key)
+        with self._lock:
+            if raw is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        data = json.loads(raw)
+        return Principal(id=data["id"], role=UserRole(data["role"]), is_active=data["is_active"])
+
+    def set(self, principal: Principal) -> None:
+        if self.ttl <= 0:
+            return
+        key = f"{KEY_PREFIX}:{principal.id}"
+        raw = json.dumps({**asdict(principal), "role": principal.role.value})
+        client = self._client()
+        if client is not None:
+            try:
+                client.set(key, raw, ex=self.ttl)
+                return
+            except Exception as e:
+                self._mark_down(e)
+        with self._lock:
+            self._local[key] = (time.monotonic() + self.ttl, raw)
+            self._local.move_to_end(key)
+            while len(self._local) > self.max_entries:
+                self._local.popitem(last=False)
+
+    def invalidate(self, subject) -> None:
+        key = f"{KEY_PREFIX}:{subject}"
+        with self._lock:
+            self.invalidations += 1
+            self._local.pop(key, None)
+        client = self._client()
+        if client is not None:
+            try:
+                client.delete(key)
+            except Exception as e:
+                self._mark_down(e)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._local.clear()
+            self.hits = self.misses = self.invalidations = 0
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "local_entries": len(self._local),
+                "backend": "redis" if self._client() is not None else "local",
+            }
+
+    # --- Stores ----------------------------------------------------------
+
+    def _client(self):
+        if not self.redis_url or time.monotonic() < self._redis_down_until:
+            return None
+        if self._redis is None:
+            import redis
+            self._redis = redis.Redis.from_url(
+                self.redis_url, socket_connect_timeout=0.5, socket_timeout=0.5
+            )
+        return self._redis
+
+    def _mark_down(self, error: Exception) -> None:
+        logger.warning(f"Principal cache falling back to in-process store: {error}")
+        self._redis_down_until = time.monotonic() + REDIS_RETRY_SECONDS
+
+    def _local_get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is None:
+                return None
+            expires_at, raw = entry
+            if expires_at < time.monotonic():
+                del self._local[key]
+                return None
+            self._local.move_to_end(key)
+            return raw
+
+
+principal_cache = PrincipalCache(
+    settings.REDIS_URL,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+    max_entries=settings.PRINCIPAL_CACHE_MAX_ENTRIES,
+)
+
+
+PENDING_KEY = "principal_invalidations"
+
+
+def _defer_invalidation(target: User) -> None:
+    # Mapper events fire at flush, before commit: a concurrent request could still
+    # read the old row and cache it again, so only invalidate once the commit lands
+    session = object_session(target)
+    if session is None:
+        principal_cache.invalidate(target.id)
+        return
+    session.info.setdefault(PENDING_KEY, set()).add(target.id)
+
+
+@event.listens_for(User, "after_update")
+def _invalidate_on_change(mapper, connection, target: User) -> None:
+    state = inspect(target)
+    if state.attrs.is_active.history.has_changes() or state.attrs.role.history.has_changes():
+        _defer_invalidation(target)
+
+
+@event.listens_for(User, "after_delete")
+def _invalidate_on_delete(mapper, connection, target: User) -> None:
+    _defer_invalidation(target)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    for user_id in session.info.pop(PENDING_KEY, ()):
+        principal_cache.invalidate(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session: Session) -> None:
+    session.info.pop(PENDING_KEY, None)
@@ -0,0 +1,230 @@
+import io
+import os
+import hmac
+import json
+import time
+import uuid
+import pstats
+import random
+import cProfile
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from app.core.config import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows: only the in-process lock applies
+    fcntl = None
+
+logger = logging.getLogger("ats.profiling")
+
+PROFILE_HEADER = "x-profile"
+KINDS = ("request", "task")
+SORT_KEYS = ("cumulative", "tottime", "calls", "ncalls", "time")
+
+# One profile at a time per process (cProfile hooks are process-wide from Python
+# 3.12 on); a request or task arriving while another one is being profiled, in
+# any thread, simply runs unprofiled
+_profiler_lock = threading.Lock()
+
+
+class ProfileStore:
+    """
+    cProfile dumps on disk, shared by the API and the Celery workers, with a
+    JSON sidecar per profile (kind, label, duration, time).
+
+    Request profiles keep the most recent `max_entries`; task profiles keep the
+    `max_entries` slowest, so a rare pathological CV is not pushed out by a
+    stream of ordinary ones. Saving and eviction hold a lock file in the
+    directory, since every API and worker process writes to it.
+    """
+
+    def __init__(self, directory: Optional[str], max_entries: int):
+        self.directory = directory
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+    def save(
+        self, kind: str, profile: cProfile.Profile, duration: float, label: str, profile_id: Optional[str] = None
+    ) -> Optional[str]:
+        """Stores a profile and returns its id, or None if it was not kept."""
+        if not self.directory or kind not in KINDS:
+            return None
+        profile_id = profile_id or uuid.uuid4().hex
+        meta = {
+            "id": profile_id,
+            "kind": kind,
+            "label": label,
+            "duration_ms": round(duration * 1000, 3),
+            "created": time.time(),
+        }
+        try:
+            with self._lock, self._directory_lock():
+                entries = self.list(kind)
+                if kind == "task" and len(entries) >= self.max_entries:
+                    fastest = min(entries, key=lambda e: e["duration_ms"])
+                    if fastest["duration_ms"] >= meta["duration_ms"]:
+                        return None
+                profile.dump_stats(self._path(profile_id, "prof"))
+                tmp_path = f"{self._path(profile_id, 'json')}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(meta, f)
+                os.replace(tmp_path, self._path(profile_id, "json"))
+                self._evict(kind, entries + [meta])
+        except OSError as e:
+            logger.error(f"Could not store {kind} profile: {e}")
+            return None
+        return profile_id
+
+    def list(self, kind: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Stored profiles, newest first."""
+        if not self.directory or not os.path.isdir(self.directory):
+            return []
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.directory, name), encoding="utf-8") as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if kind is None or meta.get("kind") == kind:
+                entries.append(meta)
+        return sorted(entries, key=lambda e: e["created"], reverse=True)
+
+    def get(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(profile_id, "json"), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def dump_path(self, profile_id: str) -> Optional[str]:
+        path = self._path(profile_id, "prof")
+        return path if os.path.exists(path) else None
+
+    def report(self, profile_id: str, sort: str = "cumulative", limit: int = 50) -> Optional[str]:
+        """pstats text report of a profile, top `limit` functions by `sort`."""
+        path = self.dump_path(profile_id)
+        if path is None:
+            return None
+        out = io.StringIO()
+        stats = pstats.Stats(path, stream=out)
+        stats.strip_dirs().sort_stats(sort).print_stats(limit)
+        return out.getvalue()
+
+    def clear(self) -> None:
+        with self._lock, self._directory_lock():
+            for meta in self.list():
+                self._remove(meta["id"])
+
+    @contextmanager
+    def _directory_lock(self) -> Iterator[None]:
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, ".lock"), "a") as f:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            yield
+
+    def _path(self, profile_id: str, ext: str) -> str:
+        # Ids are generated hex; basename() guards lookups by client-supplied ids
+        return os.path.join(self.directory, f"{os.path.basename(profile_id)}.{ext}")
+
+    def _evict(self, kind: str, entries: List[Dict[str, Any]]) -> None:
+        if len(entries) <= self.max_entries:
+            return
+        if kind == "task":
+            entries = sorted(entries, key=lambda e: e["duration_ms"], reverse=True)
+        else:
+            entries = sorted(entries, key=lambda e: e["created"], reverse=True)
+        for meta in entries[self.max_entries:]:
+            self._remove(meta["id"])
+
+    def _remove(self, profile_id: str) -> None:
+        for ext in ("json", "prof"):
+            try:
+                os.remove(self._path(profile_id, ext))
+            except OSError:
+                pass
+
+
+profile_store = ProfileStore(settings.PROFILE_DIR, max_entries=settings.PROFILE_MAX_ENTRIES)
+
+
+def requested(headers) -> bool:
+    """Whether a request asked for (and may have) a profile."""
+    if not settings.PROFILING_ENABLED or not settings.PROFILING_TOKEN:
+        return False
+    for name, value in headers:
+        if name == PROFILE_HEADER.encode():
+            return hmac.compare_digest(value, settings.PROFILING_TOKEN.encode())
+    return False
+
+
+class ProfilingMiddleware:
+    """
+    Profiles a request when PROFILING_ENABLED is set and the request carries
+    `X-Profile: <PROFILING_TOKEN>`. The id of the stored profile is returned in
+    the X-Profile-Id header; admins read it at /admin/profiles/{id}.
+
+    cProfile follows the event loop thread: async handlers and everything they
+    await in it, which includes other requests interleaved on the loop. Sync
+    endpoints run in the threadpool and appear as one call. CV parsing runs in
+    the workers and shows up in the sampled task profiles, not here.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or not requested(scope.get("headers") or [])
+            or not _profiler_lock.acquire(blocking=False)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        profile = cProfile.Profile()
+        profile_id = uuid.uuid4().hex  # Reserved up front: headers go out before the profile ends
+        label = f"{scope['method']} {scope['path']}"
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-profile-id", profile_id.encode())]
+            await send(message)
+
+        start = time.perf_counter()
+        profile.enable()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            profile.disable()
+            _profiler_lock.release()
+            profile_store.save("request", profile, time.perf_counter() - start, label, profile_id=profile_id)
+
+
+@contextmanager
+def sampled_task(label: str) -> Iterator[None]:
+    """
+    Profiles 1 in TASK_PROFILE_SAMPLE_RATE tasks (0 = never); the profile is
+    kept if it is among the PROFILE_MAX_ENTRIES slowest seen.
+    """
+    rate = settings.TASK_PROFILE_SAMPLE_RATE
+    if rate <= 0 or random.random() >= 1 / rate or not _profiler_lock.acquire(blocking=False):
+        yield
+        return
+    profile = cProfile.Profile()
+    start = time.perf_counter()
+    profile.enable()
+    try:
+        yield
+    finally:
+        profile.disable()
+        _profiler_lock.release()
+        profile_store.save("task", profile, time.perf_counter() - start, label)
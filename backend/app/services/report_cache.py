@@ -0,0 +1,78 @@
+import os
+import json
+import glob
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+from app.services.pdf_generator import LAYOUT_VERSION
+
+logger = logging.getLogger("ats.report_cache")
+
+
+# Candidate columns a report renders
+REPORT_COLUMNS = [
+    "filename", "format", "keywords", "structure", "recommendations",
+    "match_score", "missing_keywords", "ai_data", "ai_status",
+]
+
+
+def report_analysis(candidate) -> Dict[str, Any]:
+    """The analysis dict the PDF generator renders for a stored candidate."""
+    return {column: getattr(candidate, column) for column in REPORT_COLUMNS}
+
+
+def report_version(analysis: Dict[str, Any]) -> str:
+    """Version of a report: a hash of everything it renders plus the layout version."""
+    payload = json.dumps({"layout": LAYOUT_VERSION, **analysis}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:20]
+
+
+class ReportCache:
+    """
+    Generated PDF reports on disk, one file per (candidate, version).
+
+    A new analysis of a candidate gets a new version, so stale reports are
+    never served; the previous file is removed when the new one is written.
+    Files are sharded by candidate id to keep directories small, and written
+    to a temp file then renamed so readers never see a partial report.
+    """
+
+    def __init__(self, directory: Optional[str]):
+        self.directory = directory
+
+    def path(self, candidate_id: int, version: str) -> str:
+        return os.path.join(self.directory, f"{candidate_id % 256:02x}", f"{candidate_id}-{version}.pdf")
+
+    def get(self, candidate_id: int, version: str) -> Optional[str]:
+        if not self.directory:
+            return None
+        path = self.path(candidate_id, version)
+        return path if os.path.exists(path) else None
+
+    def put(self, candidate_id: int, version: str, content: bytes) -> Optional[str]:
+        """Stores a report and returns its path, or None if it could not be written."""
+        if not self.directory:
+            return None
+        path = self.path(candidate_id, version)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.error(f"Could not cache report for candidate {candidate_id}: {e}")
+            return None
+        for old in glob.glob(os.path.join(os.path.dirname(path), f"{candidate_id}-*.pdf")):
+            if old != path:
+                try:
+                    os.remove(old)
+                except OSError:
+                    pass
+        return path
+
+
+report_cache = ReportCache(settings.REPORT_CACHE_DIR)
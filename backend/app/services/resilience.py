@@ -0,0 +1,189 @@
+import time
+import random
+import asyncio
+import hashlib
+import logging
+import threading
+from typing import Dict, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger("ats.resilience")
+
+REDIS_RETRY_SECONDS = 30
+
+# Atomic refill-and-take on a Redis hash. Uses the Redis clock so every worker
+# agrees on time. Returns how long to wait before a token is available (0 = taken).
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local data = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(data[1]) or capacity
+local ts = tonumber(data[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(wait)
+"""
+
+
+class AIDeferredError(Exception):
+    """The LLM is rate limited or failing; the CV should be re-enriched later."""
+
+
+class TokenBucketLimiter:
+    """
+    Per-key token bucket shared by all workers through Redis.
+    Falls back to an in-process bucket when Redis is not configured or unreachable.
+    """
+
+    def __init__(self, redis_url: Optional[str], per_minute: float, burst: int, max_wait: float):
+        self.redis_url = redis_url
+        self.rate = per_minute / 60.0
+        self.capacity = max(1, burst)
+        self.max_wait = max_wait
+        self._local: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+        self._redis = None
+        self._script = None
+        self._redis_down_until = 0.0
+
+    def reserve(self, key: str) -> float:
+        """Takes a token if one is available; otherwise returns the seconds to wait."""
+        if self.rate <= 0:
+            return 0.0
+        bucket = "ai-rate:" + hashlib.sha256(key.encode()).hexdigest()[:24]  # Never store raw API keys
+        script = self._redis_script()
+        if script is not None:
+            try:
+                return float(script(keys=[bucket], args=[self.rate, self.capacity]))
+            except Exception as e:
+                logger.warning(f"Rate limiter falling back to in-process bucket: {e}")
+                self._redis_down_until = time.monotonic() + REDIS_RETRY_SECONDS
+        return self._reserve_local(bucket)
+
+    def acquire(self, key: str) -> bool:
+        """Blocks until a token is taken. False if that would take longer than max_wait."""
+        waited = 0.0
+        while True:
+            wait = self.reserve(key)
+            if wait <= 0:
+                return True
+            if waited + wait > self.max_wait:
+                return False
+            time.sleep(wait)
+            waited += wait
+
+    async def acquire_async(self, key: str) -> bool:
+        waited = 0.0
+        while True:
+            wait = await asyncio.to_thread(self.reserve, key)
+            if wait <= 0:
+                return True
+            if waited + wait > self.max_wait:
+                return False
+            await asyncio.sleep(wait)
+            waited += wait
+
+    def _redis_script(self):
+        if not self.redis_url or time.monotonic() < self._redis_down_until:
+            return None
+        if self._script is None:
+            import redis
+            self._redis = redis.Redis.from_url(
+                self.redis_url, socket_connect_timeout=0.5, socket_timeout=0.5
+            )
+            self._script = self._redis.register_script(TOKEN_BUCKET_SCRIPT)
+        return self._script
+
+    def _reserve_local(self, bucket: str) -> float:
+        with self._lock:
+            now = time.monotonic()
+            tokens, ts = self._local.get(bucket, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - ts) * self.rate)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / self.rate
+            self._local[bucket] = (tokens, now)
+            return wait
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures and fails fast for
+    `reset_timeout` seconds, then lets a single trial call through (half-open).
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                return True
+            return False  # Open, or a half-open trial is already in flight
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def release(self) -> None:
+        """Ends a call that says nothing about the service; a half-open trial may be retried at once."""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.state = self.OPEN
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f"Circuit breaker opened after {self.failures} failures")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+def retry_delay(error: Exception, attempt: int) -> float:
+    """Seconds before retry number `attempt` (0-based): Retry-After if the provider sent one, else exponential backoff with jitter."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    for header, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        value = headers.get(header)
+        if value is not None:
+            try:
+                return min(float(value) * scale, settings.GROQ_BACKOFF_MAX_SECONDS)
+            except ValueError:
+                pass  # HTTP-date form; use backoff
+    backoff = settings.GROQ_BACKOFF_BASE_SECONDS * (2 ** attempt)
+    return min(backoff, settings.GROQ_BACKOFF_MAX_SECONDS) * random.uniform(0.5, 1.0)
+
+
+rate_limiter = TokenBucketLimiter(
+    settings.REDIS_URL,
+    per_minute=settings.GROQ_RATE_LIMIT_PER_MINUTE,
+    burst=settings.GROQ_RATE_LIMIT_BURST,
+    max_wait=settings.GROQ_RATE_LIMIT_MAX_WAIT_SECONDS,
+)
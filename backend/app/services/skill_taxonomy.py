@@ -0,0 +1,138 @@
+import re
+import json
+import difflib
+import logging
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+
+from app.core.config import settings
+from app.models.candidate_skill import normalize_skill
+from app.services.keyword_scanner import DEFAULT_DICTIONARY_PATH, get_scanner
+
+logger = logging.getLogger("ats.skill_taxonomy")
+
+_END = ""  # Trie key holding the canonical name of an alias that ends here
+_SEPARATORS = re.compile(r"[\s._\-]+")
+# Trailing version numbers ("Python 3.11", "Angular v17") that don't change the skill
+_VERSION_TAIL = re.compile(r"^(?:v?\d[\w.]*\s*)+$")
+FUZZY_MIN_LENGTH = 5  # Shorter names are too ambiguous to fuzzy-match ("go", "git")
+
+
+def squash(skill: str) -> str:
+    """Lookup key of a skill name: lowercase, separators dropped ("React.js" -> "reactjs")."""
+    return _SEPARATORS.sub("", skill.lower())
+
+
+class SkillTaxonomy:
+    """
+    Canonical skill vocabulary loaded from the CV dictionary.
+
+    Aliases (and the canonical names themselves) live in a character trie, both
+    as written and squashed, so "ReactJS", "React.js" and "react" all resolve to
+    "React". Names the trie doesn't know are resolved with a fuzzy match against
+    the vocabulary and memoized in a bounded LRU, so each raw variant is only
+    resolved once per process.
+    """
+
+    def __init__(self, skills: Dict[str, List[str]], cache_size: int = 10000, fuzzy_cutoff: float = 0.88):
+        self.trie: dict = {}
+        self._aliases = {canonical: list(aliases) for canonical, aliases in skills.items()}
+        self.cache_size = cache_size
+        self.fuzzy_cutoff = fuzzy_cutoff
+        self._squashed: Dict[str, str] = {}
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        for canonical, aliases in skills.items():
+            for alias in [canonical, *aliases]:
+                for key in (" ".join(alias.lower().split()), squash(alias)):
+                    if key:
+                        self._insert(key, canonical)
+                self._squashed.setdefault(squash(alias), canonical)
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs) -> "SkillTaxonomy":
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f).get("skills", {}), **kwargs)
+
+    def _insert(self, key: str, canonical: str) -> None:
+        node = self.trie
+        for char in key:
+            node = node.setdefault(char, {})
+        node.setdefault(_END, canonical)
+
+    def _lookup(self, key: str) -> Optional[str]:
+        """Canonical name of an exact alias, else of its longest alias prefix followed by a version."""
+        node, best = self.trie, None
+        for i, char in enumerate(key):
+            node = node.get(char)
+            if node is None:
+                break
+            if _END in node and i + 1 < len(key) and key[i + 1] == " " and _VERSION_TAIL.match(key[i + 2:]):
+                best = node[_END]
+        else:
+            if _END in node:
+                return node[_END]
+        return best
+
+    def normalize(self, skill: str) -> str:
+        """Canonical name of a skill, or the cleaned-up input when it is not in the taxonomy."""
+        cleaned = " ".join(str(skill).split())
+        key = cleaned.lower()
+        with self._lock:
+            hit = self._cache.get(key)
+            if hit is not None:
+                self._cache.move_to_end(key)
+                return hit
+
+        resolved = self._lookup(key) or self._lookup(squash(key)) or self._fuzzy(key) or cleaned
+        with self._lock:
+            self._cache[key] = resolved
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return resolved
+
+    def _fuzzy(self, key: str) -> Optional[str]:
+        squashed = squash(key)
+        if len(squashed) < FUZZY_MIN_LENGTH:
+            return None
+        match = difflib.get_close_matches(squashed, list(self._squashed), n=1, cutoff=self.fuzzy_cutoff)
+        return self._squashed[match[0]] if match else None
+
+    def aliases(self, skill: str) -> List[str]:
+        """Every alias of a canonical skill, including its own name."""
+        return [skill, *self._aliases.get(skill, [])]
+
+    def normalize_many(self, skills: Iterable[str]) -> List[str]:
+        """Canonical, de-duplicated skills in their original order. Placeholders like "(Ninguna ...)" are kept."""
+        result = []
+        for skill in skills or []:
+            if not isinstance(skill, str) or not skill.strip():
+                continue
+            name = skill if skill.startswith("(") else self.normalize(skill)
+            if name not in result:
+                result.append(name)
+        return result
+
+    def find(self, text: str) -> List[str]:
+        """Canonical skills mentioned anywhere in a text."""
+        return get_scanner().scan(text).get("skills", [])
+
+
+@lru_cache(maxsize=1)
+def get_skill_taxonomy() -> SkillTaxonomy:
+    """Taxonomy for the configured dictionary, built once per process."""
+    path = settings.CV_DICTIONARY_PATH or DEFAULT_DICTIONARY_PATH
+    try:
+        return SkillTaxonomy.from_file(
+            path, cache_size=settings.SKILL_ALIAS_CACHE_SIZE, fuzzy_cutoff=settings.SKILL_FUZZY_CUTOFF
+        )
+    except Exception as e:
+        logger.error(f"Could not load skill taxonomy from {path}: {e}")
+        return SkillTaxonomy({})
+
+
+def skill_key(skill: str) -> str:
+    """Key of a skill in the candidate skill index: its canonical name, normalized."""
+    return normalize_skill(get_skill_taxonomy().normalize(skill))
@@ -0,0 +1,144 @@
+import time
+import secrets
+import logging
+import threading
+from collections import OrderedDict
+from typing import Iterable, List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger("ats.task_access")
+
+OWNER_PREFIX = "task-owner"
+TICKET_PREFIX = "stream-ticket"
+REDIS_RETRY_SECONDS = 30
+
+
+class TaskAccess:
+    """
+    Who may read a task, and single-use tickets for opening its event stream.
+
+    The owner of every dispatched task is recorded for as long as its result
+    is kept (`owner_ttl`), so status and event endpoints only answer the user
+    who started it. Browsers can't send an Authorization header on an
+    EventSource or WebSocket; they trade their token for a ticket that is
+    valid for `ticket_ttl` seconds and one connection, so no bearer token
+    ends up in query strings and access logs.
+
+    Redis is used when configured, so every API worker sees the same owners
+    and tickets; otherwise (or while it is unreachable) they are kept in-process.
+    """
+
+    def __init__(self, redis_url: Optional[str], owner_ttl: int, ticket_ttl: int, max_entries: int):
+        self.redis_url = redis_url
+        self.owner_ttl = owner_ttl
+        self.ticket_ttl = ticket_ttl
+        self.max_entries = max_entries
+        self._local: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._redis = None
+        self._redis_down_until = 0.0
+
+    def register(self, task_ids: Iterable[str], user_id: int) -> None:
+        keys = [f"{OWNER_PREFIX}:{task_id}" for task_id in task_ids]
+        client = self._client()
+        if client is not None:
+            try:
+                with client.pipeline(transaction=False) as pipe:
+                    for key in keys:
+                        pipe.set(key, user_id, ex=self.owner_ttl)
+                    pipe.execute()
+                return
+            except Exception as e:
+                self._mark_down(e)
+        for key in keys:
+            self._local_set(key, str(user_id), self.owner_ttl)
+
+    def owners(self, task_ids: List[str]) -> List[Optional[int]]:
+        """The owner of each task, None when unknown (never dispatched, or expired)."""
+        keys = [f"{OWNER_PREFIX}:{task_id}" for task_id in task_ids]
+        values = None
+        client = self._client()
+        if client is not None:
+            try:
+                values = client.mget(keys)
+            except Exception as e:
+                self._mark_down(e)
+        if values is None:
+            values = [self._local_get(key) for key in keys]
+        return [int(value) if value is not None else None for value in values]
+
+    def issue_ticket(self, user_id: int) -> str:
+        ticket = secrets.token_urlsafe(32)
+        key = f"{TICKET_PREFIX}:{ticket}"
+        client = self._client()
+        if client is not None:
+            try:
+                client.set(key, user_id, ex=self.ticket_ttl)
+                return ticket
+            except Exception as e:
+                self._mark_down(e)
+        self._local_set(key, str(user_id), self.ticket_ttl)
+        return ticket
+
+    def redeem_ticket(self, ticket: str) -> Optional[int]:
+        """The user a ticket was issued to, once; None if unknown, used or expired."""
+        key = f"{TICKET_PREFIX}:{ticket}"
+        value = None
+        client = self._client()
+        if client is not None:
+            try:
+                value = client.getdel(key)
+            except Exception as e:
+                self._mark_down(e)
+        with self._lock:
+            entry = self._local.pop(key, None)
+        if value is None and entry is not None and entry[0] >= time.monotonic():
+            value = entry[1]
+        return int(value) if value is not None else None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._local.clear()
+
+    # --- Stores ----------------------------------------------------------
+
+    def _client(self):
+        if not self.redis_url or time.monotonic() < self._redis_down_until:
+            return None
+        if self._redis is None:
+            import redis
+            self._redis = redis.Redis.from_url(
+                self.redis_url, socket_connect_timeout=0.5, socket_timeout=0.5
+            )
+        return self._redis
+
+    def _mark_down(self, error: Exception) -> None:
+        logger.warning(f"Task access falling back to in-process store: {error}")
+        self._redis_down_until = time.monotonic() + REDIS_RETRY_SECONDS
+
+    def _local_set(self, key: str, value: str, ttl: int) -> None:
+        with self._lock:
+            self._local[key] = (time.monotonic() + ttl, value)
+            self._local.move_to_end(key)
+            while len(self._local) > self.max_entries:
+                self._local.popitem(last=False)
+
+    def _local_get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._local[key]
+                return None
+            return value
+
+
+task_access = TaskAccess(
+    settings.REDIS_URL,
+    owner_ttl=settings.TASK_RESULT_EXPIRES_SECONDS,
+    ticket_ttl=settings.TASK_STREAM_TICKET_SECONDS,
+    max_entries=settings.TASK_EVENTS_MAX_ENTRIES,
+)
@@ -0,0 +1,260 @@
+import json
+import time
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger("ats.task_events")
+
+CHANNEL_PREFIX = "task-events"
+LAST_EVENT_PREFIX = "task-event-last"
+REDIS_RETRY_SECONDS = 30
+
+TERMINAL_STATES = ("SUCCESS", "FAILURE")
+TIMEOUT = "TIMEOUT"  # Sent by the API when a stream outlives its maximum lifetime
+
+
+def task_event(task_id: str, status: str, **data) -> Dict[str, Any]:
+    return {"task_id": task_id, "status": status, **data}
+
+
+def completion_event(task_id: str, state: str, retval: Any) -> Dict[str, Any]:
+    """
+    Terminal event for a finished task. Tasks report their own failures in the
+    result ({"status": "failed"}), which is a Celery SUCCESS; clients see FAILURE.
+    """
+    if state != "SUCCESS":
+        return task_event(task_id, "FAILURE", error=str(retval))
+    if isinstance(retval, dict) and retval.get("status") == "failed":
+        return task_event(task_id, "FAILURE", error=retval.get("error"), result=retval)
+    return task_event(task_id, "SUCCESS", result=retval)
+
+
+class TaskEventBroker:
+    """
+    Fan-out of task progress and completion events to streaming clients.
+
+    Workers publish on a Redis channel per task and the API relays them to
+    the subscribed clients, so waiting on a task costs no backend reads.
+    The last event of each task is also stored (for `ttl` seconds), so a
+    client subscribing after an event was published still receives it.
+    Without Redis (or while it is unreachable) events are delivered within
+    the process only, which covers eager tasks and tests.
+    """
+
+    def __init__(self, redis_url: Optional[str], ttl: int, max_entries: int):
+        self.redis_url = redis_url
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._last: "OrderedDict[str, tuple]" = OrderedDict()
+        self._subscribers: Dict[str, List[tuple]] = {}
+        self._lock = threading.Lock()
+        self._redis = None
+        self._async_redis = None  # (event loop, redis.asyncio client)
+        self._redis_down_until = 0.0
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        task_id = event["task_id"]
+        raw = json.dumps(event, default=str)
+        client = self._client()
+        if client is not None:
+            try:
+                with client.pipeline(transaction=False) as pipe:
+                    pipe.set(f"{LAST_EVENT_PREFIX}:{task_id}", raw, ex=self.ttl)
+                    pipe.publish(f"{CHANNEL_PREFIX}:{task_id}", raw)
+                    pipe.execute()
+                return
+            except Exception as e:
+                self._mark_down(e)
+        self._publish_local(task_id, raw)
+
+    async def subscribe(
+        self, task_ids: Iterable[str], keepalive: float, max_seconds: Optional[float] = None
+    ) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """
+        Yields the events of the given tasks until all of them have finished,
+        and None every `keepalive` seconds without events. After `max_seconds`
+        the tasks still running get a TIMEOUT event and the stream ends, so
+        unknown or lost task ids don't hold a subscription forever.
+
+        Redis being down when subscribing falls back to in-process delivery;
+        losing it mid-stream raises instead, since in-process delivery would
+        silently miss the workers' events.
+        """
+        pending = set(task_ids)
+        deadline = time.monotonic() + max_seconds if max_seconds is not None else None
+        stream = None
+        if self._client() is not None:
+            try:
+                connection = await self._connect_redis(pending)
+            except Exception as e:
+                self._mark_down(e)
+            else:
+                stream = self._subscribe_redis(connection, pending, keepalive, deadline)
+        over_redis = stream is not None
+        if not over_redis:
+            stream = self._subscribe_local(pending, keepalive, deadline)
+        try:
+            async with aclosing(stream):
+                async for event in stream:
+                    yield event
+        except Exception as e:
+            if over_redis:
+                self._mark_down(e)
+            raise
+        for task_id in sorted(pending):
+            yield task_event(task_id, TIMEOUT)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._last.clear()
+
+    async def aclose(self) -> None:
+        """Closes the shared async Redis client (API shutdown)."""
+        if self._async_redis is not None:
+            _, client = self._async_redis
+            self._async_redis = None
+            await client.aclose()
+
+    # --- Redis -----------------------------------------------------------
+
+    def _async_client(self):
+        # One client (and connection pool) per event loop, shared by all subscriptions;
+        # each pub/sub holds one pooled connection until it is closed
+        loop = asyncio.get_running_loop()
+        if self._async_redis is None or self._async_redis[0] is not loop:
+            import redis.asyncio
+            self._async_redis = (loop, redis.asyncio.Redis.from_url(self.redis_url, socket_connect_timeout=0.5))
+        return self._async_redis[1]
+
+    async def _connect_redis(self, pending: set) -> tuple:
+        client = self._async_client()
+        pubsub = client.pubsub(ignore_subscribe_messages=True)
+        try:
+            # Subscribe before reading the stored events so nothing falls in between
+            await pubsub.subscribe(*(f"{CHANNEL_PREFIX}:{task_id}" for task_id in pending))
+            stored = await client.mget([f"{LAST_EVENT_PREFIX}:{task_id}" for task_id in pending])
+        except BaseException:
+            await pubsub.aclose()
+            raise
+        return pubsub, stored
+
+    async def _subscribe_redis(
+        self, connection: tuple, pending: set, keepalive: float, deadline: Optional[float]
+    ) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        pubsub, stored = connection
+        try:
+            for raw in stored:
+                if raw is not None:
+                    event = _accept(json.loads(raw), pending)
+                    if event is not None:
+                        yield event
+            while pending and not _expired(deadline):
+                message = await pubsub.get_message(timeout=_wait(keepalive, deadline))
+                if message is None:
+                    yield None
+                    continue
+                event = _accept(json.loads(message["data"]), pending)
+                if event is not None:
+                    yield event
+        finally:
+            await pubsub.aclose()
+
+    # --- In-process ------------------------------------------------------
+
+    async def _subscribe_local(self, pending: set, keepalive: float, deadline: Optional[float]) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        subscriber = (loop, queue)
+        with self._lock:
+            for task_id in pending:
+                self._subscribers.setdefault(task_id, []).append(subscriber)
+            stored = [self._local_last(task_id) for task_id in pending]
+        try:
+            for raw in stored:
+                if raw is not None:
+                    queue.put_nowait(raw)
+            while pending and not _expired(deadline):
+                try:
+                    raw = await asyncio.wait_for(queue.get(), _wait(keepalive, deadline))
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                event = _accept(json.loads(raw), pending)
+                if event is not None:
+                    yield event
+        finally:
+            with self._lock:
+                for task_id, subscribers in list(self._subscribers.items()):
+                    if subscriber in subscribers:
+                        subscribers.remove(subscriber)
+                        if not subscribers:
+                            del self._subscribers[task_id]
+
+    def _publish_local(self, task_id: str, raw: str) -> None:
+        with self._lock:
+            self._last[task_id] = (time.monotonic() + self.ttl, raw)
+            self._last.move_to_end(task_id)
+            while len(self._last) > self.max_entries:
+                self._last.popitem(last=False)
+            subscribers = list(self._subscribers.get(task_id, ()))
+        # Publishers are worker threads; queues belong to the subscribers' loops
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, raw)
+            except RuntimeError:  # Loop already closed
+                pass
+
+    def _local_last(self, task_id: str) -> Optional[str]:
+        entry = self._last.get(task_id)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return entry[1]
+
+    # --- Stores ----------------------------------------------------------
+
+    def _client(self):
+        if not self.redis_url or time.monotonic() < self._redis_down_until:
+            return None
+        if self._redis is None:
+            import redis
+            self._redis = redis.Redis.from_url(
+                self.redis_url, socket_connect_timeout=0.5, socket_timeout=0.5
+            )
+        return self._redis
+
+    def _mark_down(self, error: Exception) -> None:
+        logger.warning(f"Task events falling back to in-process delivery: {error}")
+        self._redis_down_until = time.monotonic() + REDIS_RETRY_SECONDS
+
+
+def _wait(keepalive: float, deadline: Optional[float]) -> float:
+    if deadline is None:
+        return keepalive
+    return max(0.0, min(keepalive, deadline - time.monotonic()))
+
+
+def _expired(deadline: Optional[float]) -> bool:
+    return deadline is not None and time.monotonic() >= deadline
+
+
+def _accept(event: Dict[str, Any], pending: set) -> Optional[Dict[str, Any]]:
+    # Drops events of finished tasks (a stored event may also arrive live)
+    task_id = event.get("task_id")
+    if task_id not in pending:
+        return None
+    if event.get("status") in TERMINAL_STATES:
+        pending.discard(task_id)
+    return event
+
+
+task_events = TaskEventBroker(
+    settings.REDIS_URL,
+    ttl=settings.TASK_EVENTS_TTL_SECONDS,
+    max_entries=settings.TASK_EVENTS_MAX_ENTRIES,
+)
@@ -0,0 +1,288 @@
+import io
+import mmap
+import time
+import signal
+import logging
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional, Union
+
+from app.core.config import settings
+
+logger = logging.getLogger("ats.text_extraction")
+
+# Below this share of letters among non-blank characters, a text layer is
+# treated as garbage (broken font encodings, "(cid:12)" runs, symbol soup)
+MIN_LETTER_RATIO = 0.5
+MIN_CHARS_PER_PAGE = 20
+
+
+# Upload bytes, or a blob mapped in place by blob_store.open
+Content = Union[bytes, mmap.mmap]
+
+
+class PageTimeout(Exception):
+    pass
+
+
+class _MappedFile(io.RawIOBase):
+    """
+    Seekable read-only file over a memory-mapped blob, so the parsers read
+    the ranges they need from the mapping rather than from a copy of it.
+    """
+
+    def __init__(self, mapping: mmap.mmap):
+        self._view = memoryview(mapping)
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._pos, io.SEEK_END: len(self._view)}[whence]
+        self._pos = max(0, base + offset)
+        return self._pos
+
+    def readinto(self, buffer) -> int:
+        data = self._view[self._pos:self._pos + len(buffer)]
+        buffer[:len(data)] = data
+        self._pos += len(data)
+        return len(data)
+
+    def close(self) -> None:
+        if not self.closed:
+            self._view.release()  # The mapping cannot be closed while a view is exported
+        super().close()
+
+
+def _file(content: Content) -> BinaryIO:
+    return io.BytesIO(content) if isinstance(content, bytes) else _MappedFile(content)
+
+
+def _pdfium_document(content: Content):
+    import pypdfium2 as pdfium
+    if isinstance(content, bytes):
+        return pdfium.PdfDocument(content)
+    return pdfium.PdfDocument(_MappedFile(content), autoclose=True)
+
+
+@dataclass
+class Extraction:
+    text: str
+    engine: str  # e.g. "pdfium", "pdfium+pdfplumber", "pdfium+ocr", "docx", "txt"
+    seconds: float
+    pages: int = 0
+    truncated: bool = False  # Page cap or timeout reached
+
+    def info(self) -> Dict:
+        """What is stored on the candidate (see _process_cv)."""
+        return {"engine": self.engine, "ms": round(self.seconds * 1000, 1)}
+
+
+# --- PDF engines -------------------------------------------------------------
+# Each yields the text of one page at a time, up to max_pages.
+
+def _pdfium_pages(content: Content, max_pages: int) -> Iterator[str]:
+    pdf = _pdfium_document(content)
+    try:
+        for index in range(min(len(pdf), max_pages)):
+            page = pdf[index]
+            textpage = page.get_textpage()
+            try:
+                yield textpage.get_text_range().replace("\r\n", "\n")
+            finally:
+                textpage.close()
+                page.close()
+    finally:
+        pdf.close()
+
+
+def _pdfminer_pages(content: Content, max_pages: int) -> Iterator[str]:
+    # Without layout analysis (laparams=None) pdfminer only decodes the text runs
+    from pdfminer.converter import TextConverter
+    from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+    from pdfminer.pdfpage import PDFPage
+    resources = PDFResourceManager(caching=True)
+    with _file(content) as fp:
+        for page in PDFPage.get_pages(fp, maxpages=max_pages):
+            out = io.StringIO()
+            device = TextConverter(resources, out, laparams=None)
+            try:
+                PDFPageInterpreter(resources, device).process_page(page)
+            finally:
+                device.close()
+            yield out.getvalue()
+
+
+def _pdfplumber_pages(content: Content, max_pages: int) -> Iterator[str]:
+    import pdfplumber
+    with _file(content) as fp, pdfplumber.open(fp) as pdf:
+        for page in pdf.pages[:max_pages]:
+            yield page.extract_text() or ""
+            page.close()  # Drops the cached layout objects of the page
+
+
+PDF_ENGINES: Dict[str, Callable[[Content, int], Iterator[str]]] = {
+    "pdfium": _pdfium_pages,
+    "pdfminer": _pdfminer_pages,
+    "pdfplumber": _pdfplumber_pages,
+}
+
+
+@contextmanager
+def _page_deadline(seconds: float):
+    """
+    Interrupts a page that runs past `seconds`. SIGALRM can only be used from
+    the main thread (Celery prefork workers, the reprocess CLI); elsewhere the
+    per-page check in _run_engine applies. Native code (pdfium) is only
+    interrupted when it returns to Python.
+    """
+    if seconds <= 0 or threading.current_thread() is not threading.main_thread() or not hasattr(signal, "setitimer"):
+        yield
+        return
+
+    def timeout(signum, frame):
+        raise PageTimeout()
+
+    previous = signal.signal(signal.SIGALRM, timeout)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def _run_engine(name: str, content: Content) -> tuple:
+    """Page texts from one engine, and whether the page cap or a page timeout cut it short."""
+    max_pages = settings.PDF_MAX_PAGES
+    page_timeout = settings.PDF_PAGE_TIMEOUT_SECONDS
+    pages: List[str] = []
+    truncated = False
+    iterator = PDF_ENGINES[name](content, max_pages + 1)
+    try:
+        while True:
+            start = time.perf_counter()
+            try:
+                with _page_deadline(page_timeout):
+                    page = next(iterator)
+            except StopIteration:
+                break
+            except PageTimeout:
+                logger.warning(f"{name}: page {len(pages) + 1} exceeded {page_timeout}s; keeping {len(pages)} pages")
+                truncated = True
+                break
+            if len(pages) == max_pages:
+                truncated = True
+                break
+            pages.append(page)
+            if page_timeout > 0 and time.perf_counter() - start > page_timeout:
+                truncated = True
+                break
+    finally:
+        iterator.close()
+    return pages, truncated
+
+
+def looks_like_text(text: str) -> bool:
+    """Whether a text layer is usable: no undecoded glyphs, mostly letters."""
+    if "(cid:" in text or "\ufffd" in text:
+        return False
+    chars = [c for c in text if not c.isspace()]
+    if not chars:
+        return False
+    letters = sum(1 for c in chars if c.isalpha())
+    return letters / len(chars) >= MIN_LETTER_RATIO
+
+
+def _ocr_page(content: Content, index: int) -> str:
+    import pytesseract
+    pdf = _pdfium_document(content)
+    try:
+        page = pdf[index]
+        image = page.render(scale=settings.PDF_OCR_DPI / 72).to_pil()
+        page.close()
+    finally:
+        pdf.close()
+    # pytesseract kills tesseract itself on timeout, also outside the main thread
+    return pytesseract.image_to_string(image, lang=settings.PDF_OCR_LANG, timeout=max(settings.PDF_PAGE_TIMEOUT_SECONDS, 0))
+
+
+def _ocr_available() -> bool:
+    if not settings.PDF_OCR_ENABLED:
+        return False
+    try:
+        import pytesseract  # noqa: F401
+    except ImportError:
+        logger.warning("PDF_OCR_ENABLED is set but pytesseract is not installed")
+        return False
+    return True
+
+
+def extract_pdf(content: Content) -> Extraction:
+    """
+    Layered PDF extraction: the fast engine (PDF_FAST_ENGINE) reads the text
+    layer; only when that yields garbage is the layout-aware engine
+    (PDF_LAYOUT_ENGINE) run. Image-only pages of scanned CVs are OCR'd when
+    PDF_OCR_ENABLED and pytesseract are available.
+    """
+    start = time.perf_counter()
+    engine = settings.PDF_FAST_ENGINE
+    pages, truncated = _run_engine(engine, content)
+    text = "\n".join(pages)
+
+    layout = settings.PDF_LAYOUT_ENGINE
+    if text.strip() and not looks_like_text(text) and layout and layout != engine:
+        fallback_pages, fallback_truncated = _run_engine(layout, content)
+        fallback_text = "\n".join(fallback_pages)
+        if looks_like_text(fallback_text):
+            engine = f"{engine}+{layout}"
+            pages, truncated, text = fallback_pages, fallback_truncated, fallback_text
+
+    blank = [i for i, page in enumerate(pages) if len(page.strip()) < MIN_CHARS_PER_PAGE]
+    if blank and _ocr_available():
+        recognised = 0
+        for i in blank:
+            try:
+                with _page_deadline(settings.PDF_PAGE_TIMEOUT_SECONDS):
+                    page = _ocr_page(content, i)
+            except PageTimeout:
+                logger.warning(f"OCR of page {i + 1} exceeded {settings.PDF_PAGE_TIMEOUT_SECONDS}s")
+                continue
+            except Exception as e:
+                logger.error(f"OCR failed on page {i + 1}: {e}")
+                continue
+            if page.strip():
+                pages[i] = page
+                recognised += 1
+        if recognised:
+            engine = f"{engine}+ocr"
+            text = "\n".join(pages)
+
+    return Extraction(text=text, engine=engine, seconds=time.perf_counter() - start, pages=len(pages), truncated=truncated)
+
+
+def extract_document(content: Content, filename: str) -> Extraction:
+    """Synchronous text extraction of a CV file; safe to run in a worker process."""
+    ext = filename.lower().split('.')[-1]
+    if ext == "pdf":
+        return extract_pdf(content)
+
+    start = time.perf_counter()
+    if ext == "docx":
+        from docx import Document
+        with _file(content) as fp:
+            doc = Document(fp)
+        text = "\n".join([p.text for p in doc.paragraphs])
+    elif ext == "txt":
+        text = str(content, "utf-8", errors="ignore")
+    else:
+        text = ""  # Should be handled by validation before calling this
+    return Extraction(text=text, engine=ext, seconds=time.perf_counter() - start)
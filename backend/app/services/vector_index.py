@@ -0,0 +1,144 @@
+import os
+import logging
+import threading
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to unlocked appends
+    fcntl = None
+
+logger = logging.getLogger("ats.vector_index")
+
+MAGIC = b"NIDUSVEC"
+HEADER_SIZE = 16  # Magic, then the vector dimension as little-endian uint64
+
+
+class VectorIndex:
+    """
+    Append-only file of candidate embeddings, searched by exact dot product.
+
+    Each record is (candidate id, user id, float32 vector). Workers append under
+    a file lock as CVs are ingested; searches memory-map the file, so matching
+    a JD against every candidate of a user is one matrix-vector product over
+    pages the OS already caches, with no per-candidate vectorizing. A candidate
+    added twice (e.g. reprocessed) keeps its latest vector.
+    """
+
+    def __init__(self, path: Optional[str], dim: int):
+        self.path = path
+        self.dim = dim
+        self.record = np.dtype([("id", "<i8"), ("user_id", "<i8"), ("vector", "<f4", (dim,))])
+        self._lock = threading.Lock()
+        self._records = None
+        self._mapped = None  # (path, inode, size) of the current mapping
+
+    def add(self, ids: Sequence[int], user_ids: Sequence[int], vectors: np.ndarray) -> None:
+        if not self.path or not len(ids):
+            return
+        records = np.zeros(len(ids), dtype=self.record)
+        records["id"] = ids
+        records["user_id"] = user_ids
+        records["vector"] = vectors
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with self._open_locked() as f:
+            f.write(records.tobytes())
+
+    def _header(self) -> bytes:
+        return MAGIC + np.uint64(self.dim).tobytes()
+
+    def _open_locked(self):
+        """
+        The index opened for appending under the file lock, with a valid header.
+        The size is checked only once the lock is held: another worker may have
+        written the header, or moved a stale index aside, while we waited.
+        """
+        while True:
+            f = open(self.path, "a+b")
+            try:
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_EX)
+                stat = os.fstat(f.fileno())
+                if not os.path.exists(self.path) or os.stat(self.path).st_ino != stat.st_ino:
+                    f.close()  # Moved aside while we waited: lock the new file
+                    continue
+                if stat.st_size == 0:
+                    f.write(self._header())
+                    return f
+                f.seek(0)
+                if f.read(HEADER_SIZE) != self._header():
+                    self._discard_stale()
+                    f.close()
+                    continue
+                torn = (stat.st_size - HEADER_SIZE) % self.record.itemsize
+                if torn:  # A writer died mid-record; drop the partial tail
+                    f.truncate(stat.st_size - torn)
+                return f
+            except BaseException:
+                f.close()
+                raise
+
+    def _discard_stale(self) -> None:
+        # Written with another EMBEDDING_DIM (or not an index at all): its vectors can't
+        # be searched with this model, so start a new index; reprocessing refills it
+        stale = f"{self.path}.stale"
+        os.replace(self.path, stale)
+        logger.error(
+            f"{self.path} is not a vector index of dimension {self.dim}; moved it to {stale}. "
+            f"Rebuild it with: python -m app.tasks.reprocess"
+        )
+
+    def _read(self) -> Optional[np.ndarray]:
+        """Memory-mapped records, remapped when other workers have appended."""
+        if not self.path:
+            return None
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        size = stat.st_size
+        with self._lock:
+            if (self.path, stat.st_ino, size) != self._mapped:
+                self._mapped = (self.path, stat.st_ino, size)
+                self._records = None
+                with open(self.path, "rb") as f:
+                    header = f.read(HEADER_SIZE)
+                if len(header) < HEADER_SIZE:
+                    return None  # Header being written
+                if header != self._header():
+                    # Searched as empty until the next add replaces it
+                    logger.error(f"{self.path} is not a vector index of dimension {self.dim}")
+                    return None
+                count = (size - HEADER_SIZE) // self.record.itemsize  # Ignore a record being appended
+                if count:
+                    self._records = np.memmap(self.path, dtype=self.record, mode="r", offset=HEADER_SIZE, shape=(count,))
+            return self._records
+
+    def search(self, vector: np.ndarray, user_id: int, top_k: int = 20) -> Tuple[List[Tuple[int, float]], int]:
+        """
+        The user's top_k candidates by dot product with `vector`, best first,
+        and how many candidates of the user were searched.
+        """
+        records = self._read()
+        if records is None or top_k <= 0:
+            return [], 0
+        rows = np.flatnonzero(records["user_id"] == user_id)
+        if not len(rows):
+            return [], 0
+        # Latest record of each candidate
+        ids = records["id"][rows]
+        _, last = np.unique(ids[::-1], return_index=True)
+        rows = rows[len(rows) - 1 - last]
+
+        scores = records["vector"][rows] @ vector.astype(np.float32)
+        k = min(top_k, len(rows))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(records["id"][rows[i]]), float(scores[i])) for i in top], len(rows)
+
+
+vector_index = VectorIndex(settings.VECTOR_INDEX_PATH, settings.EMBEDDING_DIM)
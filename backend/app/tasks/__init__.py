@@ -1 +1,2 @@
-from .cv_processing import process_cv_task
+from .cv_processing import process_cv_task, process_cv_batch_task
+from .exports import export_reports_task
@@ -1,62 +1,288 @@
 import logging
 import asyncio
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 
 from app.celery_app import celery_app
-from app.services.cv_analyzer import analyze_cv_text
-from app.services.matching_service import calculate_match_score, get_missing_keywords
+from app.services.cv_analyzer import analyze_cv_text, build_analysis
+from app.services.ai_service import ai_service
+from app.services.analysis_cache import analysis_cache, text_digest
+from app.core.config import settings
+from app.services.matching_service import corpus_model, decode_term_vectors, embedding_matcher, encode_term_vector, score_counts, get_missing_keywords
+from app.services.vector_index import vector_index
+from app.services.blob_store import blob_store
+from app.services.text_extraction import Extraction, extract_document
+from app.services.task_events import task_event, task_events
+from app.services import metrics, profiling
+from app.services.skill_taxonomy import get_skill_taxonomy
 from app.repositories.candidate import candidate_repo
 from app.core.database import SessionLocal
 from app.models.user import User
 
 logger = logging.getLogger(__name__)
 
-@celery_app.task(bind=True)
-def process_cv_task(self, cv_text: str, filename: str, ext: str, user_id: int, job_description: Optional[str] = None, api_key: Optional[str] = None) -> Dict[str, Any]:
+def _extract_blob(key: str, filename: str) -> Extraction:
+    # The worker reads the original file in place; only its key went through the broker
+    with metrics.stage("extraction"), blob_store.open(key) as content:
+        return extract_document(content, filename)
+
+def _cache_mode(api_key: Optional[str]) -> str:
+    # AI and regex results are cached apart so a keyless hit never hides an AI analysis
+    return "ai" if (api_key or ai_service.api_key) else "basic"
+
+def _cache_result(content_hash: str, mode: str, analysis_result: Dict[str, Any]) -> None:
+    # Don't cache a regex fallback under the AI namespace
+    if mode == "basic" or analysis_result.get("ai_extracted"):
+        analysis_cache.set(content_hash, mode, analysis_result)
+
+def _cached(content_hash: str, mode: str, filename: str, ext: str) -> Optional[Dict[str, Any]]:
+    cached = analysis_cache.get(content_hash, mode)
+    if cached is not None:
+        logger.info(f"Analysis cache hit for {content_hash[:12]}")
+        cached["filename"] = filename
+        cached["format"] = ext.upper()
+    return cached
+
+def _analyze(cv_text: str, filename: str, ext: str, api_key: Optional[str], content_hash: str) -> Dict[str, Any]:
     """
-    Celery task to process CV text asynchronously.
+    JD-independent analysis of a CV, served from the content-hash cache when the same text was seen before.
     """
-    logger.info(f"Processing CV task {self.request.id} for user {user_id}")
+    mode = _cache_mode(api_key)
+    cached = _cached(content_hash, mode, filename, ext)
+    if cached is not None:
+        return cached
+    
+    analysis_result = analyze_cv_text(cv_text, filename, ext, api_key=api_key)
+    _cache_result(content_hash, mode, analysis_result)
+    return analysis_result
+
+def _analyze_many(items: List[Dict[str, str]], api_key: Optional[str]) -> List[Any]:
+    """
+    Batch version of _analyze: cache misses are sent to the LLM concurrently.
+    Returns (analysis, content_hash) per item, or the exception that item raised.
+    """
+    mode = _cache_mode(api_key)
+    results: List[Any] = [None] * len(items)
+    misses = []
+    for i, item in enumerate(items):
+        try:
+            content_hash = text_digest(item["cv_text"])
+            cached = _cached(content_hash, mode, item["filename"], item["ext"])
+            if cached is not None:
+                results[i] = (cached, content_hash)
+            else:
+                misses.append((i, content_hash))
+        except Exception as e:
+            results[i] = e
+    
+    ai_results = ai_service.extract_many([items[i]["cv_text"] for i, _ in misses], api_key=api_key)
+    for (i, content_hash), ai_data in zip(misses, ai_results):
+        item = items[i]
+        try:
+            analysis_result = build_analysis(item["cv_text"], item["filename"], item["ext"], ai_data, ai_enabled=(mode == "ai"))
+            _cache_result(content_hash, mode, analysis_result)
+            results[i] = (analysis_result, content_hash)
+        except Exception as e:
+            results[i] = e
+    return results
+
+def _process_cv(
+    cv_text: str,
+    filename: str,
+    ext: str,
+    user_id: int,
+    job_description: Optional[str] = None,
+    api_key: Optional[str] = None,
+    job_counts=None,
+    job_terms=None,
+    analysis_result: Optional[Dict[str, Any]] = None,
+    content_hash: Optional[str] = None,
+    job_embedding=None,
+    extraction: Optional[Dict[str, Any]] = None,
+    blob: Optional[str] = None
+) -> Tuple[Dict[str, Any], Dict[str, Any], Any]:
+    """
+    Analyzes and matches one CV. Returns the analysis result, the candidate row to store and
+    the CV embedding for the vector index; nothing is written. job_counts/job_terms/job_embedding
+    let a batch vectorize its JD only once, and analysis_result/content_hash skip the analysis
+    when the batch already ran it. extraction is the {"engine", "ms"} of the text extraction
+    and blob the key of the original file.
+    """
+    if content_hash is None:
+        content_hash = text_digest(cv_text)
+    if analysis_result is None:
+        analysis_result = _analyze(cv_text, filename, ext, api_key, content_hash)
+    
+    # Store canonical skill names so search, matching and aggregation share one vocabulary
+    analysis_result["keywords"] = get_skill_taxonomy().normalize_many(analysis_result["keywords"])
+    
+    with metrics.stage("matching"):
+        # Vectorize the CV once: stored for batch scoring, added to the corpus once stored
+        cv_counts = corpus_model.counts([cv_text])
+        cv_embedding = embedding_matcher.embed([cv_text])[0]
     
-    try:
-        # Run synchronous or blocking analysis here
-        analysis_result = analyze_cv_text(cv_text, filename, ext, api_key=api_key)
-        
         # Calculate match if JD is provided
         if job_description:
-            score = calculate_match_score(cv_text, job_description)
-            missing = get_missing_keywords(cv_text, job_description)
+            if job_counts is None:
+                job_counts = corpus_model.counts([job_description])
+            if settings.MATCHER_BACKEND == embedding_matcher.name:
+                if job_embedding is None:
+                    job_embedding = embedding_matcher.embed([job_description])[0]
+                score = embedding_matcher.similarity(cv_embedding, job_embedding)
+            else:
+                score = score_counts(cv_counts, job_counts)
+            missing = get_missing_keywords(
+                cv_text, job_description, job_terms=job_terms, resume_skills=analysis_result["keywords"]
+            )
             analysis_result["match_score"] = score
             analysis_result["missing_keywords"] = missing
-            
+        
             if missing:
                 analysis_result["recommendations"].append(f"Faltan palabras clave importantes: {', '.join(missing[:3])}")
         else:
             analysis_result["match_score"] = 0.0
             analysis_result["missing_keywords"] = []
+    
+    candidate_in = {
+        "user_id": user_id,
+        "filename": filename,
+        "format": ext.upper(),
+        "content_hash": content_hash,
+        "blob_key": blob,
+        "extraction_engine": (extraction or {}).get("engine"),
+        "extraction_ms": (extraction or {}).get("ms"),
+        "keywords": analysis_result["keywords"],
+        "structure": analysis_result["structure"],
+        "recommendations": analysis_result["recommendations"],
+        "match_score": analysis_result["match_score"],
+        "missing_keywords": analysis_result["missing_keywords"],
+        "ai_data": analysis_result["ai_extracted"],
+        "ai_status": analysis_result.get("ai_status"),
+        "term_vector": encode_term_vector(cv_counts)
+    }
+    return analysis_result, candidate_in, cv_embedding
+
+def _fit_corpus(rows: List[Dict[str, Any]]) -> None:
+    # Only committed CVs count towards the corpus document frequencies; a failure here only delays IDF updates
+    try:
+        corpus_model.partial_fit(decode_term_vectors([row["term_vector"] for row in rows]))
+    except Exception as e:
+        logger.error(f"Error adding CVs to the matching model: {e}")
+
+def _index_embeddings(ids: List[int], user_id: int, embeddings: List[Any]) -> None:
+    # The candidates are already stored; a failed index write only costs semantic search recall
+    try:
+        vector_index.add(ids, [user_id] * len(ids), embeddings)
+    except Exception as e:
+        logger.error(f"Error adding CV embeddings to the vector index: {e}")
+
+@celery_app.task(bind=True)
+def process_cv_task(self, filename: str, ext: str, user_id: int, job_description: Optional[str] = None, api_key: Optional[str] = None, extraction: Optional[Dict[str, Any]] = None, blob: Optional[str] = None, cv_text: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Celery task to process a CV asynchronously. The original file is read
+    from the blob store by its key and its text extracted here; cv_text
+    (already extracted text) skips that step.
+    """
+    logger.info(f"Processing CV task {self.request.id} for user {user_id}")
+    
+    with profiling.sampled_task(f"process_cv_task {filename}"):
+        try:
+            if cv_text is None:
+                task_events.publish(task_event(self.request.id, "PROGRESS", stage="extracting"))
+                extracted = _extract_blob(blob, filename)
+                cv_text, extraction = extracted.text, extracted.info()
             
-        # Save to DB inside task
+            # Run synchronous or blocking analysis here
+            task_events.publish(task_event(self.request.id, "PROGRESS", stage="analyzing"))
+            analysis_result, candidate_in, embedding = _process_cv(
+                cv_text, filename, ext, user_id, job_description, api_key, extraction=extraction, blob=blob
+            )
+            
+            # Save to DB inside task
+            task_events.publish(task_event(self.request.id, "PROGRESS", stage="saving"))
+            db = SessionLocal()
+            try:
+                with metrics.stage("db_write"):
+                    candidate = candidate_repo.create(db, obj_in=candidate_in)
+                _fit_corpus([candidate_in])
+                _index_embeddings([candidate.id], user_id, [embedding])
+                analysis_result["id"] = candidate.id
+                analysis_result["status"] = "completed"
+            finally:
+                db.close()
+            
+            return analysis_result
+        
+        except Exception as e:
+            logger.error(f"Error processing CV task: {e}")
+            return {"status": "failed", "error": str(e)}
+
+@celery_app.task(bind=True)
+def process_cv_batch_task(self, items: List[Dict[str, str]], user_id: int, job_description: Optional[str] = None, api_key: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Celery task to process a chunk of CVs ({"blob", "filename", "ext"} each, or "cv_text"
+    instead of "blob"). Texts are extracted from the blob store, LLM calls run concurrently
+    over pooled clients, the JD is vectorized once, and all candidates are written in a
+    single transaction. Reports per-item status.
+    """
+    logger.info(f"Processing CV batch task {self.request.id} ({len(items)} CVs) for user {user_id}")
+    
+    analyses: Dict[int, Any] = {}
+    for i, item in enumerate(items):
+        if "cv_text" in item:
+            continue
+        try:
+            extracted = _extract_blob(item["blob"], item["filename"])
+            item["cv_text"], item["extraction"] = extracted.text, extracted.info()
+        except Exception as e:
+            analyses[i] = e
+    ready = [i for i in range(len(items)) if i not in analyses]
+    analyses.update(zip(ready, _analyze_many([items[i] for i in ready], api_key)))
+    task_events.publish(task_event(self.request.id, "PROGRESS", stage="saving", analyzed=len(items)))
+    job_counts = job_terms = job_embedding = None
+    if job_description:
+        job_counts = corpus_model.counts([job_description])
+        job_terms = corpus_model.rank_terms(job_description)
+        job_embedding = embedding_matcher.embed([job_description])[0]
+    
+    results = []
+    rows = []
+    for i, item in enumerate(items):
+        analysis = analyses[i]
+        try:
+            if isinstance(analysis, Exception):
+                raise analysis
+            analysis_result, candidate_in, embedding = _process_cv(
+                item["cv_text"], item["filename"], item["ext"], user_id, job_description, api_key,
+                job_counts=job_counts, job_terms=job_terms, job_embedding=job_embedding,
+                analysis_result=analysis[0], content_hash=analysis[1],
+                extraction=item.get("extraction"), blob=item.get("blob")
+            )
+            results.append({"filename": item["filename"], "status": "completed", "match_score": analysis_result["match_score"]})
+            rows.append((len(results) - 1, candidate_in, embedding))
+        except Exception as e:
+            logger.error(f"Error processing CV {item.get('filename')} in batch: {e}")
+            results.append({"filename": item.get("filename"), "status": "failed", "error": str(e)})
+    
+    if rows:
         db = SessionLocal()
         try:
-            candidate_in = {
-                "user_id": user_id,
-                "filename": filename,
-                "format": ext.upper(),
-                "keywords": analysis_result["keywords"],
-                "structure": analysis_result["structure"],
-                "recommendations": analysis_result["recommendations"],
-                "match_score": analysis_result["match_score"],
-                "missing_keywords": analysis_result["missing_keywords"],
-                "ai_data": analysis_result["ai_extracted"]
-            }
-            candidate = candidate_repo.create(db, obj_in=candidate_in)
-            analysis_result["id"] = candidate.id
-            analysis_result["status"] = "completed"
+            with metrics.stage("db_write"):
+                ids = candidate_repo.create_many(db, objs_in=[row for _, row, _ in rows])
+            _fit_corpus([row for _, row, _ in rows])
+            for (index, _, _), candidate_id in zip(rows, ids):
+                results[index]["id"] = candidate_id
+            _index_embeddings(ids, user_id, [embedding for _, _, embedding in rows])
+        except Exception as e:
+            logger.error(f"Error saving CV batch: {e}")
+            for index, _, _ in rows:
+                results[index] = {"filename": results[index]["filename"], "status": "failed", "error": str(e)}
         finally:
             db.close()
-            
-        return analysis_result
-        
-    except Exception as e:
-        logger.error(f"Error processing CV task: {e}")
-        return {"status": "failed", "error": str(e)}
+    
+    completed = sum(1 for r in results if r["status"] == "completed")
+    return {
+        "status": "completed" if completed else "failed",
+        "completed": completed,
+        "failed": len(results) - completed,
+        "items": results
+    }
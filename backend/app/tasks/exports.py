@@ -0,0 +1,119 @@
+import os
+import time
+import logging
+import zipfile
+from typing import Any, Dict, List, Optional
+
+from billiard.pool import Pool
+from app.celery_app import celery_app
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.repositories.candidate import candidate_repo
+from app.services.pdf_generator import generate_pdf_report
+from app.services.report_cache import REPORT_COLUMNS, report_analysis, report_cache, report_version
+
+logger = logging.getLogger(__name__)
+
+RENDER_CHUNK_SIZE = 64  # Candidates loaded and rendered at a time
+
+
+def export_path(user_id: int, export_id: str) -> str:
+    return os.path.join(settings.EXPORT_DIR, str(user_id), f"{export_id}.zip")
+
+
+def _render(analysis: Dict[str, Any]) -> bytes:
+    return generate_pdf_report(analysis).getvalue()
+
+
+def _render_pool() -> Optional[Pool]:
+    # Prefork Celery children are daemonic, and multiprocessing refuses to start
+    # processes from them; billiard (Celery's fork of it) allows it, so the pool
+    # works under any worker pool. With 0 workers reports render in the task process
+    if settings.EXPORT_RENDER_WORKERS <= 0:
+        return None
+    return Pool(processes=settings.EXPORT_RENDER_WORKERS)
+
+
+def _remove_expired(directory: str) -> None:
+    cutoff = time.time() - settings.EXPORT_TTL_HOURS * 3600
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            pass
+
+
+@celery_app.task(bind=True)
+def export_reports_task(
+    self,
+    user_id: int,
+    ids: Optional[List[int]] = None,
+    min_score: Optional[float] = None,
+    file_format: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Celery task that zips the PDF reports of a user's candidates.
+    Reports already in the report cache are reused; the rest are rendered in a
+    process pool and cached for later downloads.
+    """
+    logger.info(f"Export task {self.request.id} for user {user_id}")
+    path = export_path(user_id, self.request.id)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    _remove_expired(os.path.dirname(path))
+    tmp_path = f"{path}.tmp"
+
+    db = SessionLocal()
+    pool = _render_pool()
+    count = 0
+    try:
+        candidates = candidate_repo.iter_by_user(
+            db, user_id=user_id, ids=ids, columns=REPORT_COLUMNS,
+            min_score=min_score, format=file_format, batch_size=RENDER_CHUNK_SIZE
+        )
+        # PDFs are already compressed; storing them keeps zipping cheap
+        with zipfile.ZipFile(tmp_path, "w", compression=zipfile.ZIP_STORED) as archive:
+            chunk = []
+            for candidate in candidates:
+                chunk.append((candidate.id, report_analysis(candidate)))
+                if len(chunk) >= RENDER_CHUNK_SIZE:
+                    count += _write_chunk(archive, chunk, pool)
+                    chunk = []
+            if chunk:
+                count += _write_chunk(archive, chunk, pool)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        logger.error(f"Error exporting reports: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return {"status": "failed", "error": str(e)}
+    finally:
+        db.close()
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    return {"status": "completed", "count": count, "download_url": f"/export/{self.request.id}"}
+
+
+def _write_chunk(archive: zipfile.ZipFile, chunk: List[tuple], pool: Optional[Pool]) -> int:
+    versions = [report_version(analysis) for _, analysis in chunk]
+    cached = [report_cache.get(candidate_id, version) for (candidate_id, _), version in zip(chunk, versions)]
+    missing = [i for i, path in enumerate(cached) if path is None]
+
+    analyses = [chunk[i][1] for i in missing]
+    rendered = pool.map(_render, analyses) if pool is not None else map(_render, analyses)
+    contents = dict(zip(missing, rendered))
+
+    for i, (candidate_id, analysis) in enumerate(chunk):
+        name = f"analysis_{candidate_id}.pdf"
+        if i in contents:
+            report_cache.put(candidate_id, versions[i], contents[i])
+            archive.writestr(name, contents[i])
+        else:
+            try:
+                archive.write(cached[i], name)
+            except FileNotFoundError:  # Replaced by a newer version meanwhile
+                archive.writestr(name, _render(analysis))
+    return len(chunk)
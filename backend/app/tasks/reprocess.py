@@ -0,0 +1,117 @@
+"""
+Offline reprocessing of stored CVs from their original files in the blob store.
+
+    python -m app.tasks.reprocess --ai-status deferred   # retry AI-deferred CVs
+    python -m app.tasks.reprocess --user-id 3 --limit 500
+
+Each CV is extracted and analyzed again (keywords, structure, AI data) and its
+embedding re-added to the vector index. Match scores are kept: the job
+description they were computed against is not stored. The corpus TF-IDF model
+swaps each CV's previous term counts for the regenerated ones, so IDF stays
+consistent with the stored term vectors, and is saved when the run ends.
+"""
+import sys
+import logging
+import argparse
+from typing import Any, Dict, Optional
+
+from app.core.database import SessionLocal
+from app.models.candidate import Candidate
+from app.repositories.candidate import candidate_repo
+from app.services.analysis_cache import text_digest
+from app.services.matching_service import corpus_model, decode_term_vectors, embedding_matcher, encode_term_vector
+from app.services.skill_taxonomy import get_skill_taxonomy
+from app.services.vector_index import vector_index
+from app.tasks.cv_processing import _analyze, _extract_blob
+
+logger = logging.getLogger("ats.reprocess")
+
+
+def reprocess_candidate(db, candidate: Candidate, api_key: Optional[str] = None) -> Any:
+    """Re-analyzes one candidate from its original file; returns its new embedding."""
+    extraction = _extract_blob(candidate.blob_key, candidate.filename)
+    text = extraction.text
+    content_hash = text_digest(text)
+    analysis = _analyze(text, candidate.filename, (candidate.format or "").lower(), api_key, content_hash)
+    counts = corpus_model.counts([text])
+    # CVs stored without a term vector were never counted in the corpus
+    previous = candidate.term_vector
+    candidate_repo.update_analysis(db, candidate, {
+        "content_hash": content_hash,
+        "extraction_engine": extraction.engine,
+        "extraction_ms": extraction.info()["ms"],
+        "keywords": get_skill_taxonomy().normalize_many(analysis["keywords"]),
+        "structure": analysis["structure"],
+        "recommendations": analysis["recommendations"],
+        "ai_data": analysis["ai_extracted"],
+        "ai_status": analysis.get("ai_status"),
+        "term_vector": encode_term_vector(counts),
+    })
+    # Only once the new vector is committed; a failure here only delays IDF updates
+    try:
+        corpus_model.partial_fit(counts, replaced=decode_term_vectors([previous]) if previous else None)
+    except Exception as e:
+        logger.error(f"Error updating the matching model for candidate {candidate.id}: {e}")
+    return embedding_matcher.embed([text])[0]
+
+
+def reprocess(
+    db,
+    ai_status: Optional[str] = None,
+    user_id: Optional[int] = None,
+    limit: Optional[int] = None,
+    api_key: Optional[str] = None,
+    batch_size: int = 100,
+) -> Dict[str, int]:
+    """
+    Reprocesses the matching candidates in id order, `batch_size` at a time,
+    indexing each batch's embeddings together. Returns the counts.
+    """
+    counts = {"reprocessed": 0, "failed": 0}
+    last_id = 0
+    while limit is None or counts["reprocessed"] + counts["failed"] < limit:
+        remaining = batch_size if limit is None else min(batch_size, limit - counts["reprocessed"] - counts["failed"])
+        candidates = candidate_repo.get_reprocessable(db, after_id=last_id, limit=remaining, ai_status=ai_status, user_id=user_id)
+        if not candidates:
+            break
+        ids, user_ids, embeddings = [], [], []
+        for candidate in candidates:
+            last_id = candidate.id
+            try:
+                embeddings.append(reprocess_candidate(db, candidate, api_key=api_key))
+            except Exception as e:
+                logger.error(f"Could not reprocess candidate {candidate.id}: {e}")
+                counts["failed"] += 1
+                continue
+            ids.append(candidate.id)
+            user_ids.append(candidate.user_id)
+            counts["reprocessed"] += 1
+        try:
+            vector_index.add(ids, user_ids, embeddings)
+        except Exception as e:
+            logger.error(f"Error adding CV embeddings to the vector index: {e}")
+        logger.info(f"Reprocessed up to candidate {last_id}: {counts}")
+    corpus_model.save()
+    return counts
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ai-status", help="Only candidates with this ai_status (e.g. deferred, fallback)")
+    parser.add_argument("--user-id", type=int, help="Only this user's candidates")
+    parser.add_argument("--limit", type=int, help="Stop after this many candidates")
+    parser.add_argument("--batch-size", type=int, default=100)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+
+    db = SessionLocal()
+    try:
+        counts = reprocess(db, ai_status=args.ai_status, user_id=args.user_id, limit=args.limit, batch_size=args.batch_size)
+    finally:
+        db.close()
+    print(f"{counts['reprocessed']} reprocessed, {counts['failed']} failed")
+    return 1 if counts["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
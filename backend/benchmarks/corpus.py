@@ -0,0 +1,104 @@
+"""
+Synthetic CVs and job descriptions for the benchmarks.
+
+Texts are built from the skill dictionary and a few Spanish/English
+templates so the analyzers and matchers see realistic vocabulary. The same
+seed always yields the same corpus.
+"""
+import io
+import json
+import random
+from typing import Dict, List
+
+from app.services.keyword_scanner import DEFAULT_DICTIONARY_PATH
+
+# Approximate words of body text per CV size
+SIZES = {"small": 250, "medium": 1000, "large": 4000}
+FORMATS = ("txt", "docx", "pdf")
+
+FIRST_NAMES = ["Ana", "Luis", "María", "Jorge", "Sofía", "Diego", "Laura", "Pablo", "Elena", "Tomás"]
+LAST_NAMES = ["García", "Pérez", "Rojas", "Silva", "Muñoz", "Díaz", "Torres", "Castro", "Vega", "Soto"]
+ROLES = ["Backend Developer", "Data Engineer", "Frontend Developer", "DevOps Engineer",
+         "Data Scientist", "Full Stack Developer", "QA Engineer", "Tech Lead"]
+FILLER = (
+    "desarrollé servicios para clientes en producción y mejoré el rendimiento del equipo "
+    "implemented features owned the roadmap collaborated with product and design teams "
+    "migré sistemas legados automaticé despliegues y reduje costos de infraestructura "
+    "mentored engineers reviewed code wrote documentation and improved test coverage"
+).split()
+
+
+def _skills() -> List[str]:
+    # Skills as a CV would spell them: the first listed alias of each
+    with open(DEFAULT_DICTIONARY_PATH, encoding="utf-8") as f:
+        skills = json.load(f)["skills"]
+    return [aliases[0] if aliases else canonical for canonical, aliases in skills.items()]
+
+
+class Corpus:
+    def __init__(self, seed: int = 42):
+        self.rng = random.Random(seed)
+        self.skills = _skills()
+        self._serial = 0
+
+    def cv_text(self, size: str = "medium") -> str:
+        rng = self.rng
+        self._serial += 1
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        skills = rng.sample(self.skills, rng.randint(6, 20))
+        lines = [
+            name,
+            f"{name.lower().replace(' ', '.')}{self._serial}@example.com",
+            "",
+            "Resumen",
+            f"{rng.choice(ROLES)} con {rng.randint(1, 15)} años de experiencia.",
+            "",
+            "Experiencia",
+        ]
+        words = 0
+        while words < SIZES[size]:
+            role = rng.choice(ROLES)
+            sentence = " ".join(rng.choice(FILLER) for _ in range(rng.randint(12, 30)))
+            used = ", ".join(rng.sample(skills, min(3, len(skills))))
+            lines.append(f"{role} ({rng.randint(2005, 2024)}): {sentence} usando {used}.")
+            words += len(sentence.split()) + 6
+        lines += ["", "Educación", "Ingeniería Civil en Computación", "", "Skills", ", ".join(skills)]
+        return "\n".join(lines)
+
+    def job_description(self) -> str:
+        rng = self.rng
+        skills = rng.sample(self.skills, rng.randint(5, 12))
+        return (
+            f"Buscamos {rng.choice(ROLES)} con experiencia en {', '.join(skills)}. "
+            f"{' '.join(rng.choice(FILLER) for _ in range(60))}."
+        )
+
+    def cv_file(self, size: str = "medium", fmt: str = "txt") -> Dict:
+        text = self.cv_text(size)
+        return {"filename": f"cv_{self._serial}_{size}.{fmt}", "ext": fmt, "text": text, "content": render(text, fmt)}
+
+
+def render(text: str, fmt: str) -> bytes:
+    """The CV text as a file of the given format (txt, docx or pdf)."""
+    if fmt == "txt":
+        return text.encode("utf-8")
+    if fmt == "docx":
+        from docx import Document
+        doc = Document()
+        for line in text.split("\n"):
+            doc.add_paragraph(line)
+        buffer = io.BytesIO()
+        doc.save(buffer)
+        return buffer.getvalue()
+    if fmt == "pdf":
+        from reportlab.lib.pagesizes import A4
+        from reportlab.lib.styles import getSampleStyleSheet
+        from reportlab.platypus import Paragraph, SimpleDocTemplate
+        from xml.sax.saxutils import escape
+        buffer = io.BytesIO()
+        style = getSampleStyleSheet()["BodyText"]
+        SimpleDocTemplate(buffer, pagesize=A4).build(
+            [Paragraph(escape(line) or "&nbsp;", style) for line in text.split("\n")]
+        )
+        return buffer.getvalue()
+    raise ValueError(f"Unknown format: {fmt}")
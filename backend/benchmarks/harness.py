@@ -0,0 +1,88 @@
+"""
+Timing and baseline comparison for the benchmarks.
+"""
+import json
+import math
+import time
+from typing import Any, Callable, Dict, List
+
+# Compared against the baseline: latency may not grow, throughput may not drop
+LATENCY_KEYS = ("p50_ms", "p95_ms", "p99_ms")
+
+
+def percentile(samples: List[float], q: float) -> float:
+    """q-th percentile (0-100) of sorted samples, linearly interpolated."""
+    if not samples:
+        return 0.0
+    rank = (len(samples) - 1) * q / 100
+    low, high = math.floor(rank), math.ceil(rank)
+    return samples[low] + (samples[high] - samples[low]) * (rank - low)
+
+
+def summarize(durations: List[float], wall: float) -> Dict[str, float]:
+    ordered = sorted(durations)
+    return {
+        "n": len(ordered),
+        "throughput_per_s": round(len(ordered) / wall, 2) if wall else 0.0,
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3) if ordered else 0.0,
+        "p50_ms": round(percentile(ordered, 50) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3) if ordered else 0.0,
+    }
+
+
+def measure(fn: Callable[[int], Any], iterations: int, warmup: int = 1) -> Dict[str, float]:
+    """
+    Calls fn(i) for i in range(iterations) after `warmup` untimed calls and
+    returns throughput and latency percentiles. fn gets the iteration index
+    so it can use a distinct input each time (and miss the caches).
+    """
+    for i in range(warmup):
+        fn(-1 - i)
+    durations = []
+    start = time.perf_counter()
+    for i in range(iterations):
+        t0 = time.perf_counter()
+        fn(i)
+        durations.append(time.perf_counter() - t0)
+    return summarize(durations, time.perf_counter() - start)
+
+
+def compare(
+    results: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float, min_delta_ms: float = 0.0
+) -> List[str]:
+    """
+    Regressions of results against a baseline: a latency percentile more than
+    `threshold` (0.2 = 20%) and `min_delta_ms` above, or throughput more than
+    `threshold` below. The absolute floor keeps timer noise on sub-millisecond
+    calls from failing the run. Benchmarks missing from either side are skipped.
+    """
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        for key in LATENCY_KEYS:
+            if base.get(key) and current[key] > max(base[key] * (1 + threshold), base[key] + min_delta_ms):
+                regressions.append(f"{name}: {key} {current[key]:.3f} > {base[key]:.3f} (+{current[key] / base[key] - 1:.0%})")
+        if (
+            base.get("throughput_per_s")
+            and current["throughput_per_s"] < base["throughput_per_s"] * (1 - threshold)
+            and current["mean_ms"] - base.get("mean_ms", 0) > min_delta_ms
+        ):
+            regressions.append(
+                f"{name}: throughput {current['throughput_per_s']:.2f}/s < {base['throughput_per_s']:.2f}/s"
+            )
+    return regressions
+
+
+def load(path: str) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save(path: str, report: Dict[str, Any]) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write("\n")
@@ -0,0 +1,314 @@
+"""
+Benchmarks of the ingest, scoring and read paths.
+
+    cd backend
+    python -m benchmarks.run                              # all suites, print a table
+    python -m benchmarks.run --suites match,list --rows 10000,100000
+    python -m benchmarks.run --output benchmarks/baseline.json
+    python -m benchmarks.run --baseline benchmarks/baseline.json --threshold 0.2
+
+Runs against a throwaway SQLite database (or --database-url) with Redis and
+the Groq key unset, so the numbers measure this code and not shared state;
+the LLM is a local stub with a configurable latency. With --baseline the
+exit status is 1 when any benchmark regressed past the threshold.
+"""
+import os
+import sys
+import time
+import argparse
+import platform
+import tempfile
+import contextlib
+import subprocess
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+
+from benchmarks.harness import compare, load, measure, save
+
+SUITES = ("extract", "analyze", "match", "task", "list")
+INSERT_BATCH = 10000
+
+
+def _configure(args, workdir: str) -> None:
+    # Must run before anything imports app.core.config
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ.pop("ASYNC_DATABASE_URL", None)
+    os.environ["REDIS_URL"] = ""
+    os.environ["GROQ_API_KEY"] = ""
+    os.environ["MATCHING_MODEL_PATH"] = os.path.join(workdir, "matching_model.npz")
+    os.environ["VECTOR_INDEX_PATH"] = os.path.join(workdir, "candidate_vectors.idx")
+    os.environ["REPORT_CACHE_DIR"] = os.path.join(workdir, "reports")
+    os.environ["BLOB_BACKEND"] = "filesystem"
+    os.environ["BLOB_DIR"] = os.path.join(workdir, "blobs")
+
+
+@contextlib.contextmanager
+def stub_llm(latency: float):
+    """Replaces the Groq call with a local extraction that takes `latency` seconds."""
+    from app.services.ai_service import ai_service
+    from app.services.skill_taxonomy import get_skill_taxonomy
+
+    def extract_cv_data(text, api_key=None):
+        time.sleep(latency)
+        lines = text.splitlines()
+        return {
+            "name": lines[0] if lines else None,
+            "skills": get_skill_taxonomy().find(text),
+            "experience_years": 5,
+            "last_role": "Backend Developer",
+            "summary": lines[4] if len(lines) > 4 else None,
+        }
+
+    original, original_key = ai_service.extract_cv_data, ai_service.api_key
+    ai_service.extract_cv_data, ai_service.api_key = extract_cv_data, "benchmark-stub"
+    try:
+        yield
+    finally:
+        ai_service.extract_cv_data, ai_service.api_key = original, original_key
+
+
+def bench_extract(args, corpus, results: Dict) -> None:
+    # What a worker runs per CV: the blob memory-mapped and parsed in place
+    from app.services.blob_store import blob_store
+    from app.tasks.cv_processing import _extract_blob
+
+    for size in args.sizes:
+        for fmt in args.formats:
+            files = [corpus.cv_file(size, fmt) for _ in range(min(args.iterations, 20))]
+            blobs = [(blob_store.put(f["content"]), f["filename"]) for f in files]
+            run = lambda i, blobs=blobs: _extract_blob(*blobs[i % len(blobs)])
+            results[f"extract_blob[{fmt},{size}]"] = measure(run, args.iterations)
+
+
+def bench_analyze(args, corpus, results: Dict) -> None:
+    from app.services.cv_analyzer import analyze_cv_text
+
+    for size in args.sizes:
+        texts = [corpus.cv_text(size) for _ in range(args.iterations)]
+        run = lambda i: analyze_cv_text(texts[i], "cv.txt", "txt")
+        results[f"analyze_cv_text[fallback,{size}]"] = measure(run, args.iterations)
+        with stub_llm(args.llm_latency_ms / 1000):
+            results[f"analyze_cv_text[llm-stub,{size}]"] = measure(run, args.iterations)
+
+
+def bench_match(args, corpus, results: Dict) -> None:
+    from app.services.matching_service import calculate_match_score, corpus_model, get_missing_keywords
+
+    # Corpus statistics as a warmed-up deployment would have them
+    corpus_model.partial_fit(corpus_model.counts(corpus.cv_text("medium") for _ in range(200)))
+    job_description = corpus.job_description()
+    for size in args.sizes:
+        texts = [corpus.cv_text(size) for _ in range(args.iterations)]
+        for matcher in ("tfidf", "embedding"):
+            results[f"calculate_match_score[{matcher},{size}]"] = measure(
+                lambda i: calculate_match_score(texts[i], job_description, matcher=matcher), args.iterations
+            )
+        results[f"get_missing_keywords[{size}]"] = measure(
+            lambda i: get_missing_keywords(texts[i], job_description), args.iterations
+        )
+
+
+def _benchmark_user(db) -> int:
+    from app.models.user import User
+    user = db.query(User).filter(User.username == "benchmark").first()
+    if user is None:
+        user = User(email="benchmark@example.com", username="benchmark", hashed_password="-")
+        db.add(user)
+        db.commit()
+    return user.id
+
+
+def bench_task(args, corpus, results: Dict) -> None:
+    from app.core.database import SessionLocal
+    from app.tasks.cv_processing import process_cv_task
+
+    db = SessionLocal()
+    try:
+        user_id = _benchmark_user(db)
+    finally:
+        db.close()
+    job_description = corpus.job_description()
+    for size in args.sizes:
+        texts = [corpus.cv_text(size) for _ in range(args.iterations + 1)]
+
+        def run(i):
+            result = process_cv_task.apply(kwargs={
+                "cv_text": texts[i], "filename": f"cv_{i}.txt", "ext": "txt",
+                "user_id": user_id, "job_description": job_description,
+            }).get()
+            if result.get("status") != "completed":
+                raise RuntimeError(f"process_cv_task failed: {result.get('error')}")
+        with stub_llm(args.llm_latency_ms / 1000):
+            results[f"process_cv_task[eager,{size}]"] = measure(run, args.iterations)
+
+
+def _fill_candidates(user_id: int, rows: int) -> None:
+    """Inserts synthetic candidates until the user has `rows` of them."""
+    from sqlalchemy import func, insert, select
+    from app.core.database import engine
+    from app.models.candidate import Candidate
+
+    with engine.begin() as conn:
+        existing = conn.execute(select(func.count()).where(Candidate.user_id == user_id)).scalar()
+    start = datetime(2020, 1, 1)
+    for offset in range(existing, rows, INSERT_BATCH):
+        batch = [
+            {
+                "user_id": user_id,
+                "filename": f"cv_{n}.pdf",
+                "format": ("PDF", "DOCX", "TXT")[n % 3],
+                "upload_date": start + timedelta(seconds=n),
+                "keywords": ["Python", "SQL", "Docker"],
+                "structure": "Experiencia, Educación",
+                "recommendations": ["Agrega más habilidades técnicas específicas."],
+                "match_score": float(n % 100),
+                "missing_keywords": [],
+                "ai_status": "disabled",
+            }
+            for n in range(offset, min(offset + INSERT_BATCH, rows))
+        ]
+        with engine.begin() as conn:
+            conn.execute(insert(Candidate), batch)
+
+
+def bench_list(args, corpus, results: Dict) -> None:
+    from fastapi.testclient import TestClient
+    from app.api.v1.endpoints.cvs import _encode_cursor
+    from app.core.database import SessionLocal
+    from app.core.security import create_access_token
+    from app.main import app
+    from app.models.candidate import Candidate
+
+    db = SessionLocal()
+    try:
+        user_id = _benchmark_user(db)
+    finally:
+        db.close()
+    client = TestClient(app)
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': str(user_id)})}"}
+
+    def get(params) -> Callable[[int], None]:
+        def run(i):
+            response = client.get("/cvs", params=params, headers=headers)
+            response.raise_for_status()
+        return run
+
+    for rows in sorted(args.rows):
+        _fill_candidates(user_id, rows)
+        db = SessionLocal()
+        try:
+            middle = (
+                db.query(Candidate).filter(Candidate.user_id == user_id)
+                .order_by(Candidate.upload_date.desc(), Candidate.id.desc())
+                .offset(rows // 2).first()
+            )
+        finally:
+            db.close()
+        label = f"{rows // 1000}k" if rows < 1_000_000 else f"{rows // 1_000_000}M"
+        results[f"GET /cvs[first page,{label}]"] = measure(get({"limit": 100}), args.iterations)
+        results[f"GET /cvs[fields,{label}]"] = measure(get({"limit": 100, "fields": "match_score,format"}), args.iterations)
+        results[f"GET /cvs[min_score,{label}]"] = measure(get({"limit": 100, "min_score": 90}), args.iterations)
+        results[f"GET /cvs[mid cursor,{label}]"] = measure(
+            get({"limit": 100, "cursor": _encode_cursor(middle)}), args.iterations
+        )
+
+
+BENCHMARKS = {
+    "extract": bench_extract,
+    "analyze": bench_analyze,
+    "match": bench_match,
+    "task": bench_task,
+    "list": bench_list,
+}
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def _print_table(results: Dict[str, Dict]) -> None:
+    width = max((len(name) for name in results), default=10)
+    print(f"{'benchmark':<{width}}  {'n':>5}  {'ops/s':>9}  {'p50 ms':>9}  {'p95 ms':>9}  {'p99 ms':>9}")
+    for name, r in results.items():
+        print(
+            f"{name:<{width}}  {r['n']:>5}  {r['throughput_per_s']:>9.2f}  "
+            f"{r['p50_ms']:>9.2f}  {r['p95_ms']:>9.2f}  {r['p99_ms']:>9.2f}"
+        )
+
+
+def _csv(value: str) -> List[str]:
+    return [v.strip() for v in value.split(",") if v.strip()]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--suites", type=_csv, default=list(SUITES), help=f"Comma-separated: {','.join(SUITES)}")
+    parser.add_argument("--iterations", type=int, default=50, help="Timed calls per benchmark")
+    parser.add_argument("--sizes", type=_csv, default=["small", "medium", "large"])
+    parser.add_argument("--formats", type=_csv, default=["txt", "docx", "pdf"])
+    parser.add_argument("--rows", type=lambda v: [int(r) for r in _csv(v)], default=[10000],
+                        help="Candidate counts for GET /cvs, e.g. 10000,100000,1000000")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="Latency of the stubbed LLM call")
+    parser.add_argument("--database-url", help="Database to benchmark against (default: a temporary SQLite file)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Save the results as a JSON baseline")
+    parser.add_argument("--baseline", help="Compare against a saved baseline")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed regression (0.2 = 20%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=0.5, help="Latency changes below this are noise")
+    args = parser.parse_args(argv)
+    unknown = set(args.suites) - set(SUITES)
+    if unknown:
+        parser.error(f"Unknown suites: {', '.join(sorted(unknown))}")
+    return args
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    with tempfile.TemporaryDirectory(prefix="nidus-bench-") as workdir:
+        _configure(args, workdir)
+        import logging
+        logging.disable(logging.WARNING)  # Per-call logging would dominate the fast paths
+
+        from benchmarks.corpus import Corpus
+        from app.core.database import Base, engine
+        import app.models  # noqa: F401  Register models
+        Base.metadata.create_all(bind=engine)
+
+        corpus = Corpus(args.seed)
+        results: Dict[str, Dict] = {}
+        for suite in args.suites:
+            BENCHMARKS[suite](args, corpus, results)
+        engine.dispose()
+
+    report = {
+        "meta": {
+            "date": datetime.utcnow().isoformat(timespec="seconds"),
+            "revision": _git_revision(),
+            "python": platform.python_version(),
+            "machine": f"{platform.system()} {platform.machine()}",
+            "cpus": os.cpu_count(),
+            "iterations": args.iterations,
+            "llm_latency_ms": args.llm_latency_ms,
+        },
+        "results": results,
+    }
+    _print_table(results)
+    if args.output:
+        save(args.output, report)
+    if args.baseline:
+        regressions = compare(results, load(args.baseline)["results"], args.threshold, args.min_delta_ms)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.threshold:.0%} of {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
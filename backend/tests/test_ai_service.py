@@ -0,0 +1,202 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.services.ai_service import AIService, ClientPool
+from app.services.cv_analyzer import analyze_cv_text
+from app.services.resilience import AIDeferredError, CircuitBreaker, TokenBucketLimiter
+
+CV_DATA = {"name": "Jane Doe", "skills": ["Python", "Docker"], "experience_years": 5}
+
+
+class StubGroqHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, so connection reuse is observable
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.requests.append((self.path, self.client_address, self.headers["Authorization"], json.loads(body)))
+        if self.server.failures:
+            status, headers = self.server.failures.pop(0)
+            payload = json.dumps({"error": {"message": "stub failure"}}).encode()
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            return
+        payload = json.dumps({
+            "id": "stub",
+            "object": "chat.completion",
+            "created": 0,
+            "model": "stub",
+            "choices": [{
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": json.dumps(CV_DATA)},
+            }],
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubGroqHandler)
+    server.requests = []
+    server.failures = []  # (status, headers) to answer with before succeeding
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def service(stub_server, monkeypatch):
+    from app.services.resilience import rate_limiter
+    monkeypatch.setattr(rate_limiter, "rate", 0)  # Unthrottled; the bucket is tested on its own
+    return AIService(base_url=f"http://127.0.0.1:{stub_server.server_address[1]}")
+
+def test_extract_reuses_pooled_client_connection(service, stub_server):
+    assert service.extract_cv_data("CV one", api_key="key-a") == CV_DATA
+    assert service.extract_cv_data("CV two", api_key="key-a") == CV_DATA
+    assert service.get_client("key-a") is service.get_client("key-a")
+
+    (path, first_addr, auth, body), (_, second_addr, _, _) = stub_server.requests
+    assert path.endswith("/chat/completions")
+    assert auth == "Bearer key-a"
+    assert "CV one" in body["messages"][0]["content"]
+    assert first_addr == second_addr  # Same TCP connection
+
+def test_extract_many_runs_async(service, stub_server):
+    texts = [f"CV {i}" for i in range(6)]
+    assert service.extract_many(texts, api_key="key-b") == [CV_DATA] * 6
+    assert service.extract_many(["CV again"], api_key="key-b") == [CV_DATA]
+    assert len(stub_server.requests) == 7
+
+def test_extract_many_without_key_skips_llm(service, stub_server):
+    service.api_key = None
+    assert service.extract_many(["CV"]) == [None]
+    assert stub_server.requests == []
+
+def test_client_pool_evicts_least_recently_used():
+    closed = []
+    pool = ClientPool(lambda key: object(), max_size=2, on_evict=closed.append)
+    a = pool.get("a")
+    pool.get("b")
+    assert pool.get("a") is a
+    pool.get("c")
+    assert len(pool) == 2
+    assert len(closed) == 1
+    assert pool.get("a") is a
+
+def test_rate_limited_request_honours_retry_after(service, stub_server):
+    stub_server.failures = [(429, {"Retry-After": "0"}), (503, {"Retry-After": "0"})]
+    assert service.extract_cv_data("CV", api_key="key-c") == CV_DATA
+    assert len(stub_server.requests) == 3
+
+def test_open_breaker_defers_ai(service, stub_server, monkeypatch):
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "GROQ_MAX_RETRIES", 0)
+    stub_server.failures = [(429, {"Retry-After": "0"})] * settings.GROQ_BREAKER_FAILURE_THRESHOLD
+    for _ in range(settings.GROQ_BREAKER_FAILURE_THRESHOLD):
+        with pytest.raises(AIDeferredError):
+            service.extract_cv_data("CV", api_key="key-d")
+    assert service.breaker("key-d").state == CircuitBreaker.OPEN
+
+    # Fails fast without touching the provider
+    requests_before = len(stub_server.requests)
+    assert service.extract_many(["CV"], api_key="key-d")[0].__class__ is AIDeferredError
+    assert len(stub_server.requests) == requests_before
+
+def test_deferred_analysis_is_flagged(monkeypatch):
+    from app.services import cv_analyzer
+
+    def deferred(text, api_key=None):
+        raise AIDeferredError("rate limited")
+    monkeypatch.setattr(cv_analyzer.ai_service, "extract_cv_data", deferred)
+    result = analyze_cv_text("Python developer", "cv.txt", "txt", api_key="key-e")
+    assert result["ai_status"] == "deferred"
+    assert result["ai_extracted"] is None
+    assert result["keywords"] == ["Python"]
+
+def test_circuit_breaker_half_open_trial():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.allow()  # Reset timeout elapsed: one trial
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+def test_half_open_trial_with_non_transient_error_closes_breaker(service, stub_server, monkeypatch):
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "GROQ_MAX_RETRIES", 0)
+    breaker = service.breaker("key-e")
+    breaker.reset_timeout = 0
+    for _ in range(settings.GROQ_BREAKER_FAILURE_THRESHOLD):
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    stub_server.failures = [(400, {})]
+    assert service.extract_cv_data("CV", api_key="key-e") is None  # Bad request: regex fallback
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert service.extract_cv_data("CV", api_key="key-e") == CV_DATA
+
+def test_half_open_trial_is_released_on_client_error(service):
+    breaker = service.breaker("key-f")
+    breaker.reset_timeout = 0
+    breaker.state = CircuitBreaker.OPEN
+
+    def broken():
+        raise ValueError("client-side bug")
+
+    with pytest.raises(ValueError):
+        service._call("key-f", broken)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.allow()  # The next call gets the trial
+
+def test_half_open_trial_is_released_when_rate_limited(service, monkeypatch):
+    import asyncio
+    from app.services.resilience import rate_limiter
+    breaker = service.breaker("key-g")
+    breaker.reset_timeout = 0
+    breaker.state = CircuitBreaker.OPEN
+    monkeypatch.setattr(rate_limiter, "acquire", lambda key: False)
+
+    async def no_token(key):
+        return False
+    monkeypatch.setattr(rate_limiter, "acquire_async", no_token)
+
+    with pytest.raises(AIDeferredError, match="rate limit"):
+        service._call("key-g", lambda: None)
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(AIDeferredError, match="rate limit"):
+        asyncio.run(service._call_async("key-g", lambda: None))
+    assert breaker.state == CircuitBreaker.OPEN
+
+    async def cancelled(key):
+        raise asyncio.CancelledError()
+    monkeypatch.setattr(rate_limiter, "acquire_async", cancelled)
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(service._call_async("key-g", lambda: None))
+    assert breaker.allow()  # Still free for the next trial
+
+def test_local_token_bucket():
+    limiter = TokenBucketLimiter(None, per_minute=60, burst=2, max_wait=0)
+    assert limiter.reserve("key") == 0
+    assert limiter.reserve("key") == 0
+    assert 0 < limiter.reserve("key") <= 1
+    assert not limiter.acquire("key")
+    assert limiter.reserve("other-key") == 0
@@ -0,0 +1,36 @@
+import time
+
+from app.services.analysis_cache import AnalysisCache, text_digest
+
+
+def test_text_digest_ignores_whitespace():
+    assert text_digest("Jane Doe\n\nPython  developer ") == text_digest("Jane Doe Python developer")
+    assert text_digest("Jane Doe") != text_digest("John Doe")
+
+def test_local_cache_returns_copies():
+    cache = AnalysisCache(None, ttl=60, max_entries=10)
+    cache.set("abc", "basic", {"recommendations": ["a"]})
+    hit = cache.get("abc", "basic")
+    hit["recommendations"].append("b")
+    assert cache.get("abc", "basic") == {"recommendations": ["a"]}
+    assert cache.get("abc", "ai") is None
+
+def test_local_cache_evicts_least_recently_used():
+    cache = AnalysisCache(None, ttl=60, max_entries=2)
+    cache.set("a", "basic", {"n": 1})
+    cache.set("b", "basic", {"n": 2})
+    cache.get("a", "basic")
+    cache.set("c", "basic", {"n": 3})
+    assert cache.get("b", "basic") is None
+    assert cache.get("a", "basic") == {"n": 1}
+
+def test_local_cache_expires_entries():
+    cache = AnalysisCache(None, ttl=0, max_entries=10)
+    cache.set("a", "basic", {"n": 1})
+    time.sleep(0.01)
+    assert cache.get("a", "basic") is None
+
+def test_unreachable_redis_falls_back_to_local():
+    cache = AnalysisCache("redis://127.0.0.1:1/0", ttl=60, max_entries=10)
+    cache.set("a", "basic", {"n": 1})
+    assert cache.get("a", "basic") == {"n": 1}
@@ -1,23 +1,28 @@
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool
+import os
+import tempfile
 import time
 
 from app.main import app
-from app.core.database import Base, get_db
+from app.core.database import Base, get_db, get_async_db
 from app.core.config import settings
 
-# Setup in-memory SQLite for testing
-SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+# Setup a temporary SQLite file for testing, shared by the sync and async engines
+TEST_DB_PATH = os.path.join(tempfile.mkdtemp(), "test.db")
 
 engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
+    f"sqlite:///{TEST_DB_PATH}",
     connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# No pooling: each test request runs on its own event loop
+async_engine = create_async_engine(f"sqlite+aiosqlite:///{TEST_DB_PATH}", poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
 # Override get_db dependency
 def override_get_db():
@@ -27,7 +32,12 @@ def override_get_db():
     finally:
         db.close()
 
+async def override_get_async_db():
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_async_db] = override_get_async_db
 
 client = TestClient(app)
 
@@ -66,6 +76,58 @@ def test_get_me(auth_header):
     data = response.json()
     assert data["email"] == "test@example.com"
 
+def test_get_me_rejects_malformed_subject(auth_header):
+    from app.core.security import create_access_token
+    token = create_access_token({"sub": "not-an-id"})
+    response = client.get("/auth/me", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 401
+
+def test_principal_is_cached_between_requests(auth_header):
+    from app.services.principal_cache import principal_cache
+    principal_cache.clear()
+    client.get("/auth/me", headers=auth_header)
+    client.get("/cvs", headers=auth_header)
+    stats = principal_cache.stats()
+    assert stats["misses"] == 1 and stats["hits"] == 1
+    # Only admins can read the counters
+    assert client.get("/auth/principal-cache", headers=auth_header).status_code == 403
+
+def test_register_login_and_refresh(setup_db):
+    response = client.post("/auth/register", json={
+        "email": "new@example.com", "username": "newuser", "password": "secret123"
+    })
+    assert response.status_code == 201
+    assert client.post("/auth/register", json={
+        "email": "new@example.com", "username": "other", "password": "secret123"
+    }).status_code == 400
+
+    assert client.post("/auth/login", json={"username": "newuser", "password": "wrong"}).status_code == 401
+    response = client.post("/auth/login", json={"username": "new@example.com", "password": "secret123"})
+    assert response.status_code == 200
+    tokens = response.json()
+    me = client.get("/auth/me", headers={"Authorization": f"Bearer {tokens['access_token']}"})
+    assert me.json()["username"] == "newuser"
+    assert client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]}).status_code == 200
+
+def test_login_rehashes_outdated_bcrypt_cost(setup_db):
+    from app.core.security import pwd_context
+    from app.models.user import User
+    db = TestingSessionLocal()
+    db.add(User(
+        email="old@example.com",
+        username="olduser",
+        hashed_password=pwd_context.using(bcrypt__rounds=4).hash("secret123")
+    ))
+    db.commit()
+    db.close()
+
+    assert client.post("/auth/login", json={"username": "olduser", "password": "secret123"}).status_code == 200
+    db = TestingSessionLocal()
+    stored = db.query(User).filter(User.username == "olduser").first().hashed_password
+    db.close()
+    assert stored.startswith(f"$2b${settings.BCRYPT_ROUNDS:02d}$")
+    assert client.post("/auth/login", json={"username": "olduser", "password": "secret123"}).status_code == 200
+
 def test_list_cvs_empty(auth_header):
     response = client.get("/cvs", headers=auth_header)
     if response.status_code != 200:
@@ -95,3 +157,289 @@ def test_upload_cv_txt_async(auth_header):
     assert response.status_code == 200
     assert response.json()["task_id"] == task_id
 
+
+def test_score_job_ranks_stored_candidates(auth_header):
+    from app.models.candidate import Candidate
+    from app.models.user import User
+    from app.services.matching_service import corpus_model, encode_term_vector
+    db = TestingSessionLocal()
+    user = db.query(User).filter(User.username == "testuser").first()
+    texts = {
+        "backend.txt": "Python FastAPI developer with Docker and AWS",
+        "frontend.txt": "React and CSS designer",
+    }
+    for filename, text in texts.items():
+        db.add(Candidate(
+            user_id=user.id,
+            filename=filename,
+            format="TXT",
+            term_vector=encode_term_vector(corpus_model.counts([text]))
+        ))
+    db.commit()
+    db.close()
+
+    response = client.post(
+        "/jobs/score",
+        json={"job_description": "Python developer with Docker and Kubernetes", "top_k": 1},
+        headers=auth_header
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["scored"] == 2
+    assert [r["filename"] for r in data["results"]] == ["backend.txt"]
+    assert data["results"][0]["missing_keywords"][0] == "Kubernetes"
+
+def test_score_job_by_embedding(auth_header, tmp_path, monkeypatch):
+    from app.models.candidate import Candidate
+    from app.models.user import User
+    from app.services.matching_service import embedding_matcher
+    from app.services.vector_index import vector_index
+    monkeypatch.setattr(vector_index, "path", str(tmp_path / "vectors.idx"))
+    db = TestingSessionLocal()
+    user = db.query(User).filter(User.username == "testuser").first()
+    texts = {
+        "desarrollador.txt": "Desarrollador backend con experiencia en Python y bases de datos",
+        "disenadora.txt": "Diseñadora gráfica especializada en ilustración editorial",
+    }
+    candidates = [Candidate(user_id=user.id, filename=filename, format="TXT", keywords=[]) for filename in texts]
+    db.add_all(candidates)
+    db.commit()
+    vector_index.add([c.id for c in candidates], [user.id] * 2, embedding_matcher.embed(list(texts.values())))
+    db.close()
+
+    response = client.post(
+        "/jobs/score",
+        json={"job_description": "Buscamos desarrolladores backend con Python y Kubernetes", "top_k": 1, "matcher": "embedding"},
+        headers=auth_header
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["scored"] == 2
+    assert [r["filename"] for r in data["results"]] == ["desarrollador.txt"]
+    assert "Kubernetes" in data["results"][0]["missing_keywords"]
+
+def test_export_pdf_is_cached_with_etag(auth_header, tmp_path, monkeypatch):
+    from app.models.candidate import Candidate
+    from app.models.user import User
+    from app.services import report_cache as report_cache_module
+    monkeypatch.setattr(report_cache_module.report_cache, "directory", str(tmp_path))
+    db = TestingSessionLocal()
+    user = db.query(User).filter(User.username == "testuser").first()
+    candidate = Candidate(
+        user_id=user.id, filename="report.txt", format="TXT", keywords=["Python"],
+        structure="Secciones detectadas: (Ninguna)", recommendations=["Agrega más keywords relevantes."] * 60,
+        match_score=40.0, missing_keywords=["Kubernetes"]
+    )
+    db.add(candidate)
+    db.commit()
+    candidate_id = candidate.id
+    db.close()
+
+    from app.api.v1.endpoints import cvs
+    from app.services.pdf_generator import generate_pdf_report
+    calls = []
+    def counting_generate(analysis):
+        calls.append(analysis["filename"])
+        return generate_pdf_report(analysis)
+    monkeypatch.setattr(cvs, "generate_pdf_report", counting_generate)
+
+    response = client.get(f"/export-pdf/{candidate_id}", headers=auth_header)
+    assert response.status_code == 200
+    assert response.content.startswith(b"%PDF")
+    etag = response.headers["etag"]
+
+    again = client.get(f"/export-pdf/{candidate_id}", headers=auth_header)
+    assert again.status_code == 200 and again.content == response.content
+    assert calls == ["report.txt"]  # Second download served from the cache
+
+    not_modified = client.get(f"/export-pdf/{candidate_id}", headers={**auth_header, "If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.headers["etag"] == etag
+
+def test_search_cvs_by_skills(auth_header):
+    from app.models.user import User
+    from app.repositories.candidate import candidate_repo
+    db = TestingSessionLocal()
+    user = db.query(User).filter(User.username == "testuser").first()
+    candidate_repo.create(db, obj_in={"user_id": user.id, "filename": "devops.pdf", "keywords": ["Docker", "AWS"]})
+    candidate_repo.create(db, obj_in={
+        "user_id": user.id, "filename": "web.pdf", "keywords": ["Docker"], "ai_data": {"skills": ["React "]}
+    })
+    db.close()
+
+    response = client.get("/cvs/search?skills=docker,aws", headers=auth_header)
+    assert response.status_code == 200
+    assert [c["filename"] for c in response.json()] == ["devops.pdf"]
+
+    response = client.get("/cvs/search?skills=aws&skills=react&match=any", headers=auth_header)
+    assert response.status_code == 200
+    assert sorted(c["filename"] for c in response.json()) == ["devops.pdf", "web.pdf"]
+
+    response = client.get("/cvs/search?skills=docker&match=any&limit=1&skip=1", headers=auth_header)
+    assert [c["filename"] for c in response.json()] == ["devops.pdf"]
+
+def test_list_cvs_keyset_pages_and_projection(auth_header):
+    from datetime import datetime, timedelta
+    from app.models.candidate import Candidate
+    from app.models.user import User
+    db = TestingSessionLocal()
+    user = db.query(User).filter(User.username == "testuser").first()
+    start = datetime(2020, 1, 1)
+    for i in range(5):
+        db.add(Candidate(
+            user_id=user.id,
+            filename=f"page_{i}.pdf",
+            format="PDF" if i % 2 else "DOCX",
+            match_score=i * 20.0,
+            upload_date=start + timedelta(days=i // 2)  # Ties exercise the id tie-break
+        ))
+    db.commit()
+    db.close()
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2, "fields": "match_score,format", "min_score": 0}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/cvs", params=params, headers=auth_header)
+        assert response.status_code == 200
+        for item in response.json():
+            assert set(item["analysis"]) == {"match_score", "format"}
+            seen.append(item["filename"])
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    paged = [name for name in seen if name.startswith("page_")]
+    assert paged == [f"page_{i}.pdf" for i in reversed(range(5))]
+    assert len(seen) == len(set(seen))
+
+    response = client.get("/cvs", params={"min_score": 50, "format": "pdf"}, headers=auth_header)
+    assert [c["filename"] for c in response.json()] == ["page_3.pdf"]
+
+    response = client.get("/cvs", params={"fields": "cv_text"}, headers=auth_header)
+    assert response.status_code == 400
+
+def test_list_cvs_pages_rows_without_upload_date(auth_header):
+    from datetime import datetime
+    from app.core.config import settings
+    from app.models.candidate import Candidate
+    from app.models.user import User
+    db = TestingSessionLocal()
+    user = db.query(User).filter(User.username == "testuser").first()
+    rows = [Candidate(user_id=user.id, filename=f"undated_{i}.txt", format="TXT") for i in range(3)]
+    rows.append(Candidate(user_id=user.id, filename="dated.txt", format="TXT", upload_date=datetime(2021, 1, 1)))
+    db.add_all(rows)
+    db.commit()
+    db.query(Candidate).filter(Candidate.filename.like("undated_%")).update({"upload_date": None}, synchronize_session=False)
+    db.commit()
+    db.close()
+
+    seen = []
+    params = {"limit": 1, "format": "txt"}
+    while True:
+        response = client.get("/cvs", params=params, headers={**auth_header, "Origin": settings.CORS_ORIGINS[0]})
+        assert response.status_code == 200
+        seen += [item["filename"] for item in response.json()]
+        if "X-Next-Cursor" not in response.headers:
+            break
+        assert "x-next-cursor" in response.headers["access-control-expose-headers"].lower()
+        params["cursor"] = response.headers["X-Next-Cursor"]
+    mine = [name for name in seen if name.startswith(("undated_", "dated"))]
+    assert mine == ["undated_2.txt", "undated_1.txt", "undated_0.txt", "dated.txt"]
+
+def test_upload_cv_rejects_oversized_file(auth_header):
+    files = {"file": ("big.txt", b"x" * (2 * 1024 * 1024 + 1), "text/plain")}
+    response = client.post("/upload-cv", files=files, headers=auth_header)
+    assert response.status_code == 400
+
+def test_upload_cv_batch_reports_rejected_files(auth_header):
+    import io
+    import zipfile
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("cvs/huge.txt", b"x" * (2 * 1024 * 1024 + 1))
+        zf.writestr("cvs/image.png", b"png")
+    files = [
+        ("files", ("big.pdf", b"x" * (2 * 1024 * 1024 + 1), "application/pdf")),
+        ("files", ("notes.exe", b"MZ", "application/octet-stream")),
+        ("files", ("cvs.zip", archive.getvalue(), "application/zip")),
+    ]
+    response = client.post("/upload-cv/batch", files=files, headers=auth_header)
+    assert response.status_code == 400
+    rejected = {r["filename"] for r in response.json()["rejected"]}
+    assert rejected == {"big.pdf", "notes.exe", "huge.txt", "image.png"}
+
+def test_export_streams_csv_and_ndjson(auth_header, monkeypatch):
+    import csv
+    import io
+    import json
+    from app.api.v1.endpoints import export
+    monkeypatch.setattr(export, "SessionLocal", TestingSessionLocal)
+    db = TestingSessionLocal()
+    from app.models.candidate import Candidate
+    from app.models.user import User
+    user = db.query(User).filter(User.username == "testuser").first()
+    exported = Candidate(user_id=user.id, filename="export.pdf", format="PDF", keywords=["Python", "SQL"], match_score=99.0)
+    db.add(exported)
+    db.commit()
+    exported_id = exported.id
+    db.close()
+
+    response = client.post("/export", json={"format": "csv", "filter": {"min_score": 95}}, headers=auth_header)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["id"] for row in rows] == [str(exported_id)]
+    assert rows[0]["keywords"] == "Python; SQL"
+
+    response = client.post("/export", json={"format": "ndjson", "ids": [exported_id]}, headers=auth_header)
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert len(lines) == 1 and lines[0]["filename"] == "export.pdf"
+    assert "term_vector" not in lines[0]
+
+def test_download_export_reports_failed_exports(auth_header, monkeypatch):
+    from types import SimpleNamespace
+    from app.api.v1.endpoints import export
+
+    results = {
+        "unknown-task": SimpleNamespace(state="PENDING", result=None, ready=lambda: False),
+        "failed-task": SimpleNamespace(state="SUCCESS", result={"status": "failed", "error": "disk full"}, ready=lambda: True),
+        "crashed-task": SimpleNamespace(state="FAILURE", result=MemoryError("oom"), ready=lambda: True),
+    }
+    monkeypatch.setattr(export, "AsyncResult", lambda task_id, app: results[task_id])
+    from app.models.user import User
+    from app.services.task_access import task_access
+    db = TestingSessionLocal()
+    user_id = db.query(User).filter(User.username == "testuser").first().id
+    db.close()
+    task_access.register(["unknown-task", "failed-task"], user_id)
+    task_access.register(["crashed-task"], user_id + 1)
+
+    assert client.get("/export/unknown-task", headers=auth_header).status_code == 404
+    response = client.get("/export/failed-task", headers=auth_header)
+    assert response.status_code == 500
+    assert response.json()["detail"] == "Export failed: disk full"
+    assert client.get("/export/crashed-task", headers=auth_header).status_code == 404  # Someone else's
+
+def test_upload_cv_batch_enforces_limits_while_reading(auth_header, monkeypatch, tmp_path):
+    import io
+    import zipfile
+    from app.api.v1.endpoints import upload
+    from app.services.blob_store import blob_store
+    monkeypatch.setattr(blob_store, "directory", str(tmp_path))
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zf:
+        for i in range(3):
+            zf.writestr(f"cv{i}.txt", f"Python developer {i}".encode())
+    files = [("files", ("cvs.zip", archive.getvalue(), "application/zip"))]
+
+    monkeypatch.setattr(upload, "MAX_BATCH_FILES", 2)
+    response = client.post("/upload-cv/batch", files=files, headers=auth_header)
+    assert response.status_code == 400 and "Demasiados" in response.json()["error"]
+    assert len([p for p in tmp_path.rglob("*") if p.is_file()]) == 2  # Stopped at the third member
+
+    monkeypatch.setattr(upload, "MAX_BATCH_FILES", 10)
+    monkeypatch.setattr(upload, "MAX_BATCH_BYTES", 30)
+    response = client.post("/upload-cv/batch", files=files, headers=auth_header)
+    assert response.status_code == 400 and "Lote" in response.json()["error"]
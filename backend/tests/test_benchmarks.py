@@ -0,0 +1,40 @@
+import pytest
+
+from app.services.text_extraction import extract_document
+from benchmarks.corpus import Corpus, render
+from benchmarks.harness import compare, measure, percentile
+
+
+def test_percentile_interpolates():
+    samples = [1.0, 2.0, 3.0, 4.0, 5.0]
+    assert percentile(samples, 50) == 3.0
+    assert percentile(samples, 95) == pytest.approx(4.8)
+    assert percentile([], 99) == 0.0
+
+
+def test_measure_reports_latency_and_throughput():
+    calls = []
+    stats = measure(calls.append, iterations=20, warmup=2)
+    assert calls[:2] == [-1, -2] and calls[2:] == list(range(20))
+    assert stats["n"] == 20
+    assert stats["p50_ms"] <= stats["p95_ms"] <= stats["p99_ms"] <= stats["max_ms"]
+
+
+def test_compare_flags_regressions_beyond_threshold():
+    base = {"a": {"mean_ms": 10, "p50_ms": 10, "p95_ms": 20, "p99_ms": 30, "throughput_per_s": 100}}
+    within = {"a": {"mean_ms": 11, "p50_ms": 11, "p95_ms": 23, "p99_ms": 35, "throughput_per_s": 85}}
+    slower = {"a": {"mean_ms": 16, "p50_ms": 10, "p95_ms": 30, "p99_ms": 30, "throughput_per_s": 60}, "new": {}}
+    assert compare(within, base, threshold=0.2) == []
+    regressions = compare(slower, base, threshold=0.2)
+    assert len(regressions) == 2
+    assert regressions[0].startswith("a: p95_ms")
+    assert compare(slower, base, threshold=0.2, min_delta_ms=50) == []
+
+
+@pytest.mark.parametrize("fmt", ["txt", "docx", "pdf"])
+def test_corpus_files_extract_back_to_their_text(fmt):
+    corpus = Corpus(seed=1)
+    text = corpus.cv_text("small")
+    assert Corpus(seed=1).cv_text("small") == text
+    extracted = extract_document(render(text, fmt), f"cv.{fmt}").text
+    assert text.splitlines()[-1].split(", ")[0] in extracted
@@ -0,0 +1,97 @@
+import io
+import os
+from types import SimpleNamespace
+
+import pytest
+from fastapi.responses import FileResponse, StreamingResponse
+
+from app.api.v1.endpoints import cvs
+from app.services.blob_store import FilesystemBlobStore, S3BlobStore, blob_key
+
+
+def test_filesystem_store_is_content_addressed(tmp_path):
+    store = FilesystemBlobStore(str(tmp_path))
+    key = store.put(b"%PDF-1.4 original")
+    assert key == blob_key(b"%PDF-1.4 original")
+    assert store.path(key) == os.path.join(str(tmp_path), key[:2], key[2:4], key)
+    assert store.put(b"%PDF-1.4 original") == key
+    with store.open(key) as content:
+        assert content[:8] == b"%PDF-1.4"
+    assert b"".join(store.iter_chunks(key)) == b"%PDF-1.4 original"
+    with store.open(store.put(b"")) as content:
+        assert content == b""
+    assert store.put_file(io.BytesIO(b"%PDF-1.4 original")) == key
+    assert store.put_file(io.BytesIO(b"Streamed CV")) == blob_key(b"Streamed CV")
+    assert b"".join(store.iter_chunks(blob_key(b"Streamed CV"))) == b"Streamed CV"
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+    store.delete(key)
+    assert not store.exists(key) and store.local_path(key) is None
+    with pytest.raises(ValueError):
+        store.path("../" + key[3:])
+
+
+class FakeS3:
+    """Minimal in-memory stand-in for the boto3 S3 client."""
+
+    def __init__(self):
+        self.objects = {}
+
+    def head_object(self, Bucket, Key):
+        if (Bucket, Key) not in self.objects:
+            error = Exception("Not Found")
+            error.response = {"Error": {"Code": "404"}}
+            raise error
+
+    def put_object(self, Bucket, Key, Body):
+        self.objects[(Bucket, Key)] = Body
+
+    def upload_fileobj(self, fileobj, Bucket, Key):
+        self.objects[(Bucket, Key)] = fileobj.read()
+
+    def get_object(self, Bucket, Key):
+        body = self.objects[(Bucket, Key)]
+        return {"Body": SimpleNamespace(read=lambda: body, iter_chunks=lambda size: iter([body]), close=lambda: None)}
+
+    def delete_object(self, Bucket, Key):
+        self.objects.pop((Bucket, Key), None)
+
+
+def test_s3_store_uses_sharded_keys():
+    store = S3BlobStore("cvs-bucket", prefix="cvs/")
+    store._client = FakeS3()
+    key = store.put(b"Word CV")
+    assert list(store._client.objects) == [("cvs-bucket", f"cvs/{key[:2]}/{key[2:4]}/{key}")]
+    assert store.exists(key) and store.local_path(key) is None
+    with store.open(key) as content:
+        assert content == b"Word CV"
+    assert store.put_file(io.BytesIO(b"PDF CV")) == blob_key(b"PDF CV")
+    with store.open(blob_key(b"PDF CV")) as content:
+        assert content == b"PDF CV"
+    store.delete(key)
+    assert not store.exists(key)
+
+
+def test_download_serves_original_file(tmp_path, monkeypatch):
+    store = FilesystemBlobStore(str(tmp_path))
+    monkeypatch.setattr(cvs, "blob_store", store)
+    key = store.put(b"Plain text CV")
+    candidate = SimpleNamespace(blob_key=key, format="TXT", filename="José CV.txt")
+    monkeypatch.setattr(cvs.candidate_repo, "get_by_id_and_user", lambda db, id, user_id: candidate)
+    user = SimpleNamespace(id=1)
+
+    response = cvs.download_cv_file(1, current_user=user, db=None)
+    assert isinstance(response, FileResponse) and response.path == store.path(key)
+    assert response.headers["etag"] == f'"{key}"'
+    assert "Jos%C3%A9%20CV.txt" in response.headers["content-disposition"]
+
+    s3 = S3BlobStore("bucket")
+    s3._client = FakeS3()
+    s3.put(b"Plain text CV")
+    monkeypatch.setattr(cvs, "blob_store", s3)
+    assert isinstance(cvs.download_cv_file(1, current_user=user, db=None), StreamingResponse)
+
+    candidate.blob_key = None
+    with pytest.raises(Exception) as error:
+        cvs.download_cv_file(1, current_user=user, db=None)
+    assert error.value.status_code == 404
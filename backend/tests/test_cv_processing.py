@@ -0,0 +1,164 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.database import Base
+from app.models.candidate import Candidate
+from app.models.candidate_skill import CandidateSkill
+from app.models.user import User
+from app.services.analysis_cache import analysis_cache
+from app.services.matching_service import corpus_model
+from app.services.vector_index import vector_index
+from app.tasks import cv_processing
+
+engine = create_engine(
+    "sqlite:///:memory:",
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@pytest.fixture
+def user_id(monkeypatch, tmp_path):
+    Base.metadata.create_all(bind=engine)
+    monkeypatch.setattr(cv_processing, "SessionLocal", TestingSessionLocal)
+    monkeypatch.setattr(corpus_model, "path", None)
+    monkeypatch.setattr(vector_index, "path", str(tmp_path / "vectors.idx"))
+    analysis_cache.clear()
+    db = TestingSessionLocal()
+    user = User(email="batch@example.com", username="batch", hashed_password="x")
+    db.add(user)
+    db.commit()
+    yield user.id
+    db.close()
+    Base.metadata.drop_all(bind=engine)
+
+def test_process_cv_task_stores_candidate(user_id):
+    result = cv_processing.process_cv_task.apply(kwargs={
+        "cv_text": "Python and Docker developer. Experience: 5 years.",
+        "filename": "single.txt",
+        "ext": "txt",
+        "user_id": user_id,
+        "job_description": "Python developer with Kubernetes",
+    }).get()
+    assert result["status"] == "completed"
+    assert result["match_score"] > 0
+    assert "Kubernetes" in result["missing_keywords"]
+
+    db = TestingSessionLocal()
+    candidate = db.get(Candidate, result["id"])
+    assert candidate.term_vector
+    assert candidate.content_hash
+    assert {s.skill for s in candidate.skills} == {"python", "docker"}
+    db.close()
+
+def test_process_cv_batch_task_reports_each_item(user_id):
+    items = [
+        {"cv_text": "Python and AWS engineer", "filename": "a.txt", "ext": "txt"},
+        {"cv_text": "React and CSS developer", "filename": "b.txt", "ext": "txt"},
+        {"filename": "broken.txt", "ext": "txt"},
+    ]
+    result = cv_processing.process_cv_batch_task.apply(kwargs={
+        "items": items,
+        "user_id": user_id,
+        "job_description": "Python engineer who knows AWS",
+    }).get()
+    assert result["completed"] == 2
+    assert result["failed"] == 1
+    assert [item["status"] for item in result["items"]] == ["completed", "completed", "failed"]
+
+    db = TestingSessionLocal()
+    ids = [item["id"] for item in result["items"][:2]]
+    assert db.query(Candidate).filter(Candidate.id.in_(ids)).count() == 2
+    assert db.query(CandidateSkill).filter(CandidateSkill.candidate_id.in_(ids)).count() == 4
+    db.close()
+
+    # Both stored CVs were embedded into the vector index at ingest
+    from app.services.matching_service import embedding_matcher
+    hits, scored = vector_index.search(embedding_matcher.embed(["Python engineer who knows AWS"])[0], user_id)
+    assert scored == 2
+    assert [cid for cid, _ in hits] == ids
+
+def test_process_cv_task_reads_blob_and_reprocesses(user_id, monkeypatch, tmp_path):
+    from app.services.blob_store import blob_store
+    from app.tasks import reprocess
+    monkeypatch.setattr(blob_store, "directory", str(tmp_path / "blobs"))
+    blob = blob_store.put(b"Python and SQL analyst")
+    result = cv_processing.process_cv_task.apply(kwargs={
+        "blob": blob, "filename": "blob.txt", "ext": "txt", "user_id": user_id,
+    }).get()
+    assert result["status"] == "completed"
+
+    db = TestingSessionLocal()
+    candidate = db.get(Candidate, result["id"])
+    assert (candidate.blob_key, candidate.extraction_engine) == (blob, "txt")
+    candidate.keywords, candidate.ai_status = [], "deferred"
+    db.commit()
+
+    assert reprocess.reprocess(db, ai_status="deferred") == {"reprocessed": 1, "failed": 0}
+    db.refresh(candidate)
+    assert candidate.ai_status != "deferred"
+    assert {s.skill for s in candidate.skills} == {"python", "sql"}
+    assert reprocess.reprocess(db, ai_status="deferred") == {"reprocessed": 0, "failed": 0}
+    db.close()
+
+def test_reprocess_keeps_corpus_consistent_with_stored_vectors(user_id, monkeypatch, tmp_path):
+    from app.services.blob_store import blob_store
+    from app.services.matching_service import CorpusModel
+    from app.tasks import reprocess
+    monkeypatch.setattr(blob_store, "directory", str(tmp_path / "blobs"))
+    db = TestingSessionLocal()
+    # Vectors from an older analysis of the same files, and one CV stored without any
+    for text, stale in (("Python and SQL analyst", "Java developer"), ("Go and Rust engineer", None)):
+        db.add(Candidate(
+            user_id=user_id, filename="cv.txt", format="txt", blob_key=blob_store.put(text.encode()),
+            term_vector=cv_processing.encode_term_vector(corpus_model.counts([stale])) if stale else None,
+        ))
+    db.commit()
+
+    model = CorpusModel()
+    model.fit_candidates(db)
+    monkeypatch.setattr(reprocess, "corpus_model", model)
+    assert reprocess.reprocess(db) == {"reprocessed": 2, "failed": 0}
+
+    refit = CorpusModel()
+    refit.fit_candidates(db)
+    assert model.n_docs == refit.n_docs == 2
+    assert (model.doc_freq == refit.doc_freq).all()
+    db.close()
+
+def test_failed_write_does_not_count_towards_corpus(user_id, monkeypatch):
+    from app.repositories.candidate import candidate_repo
+    n_docs = corpus_model.n_docs
+
+    def broken(db, obj_in):
+        raise RuntimeError("database unavailable")
+
+    monkeypatch.setattr(candidate_repo, "create", broken)
+    result = cv_processing.process_cv_task.apply(kwargs={
+        "cv_text": "Go developer", "filename": "lost.txt", "ext": "txt", "user_id": user_id,
+    }).get()
+    assert result["status"] == "failed"
+    assert corpus_model.n_docs == n_docs
+
+def test_concurrent_initial_fits_count_the_corpus_once(user_id, tmp_path):
+    from app.services.matching_service import CorpusModel
+    db = TestingSessionLocal()
+    for text in ("Python developer", "Java developer", "Python and SQL"):
+        db.add(Candidate(user_id=user_id, filename="cv.txt", term_vector=cv_processing.encode_term_vector(corpus_model.counts([text]))))
+    db.commit()
+    db.close()
+
+    path = str(tmp_path / "model.npz")
+    first, second = CorpusModel(path), CorpusModel(path)
+    sessions = []
+    factory = lambda: sessions.append(1) or TestingSessionLocal()
+    first.load_or_fit(factory)
+    # The second child passed the existence check before the first one wrote the file
+    second._fit_or_load(factory)
+    assert len(sessions) == 1
+    assert first.n_docs == second.n_docs == CorpusModel(path)._read()[1] == 3
+    second.save()  # Nothing of the fit is merged a second time
+    assert CorpusModel(path)._read()[1] == 3
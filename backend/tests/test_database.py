@@ -0,0 +1,8 @@
+from app.core.database import async_database_url
+
+
+def test_async_database_url_picks_async_drivers():
+    assert async_database_url("postgresql://u:p@db:5432/nidus") == "postgresql+asyncpg://u:p@db:5432/nidus"
+    assert async_database_url("postgresql+psycopg2://u:p@db/nidus") == "postgresql+asyncpg://u:p@db/nidus"
+    assert async_database_url("sqlite:///./nidus.db") == "sqlite+aiosqlite:///./nidus.db"
+    assert async_database_url("mysql+aiomysql://u@db/nidus") == "mysql+aiomysql://u@db/nidus"
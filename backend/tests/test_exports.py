@@ -0,0 +1,81 @@
+import zipfile
+import multiprocessing
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.config import settings
+from app.core.database import Base
+from app.models.candidate import Candidate
+from app.models.user import User
+from app.services.report_cache import report_cache
+from app.tasks import exports
+
+engine = create_engine(
+    "sqlite:///:memory:",
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@pytest.fixture
+def candidate_ids(monkeypatch, tmp_path):
+    Base.metadata.create_all(bind=engine)
+    monkeypatch.setattr(exports, "SessionLocal", TestingSessionLocal)
+    monkeypatch.setattr(settings, "EXPORT_DIR", str(tmp_path / "exports"))
+    monkeypatch.setattr(report_cache, "directory", str(tmp_path / "reports"))
+    db = TestingSessionLocal()
+    user = User(email="export@example.com", username="export", hashed_password="x")
+    db.add(user)
+    db.commit()
+    candidates = [
+        Candidate(user_id=user.id, filename=f"cv{i}.txt", format="TXT", keywords=["Python"],
+                  structure="", recommendations=["Buen uso de keywords."], match_score=i * 30.0)
+        for i in range(3)
+    ]
+    db.add_all(candidates)
+    db.commit()
+    yield user.id, [c.id for c in candidates]
+    db.close()
+    Base.metadata.drop_all(bind=engine)
+
+def test_export_reports_task_zips_filtered_reports(candidate_ids):
+    user_id, ids = candidate_ids
+    # Cached reports are reused, the rest rendered and cached
+    exports.export_reports_task.apply(kwargs={"user_id": user_id, "ids": [ids[2]]}).get()
+
+    result = exports.export_reports_task.apply(kwargs={"user_id": user_id, "min_score": 30}).get()
+    assert result["status"] == "completed"
+    assert result["count"] == 2
+    path = exports.export_path(user_id, result["download_url"].rsplit("/", 1)[-1])
+    with zipfile.ZipFile(path) as archive:
+        assert sorted(archive.namelist()) == [f"analysis_{ids[1]}.pdf", f"analysis_{ids[2]}.pdf"]
+        assert all(archive.read(name).startswith(b"%PDF") for name in archive.namelist())
+
+def test_export_reports_task_renders_without_a_pool(candidate_ids, monkeypatch):
+    user_id, ids = candidate_ids
+    monkeypatch.setattr(settings, "EXPORT_RENDER_WORKERS", 0)
+    result = exports.export_reports_task.apply(kwargs={"user_id": user_id}).get()
+    assert result["count"] == 3
+
+
+def _render_in_pool(queue):
+    pool = exports._render_pool()
+    try:
+        queue.put([pdf[:4] for pdf in pool.map(exports._render, [{"filename": "cv.txt", "keywords": ["Python"]}])])
+    finally:
+        pool.close()
+        pool.join()
+
+def test_render_pool_starts_inside_daemonic_workers(monkeypatch):
+    # Like a prefork Celery child, which multiprocessing won't let start a pool
+    monkeypatch.setattr(settings, "EXPORT_RENDER_WORKERS", 1)
+    context = multiprocessing.get_context("fork")
+    queue = context.Queue()
+    worker = context.Process(target=_render_in_pool, args=(queue,), daemon=True)
+    worker.start()
+    assert queue.get(timeout=60) == [b"%PDF"]
+    worker.join()
@@ -0,0 +1,68 @@
+import io
+
+
+def test_iter_zip_members_enforces_limits():
+    import zipfile
+    from app.services.file_handler import iter_zip_members
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("batch/", b"")
+        zf.writestr("batch/ok.txt", b"Python developer")
+        zf.writestr("batch/big.txt", b"x" * 101)
+        zf.writestr("batch/run.sh", b"echo")
+    archive.seek(0)
+    members = {name: (content, error) for name, content, error in iter_zip_members(archive, {"txt"}, 100)}
+    assert members["ok.txt"] == (b"Python developer", None)
+    assert members["big.txt"][0] is None and members["big.txt"][1]
+    assert members["run.sh"][0] is None and members["run.sh"][1]
+
+
+def _assert_off_loop():
+    import asyncio
+    import pytest
+    with pytest.raises(RuntimeError):  # No running event loop in this thread
+        asyncio.get_running_loop()
+
+
+class _ThreadCheckedFile(io.BytesIO):
+    def read(self, *args):
+        _assert_off_loop()
+        return super().read(*args)
+
+
+def test_spool_upload_copies_off_the_event_loop():
+    import asyncio
+    import pytest
+    from fastapi import UploadFile
+    from app.services.file_handler import FileTooLargeError, spool_upload
+
+    async def spool(content, max_size):
+        with await spool_upload(UploadFile(_ThreadCheckedFile(content), filename="cv.txt"), max_size) as f:
+            return f.read()
+    assert asyncio.run(spool(b"Python developer", 100)) == b"Python developer"
+    with pytest.raises(FileTooLargeError):
+        asyncio.run(spool(b"x" * 101, 100))
+
+
+def test_batch_zip_members_are_read_off_the_event_loop(monkeypatch):
+    import asyncio
+    import zipfile
+    from fastapi import UploadFile
+    from app.api.v1.endpoints import upload
+    from app.services.file_handler import iter_zip_members
+
+    def checked(*args):
+        for member in iter_zip_members(*args):
+            _assert_off_loop()
+            yield member
+    monkeypatch.setattr(upload, "iter_zip_members", checked)
+
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("a.txt", b"First CV")
+        zf.writestr("b.txt", b"Second CV")
+    archive.seek(0)
+
+    async def read_batch():
+        return [(name, f.read()) async for name, f, _ in upload._iter_batch_files([UploadFile(archive, filename="cvs.zip")])]
+    assert asyncio.run(read_batch()) == [("a.txt", b"First CV"), ("b.txt", b"Second CV")]
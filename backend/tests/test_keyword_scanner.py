@@ -0,0 +1,43 @@
+from app.services.cv_analyzer import build_analysis
+from app.services.keyword_scanner import KeywordScanner, get_scanner
+
+DICTIONARY = {
+    "skills": {
+        "CSS": ["css", "css3"],
+        "React": ["react", "reactjs"],
+        "React Native": ["react native"],
+        "C++": ["c++", "cpp"],
+        "Machine Learning": ["machine learning", "ml"],
+    },
+    "sections": {
+        "Experience": ["experience", "work experience"],
+    },
+}
+
+
+def test_matches_respect_word_boundaries():
+    scanner = KeywordScanner(DICTIONARY)
+    found = scanner.scan("Access control, reactive systems and HTML")
+    assert found == {"skills": [], "sections": []}
+
+def test_synonyms_multiword_and_symbols():
+    scanner = KeywordScanner(DICTIONARY)
+    found = scanner.scan("WORK EXPERIENCE\nReactJS, React  Native, CSS3, C++ and machine\nlearning")
+    assert found["skills"] == ["CSS", "React", "React Native", "C++", "Machine Learning"]
+    assert found["sections"] == ["Experience"]
+
+def test_shared_prefix_falls_back_to_shorter_alias():
+    scanner = KeywordScanner(DICTIONARY)
+    assert scanner.scan("react nativ")["skills"] == ["React"]
+
+def test_default_dictionary_loads():
+    scanner = get_scanner()
+    found = scanner.scan("Experiencia: Python, FastAPI, Docker, AWS and PostgreSQL. Resumen profesional.")
+    assert {"Python", "FastAPI", "Docker", "AWS", "PostgreSQL"} <= set(found["skills"])
+    assert {"Experiencia", "Resumen"} <= set(found["sections"])
+
+def test_fallback_analysis_uses_scanner():
+    result = build_analysis("Access management. Education: MIT", "cv.txt", "txt", None, ai_enabled=False)
+    assert result["keywords"] == ["(Ninguna keyword detectada)"]
+    assert "Education" in result["structure"]
+    assert "Incluye sección de experiencia." in result["recommendations"]
@@ -0,0 +1,114 @@
+import numpy as np
+
+from app.services.matching_service import (
+    CorpusModel,
+    EmbeddingMatcher,
+    calculate_match_score,
+    decode_term_vectors,
+    encode_term_vector,
+    get_missing_keywords,
+)
+
+RESUME = "Senior Python developer with FastAPI, Docker and PostgreSQL experience"
+JOB = "We are hiring a Python developer who knows Docker, Kubernetes and AWS"
+
+
+def test_match_score_range():
+    score = calculate_match_score(RESUME, JOB)
+    assert 0 < score < 100
+    assert calculate_match_score(RESUME, RESUME) == 100.0
+    assert calculate_match_score(RESUME, "") == 0.0
+
+def test_missing_keywords():
+    missing = get_missing_keywords(RESUME, JOB)
+    assert missing[:2] == ["AWS", "Kubernetes"]  # Taxonomy skills first, by canonical name
+    assert "Python" not in missing and "python" not in missing
+    assert "kubernetes" not in missing
+
+def test_missing_keywords_uses_extracted_skills():
+    job = "Looking for a ReactJS engineer"
+    assert "React" in get_missing_keywords("Frontend engineer", job)
+    assert "React" not in get_missing_keywords("Frontend engineer", job, resume_skills=["react.js"])
+
+def test_term_indices_match_counts():
+    model = CorpusModel()
+    counts = model.counts(["docker kubernetes"])
+    assert sorted(model.term_indices(["docker", "kubernetes"])) == sorted(counts.indices)
+
+def test_partial_fit_updates_idf():
+    model = CorpusModel()
+    model.partial_fit(model.counts(["python docker", "python aws", "python sql"]))
+    python_idx, docker_idx = model.term_indices(["python", "docker"])
+    assert model.n_docs == 3
+    assert model.idf[python_idx] < model.idf[docker_idx]
+
+def test_term_vector_roundtrip():
+    model = CorpusModel()
+    counts = model.counts([RESUME, JOB])
+    blobs = [encode_term_vector(counts[0]), None, encode_term_vector(counts[1])]
+    decoded = decode_term_vectors(blobs)
+    assert decoded.shape == (3, model.n_features)
+    assert (decoded[0] != counts[0]).nnz == 0
+    assert decoded[1].nnz == 0
+    assert (decoded[2] != counts[1]).nnz == 0
+
+def test_save_merges_updates_from_several_processes(tmp_path):
+    path = str(tmp_path / "model.npz")
+    first, second = CorpusModel(path), CorpusModel(path)
+    first.partial_fit(first.counts(["python docker"]))
+    second.partial_fit(second.counts(["python aws"]))
+    first.save()
+    second.save()
+
+    reloaded = CorpusModel(path)
+    reloaded.ensure_loaded()
+    python_idx = reloaded.term_indices(["python"])[0]
+    assert reloaded.n_docs == 2
+    assert reloaded.doc_freq[python_idx] == 2
+    assert np.array_equal(second.doc_freq, reloaded.doc_freq)
+
+def test_api_process_picks_up_worker_saves(tmp_path, monkeypatch):
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "MATCHING_MODEL_RELOAD_SECONDS", 0)
+    path = str(tmp_path / "model.npz")
+    api, worker = CorpusModel(path), CorpusModel(path)
+    docker_idx = api.term_indices(["docker"])[0]
+    uniform = api.idf[docker_idx]  # No file yet: every term weighs the same
+    assert api.n_docs == 0
+
+    worker.partial_fit(worker.counts(["python docker", "python aws", "python sql"]))
+    worker.save()
+    assert api.idf[docker_idx] != uniform
+    assert api.n_docs == 3
+
+    worker.partial_fit(worker.counts(["docker compose"]))
+    worker.save()
+    api.ensure_loaded()
+    assert api.n_docs == 4
+
+def test_rank_candidates_matches_per_pair_scores():
+    from app.services.matching_service import corpus_model, rank_candidates
+    from app.services.skill_taxonomy import get_skill_taxonomy
+    resumes = [RESUME, "React and CSS designer", "AWS and Kubernetes operator"]
+    vectors = [encode_term_vector(corpus_model.counts([text])) for text in resumes]
+    skills = [get_skill_taxonomy().find(text) for text in resumes]
+    ranked = rank_candidates(JOB, vectors, top_k=3, skills=skills)
+    assert sorted(row for row, _, _ in ranked) == [0, 1, 2]
+    assert [score for _, score, _ in ranked] == sorted((score for _, score, _ in ranked), reverse=True)
+    for row, score, missing in ranked:
+        assert score == calculate_match_score(resumes[row], JOB)
+        assert missing == get_missing_keywords(resumes[row], JOB)
+
+def test_embedding_matcher_handles_spanish_inflections():
+    matcher = EmbeddingMatcher(dim=512)
+    job = "Buscamos desarrolladora backend con experiencia en bases de datos"
+    related = matcher.score("Desarrollador backend, amplia experiencia con base de datos", job)
+    unrelated = matcher.score("Diseñadora gráfica especializada en ilustración", job)
+    assert related > unrelated
+    vectors = matcher.embed(["uno", "dos"])
+    assert vectors.dtype == np.float32 and vectors.shape == (2, 512)
+    assert np.allclose(np.linalg.norm(vectors, axis=1), 1.0)
+
+def test_calculate_match_score_selects_matcher():
+    assert 0 < calculate_match_score(RESUME, JOB, matcher="embedding") <= 100
+    assert calculate_match_score(RESUME, JOB, matcher="unknown") == 0.0
@@ -0,0 +1,56 @@
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from app.main import app
+from app.services import metrics
+from app.services.cv_analyzer import build_analysis
+from app.tasks.cv_processing import _process_cv
+
+client = TestClient(app)
+
+
+def _value(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_metrics_endpoint_reports_request_latency_by_route():
+    client.get("/export/some-task-id")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'nidus_http_request_duration_seconds_count{method="GET",route="/export/{task_id}",status="401"}' in body
+    assert "some-task-id" not in body
+    assert "nidus_db_pool_connections" in body
+
+
+def test_pipeline_stages_and_fallback_rate_are_recorded():
+    fallback_before = _value("nidus_cv_analyses_total", ai_status="fallback")
+    matching_before = _value("nidus_cv_stage_duration_seconds_count", stage="matching")
+    analysis = build_analysis("Experience\nPython developer", "cv.txt", "txt", None, ai_enabled=True)
+    assert analysis["ai_status"] == "fallback"
+    _process_cv("Experience\nPython developer", "cv.txt", "txt", 1, "Python", analysis_result=analysis)
+    assert _value("nidus_cv_analyses_total", ai_status="fallback") == fallback_before + 1
+    assert _value("nidus_cv_stage_duration_seconds_count", stage="matching") == matching_before + 1
+    assert _value("nidus_cv_stage_duration_seconds_count", stage="fallback") >= 1
+
+
+def test_llm_token_usage():
+    before = _value("nidus_llm_tokens_total", kind="prompt")
+    metrics.record_llm_usage(SimpleNamespace(usage=SimpleNamespace(prompt_tokens=120, completion_tokens=30)))
+    metrics.record_llm_usage(SimpleNamespace())
+    assert _value("nidus_llm_tokens_total", kind="prompt") == before + 120
+
+
+def test_task_duration_is_recorded():
+    from app.celery_app import celery_app
+
+    @celery_app.task(name="tests.metrics_task")
+    def metrics_task():
+        return {"status": "failed", "error": "boom"}
+
+    before = _value("nidus_task_duration_seconds_count", task="tests.metrics_task", state="FAILURE")
+    metrics_task.apply()
+    assert _value("nidus_task_duration_seconds_count", task="tests.metrics_task", state="FAILURE") == before + 1
@@ -0,0 +1,39 @@
+import re
+
+from app.services.pdf_generator import generate_pdf_report
+from app.services.report_cache import ReportCache, report_version
+
+ANALYSIS = {
+    "filename": "cv.pdf",
+    "format": "PDF",
+    "keywords": ["Python", "Docker"],
+    "structure": "Secciones detectadas: Experiencia",
+    "recommendations": [f"Recomendación número {i} <con> caracteres & especiales" for i in range(120)],
+    "match_score": 72.5,
+    "missing_keywords": ["Kubernetes"],
+    "ai_data": {"name": "Ana Pérez", "skills": ["Python"], "experience_years": 4},
+    "ai_status": "completed",
+}
+
+
+def test_long_reports_flow_onto_more_pages():
+    pdf = generate_pdf_report(ANALYSIS).getvalue()
+    assert pdf.startswith(b"%PDF")
+    assert len(re.findall(rb"/Type /Page\b", pdf)) > 1
+
+def test_minimal_analysis_renders():
+    pdf = generate_pdf_report({"filename": "a.txt", "format": "TXT", "keywords": [], "structure": None, "recommendations": []})
+    assert len(re.findall(rb"/Type /Page\b", pdf.getvalue())) == 1
+
+def test_report_version_tracks_content():
+    assert report_version(ANALYSIS) == report_version(dict(ANALYSIS))
+    assert report_version(ANALYSIS) != report_version({**ANALYSIS, "match_score": 10.0})
+
+def test_cache_replaces_older_versions(tmp_path):
+    cache = ReportCache(str(tmp_path))
+    first = cache.put(7, "v1", b"one")
+    assert cache.get(7, "v1") == first
+    cache.put(7, "v2", b"two")
+    assert cache.get(7, "v1") is None
+    assert open(cache.get(7, "v2"), "rb").read() == b"two"
+    assert ReportCache(None).get(7, "v2") is None
@@ -0,0 +1,91 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.database import Base
+from app.models.user import User, UserRole
+from app.services.principal_cache import Principal, PrincipalCache, principal_cache
+
+engine = create_engine(
+    "sqlite:///:memory:",
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def test_local_cache_counts_hits_and_misses():
+    cache = PrincipalCache(None, ttl=60, max_entries=2)
+    assert cache.get(1) is None
+    cache.set(Principal(id=1, role=UserRole.ADMIN, is_active=True))
+    assert cache.get("1") == Principal(id=1, role=UserRole.ADMIN, is_active=True)
+    cache.invalidate(1)
+    assert cache.get(1) is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["invalidations"]) == (1, 2, 1)
+    assert stats["backend"] == "local"
+
+def test_expired_and_disabled_entries_miss():
+    cache = PrincipalCache(None, ttl=-1, max_entries=2)
+    cache.set(Principal(id=1, role=UserRole.VIEWER, is_active=True))
+    assert cache.get(1) is None
+
+    cache = PrincipalCache(None, ttl=60, max_entries=1)
+    cache.set(Principal(id=1, role=UserRole.VIEWER, is_active=True))
+    cache.set(Principal(id=2, role=UserRole.VIEWER, is_active=True))
+    assert cache.get(1) is None and cache.get(2) is not None
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(bind=engine)
+    session = TestingSessionLocal()
+    principal_cache.clear()
+    yield session
+    session.close()
+    Base.metadata.drop_all(bind=engine)
+
+def test_deactivation_and_role_change_invalidate(db):
+    user = User(email="p@example.com", username="p", hashed_password="x", role=UserRole.RECRUITER)
+    db.add(user)
+    db.commit()
+    principal_cache.set(Principal.from_user(user))
+
+    user.full_name = "Unrelated change"
+    db.commit()
+    assert principal_cache.get(user.id) is not None
+
+    user.is_active = False
+    db.commit()
+    assert principal_cache.get(user.id) is None
+
+    principal_cache.set(Principal.from_user(user))
+    user.role = UserRole.ADMIN
+    db.commit()
+    assert principal_cache.get(user.id) is None
+
+
+def test_invalidation_waits_for_commit(db):
+    user = User(email="c@example.com", username="c", hashed_password="x", role=UserRole.RECRUITER)
+    db.add(user)
+    db.commit()
+    principal_cache.set(Principal.from_user(user))
+
+    user.is_active = False
+    db.flush()
+    assert principal_cache.get(user.id) is not None
+    db.rollback()
+    assert principal_cache.get(user.id) is not None
+
+    user.role = UserRole.ADMIN
+    db.flush()
+    assert principal_cache.get(user.id) is not None
+    db.commit()
+    assert principal_cache.get(user.id) is None
+
+    principal_cache.set(Principal.from_user(user))
+    db.delete(user)
+    db.flush()
+    assert principal_cache.get(user.id) is not None
+    db.commit()
+    assert principal_cache.get(user.id) is None
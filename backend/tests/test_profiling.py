@@ -0,0 +1,114 @@
+import cProfile
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.dependencies import get_current_user
+from app.core.config import settings
+from app.main import app
+from app.models.user import UserRole
+from app.services import profiling
+from app.services.principal_cache import Principal
+from app.services.profiling import ProfilingMiddleware
+from app.services.text_extraction import extract_document
+
+
+def _profile(fn=lambda: sum(range(1000))):
+    profile = cProfile.Profile()
+    profile.enable()
+    fn()
+    profile.disable()
+    return profile
+
+
+@pytest.fixture
+def store(monkeypatch, tmp_path):
+    store = profiling.profile_store
+    monkeypatch.setattr(store, "directory", str(tmp_path))
+    monkeypatch.setattr(store, "max_entries", 2)
+    return store
+
+
+def test_task_profiles_keep_the_slowest(store):
+    ids = {d: store.save("task", _profile(), d, f"task {d}") for d in (0.3, 0.1, 0.5)}
+    assert store.save("task", _profile(), 0.05, "fast") is None
+    assert {e["duration_ms"] for e in store.list("task")} == {300.0, 500.0}
+    assert store.dump_path(ids[0.1]) is None
+
+
+def test_request_profiles_keep_the_latest(store):
+    ids = [store.save("request", _profile(), 1.0 - i / 10, f"GET /{i}") for i in range(3)]
+    assert [e["id"] for e in store.list("request")] == ids[:0:-1]
+    report = store.report(ids[2], sort="tottime", limit=5)
+    assert "function calls" in report
+    assert store.report("../missing") is None
+
+
+def test_middleware_profiles_only_authorized_requests(store, monkeypatch):
+    monkeypatch.setattr(settings, "PROFILING_ENABLED", True)
+    monkeypatch.setattr(settings, "PROFILING_TOKEN", "s3cret")
+    demo = FastAPI()
+
+    @demo.get("/work")
+    async def work():
+        return {"text": " ".join(sorted(["world", "hello"]))}
+
+    demo.add_middleware(ProfilingMiddleware)
+    client = TestClient(demo)
+
+    assert "x-profile-id" not in client.get("/work").headers
+    assert "x-profile-id" not in client.get("/work", headers={"X-Profile": "wrong"}).headers
+    response = client.get("/work", headers={"X-Profile": "s3cret"})
+    assert response.json() == {"text": "hello world"}
+    profile_id = response.headers["x-profile-id"]
+    assert store.get(profile_id)["label"] == "GET /work"
+    assert "sorted" in store.report(profile_id, limit=200)
+
+
+def test_sampled_task_profiles(store, monkeypatch):
+    monkeypatch.setattr(settings, "TASK_PROFILE_SAMPLE_RATE", 0)
+    with profiling.sampled_task("never"):
+        pass
+    assert store.list() == []
+    monkeypatch.setattr(settings, "TASK_PROFILE_SAMPLE_RATE", 1)
+    with profiling.sampled_task("process_cv_task cv.txt"):
+        extract_document(b"Python developer", "cv.txt")
+    assert [e["label"] for e in store.list("task")] == ["process_cv_task cv.txt"]
+    # CV parsing runs in the task, so it is in the task profiles
+    assert "extract_document" in store.report(store.list("task")[0]["id"], limit=200)
+
+
+def test_admin_endpoints(store):
+    profile_id = store.save("request", _profile(), 0.2, "GET /cvs")
+    client = TestClient(app)
+    app.dependency_overrides[get_current_user] = lambda: Principal(id=1, role=UserRole.RECRUITER, is_active=True)
+    try:
+        assert client.get("/admin/profiles").status_code == 403
+        app.dependency_overrides[get_current_user] = lambda: Principal(id=1, role=UserRole.ADMIN, is_active=True)
+        assert [e["id"] for e in client.get("/admin/profiles", params={"kind": "request"}).json()] == [profile_id]
+        report = client.get(f"/admin/profiles/{profile_id}", params={"sort": "calls"})
+        assert report.status_code == 200 and "function calls" in report.text
+        download = client.get(f"/admin/profiles/{profile_id}/download")
+        assert download.status_code == 200 and download.content
+        assert client.get("/admin/profiles/unknown").status_code == 404
+    finally:
+        app.dependency_overrides.pop(get_current_user, None)
+
+
+def _save_profiles(directory, count):
+    store = profiling.ProfileStore(directory, max_entries=2)
+    for i in range(count):
+        store.save("request", _profile(), 0.1, f"GET /{i}")
+
+
+def test_eviction_holds_across_processes(tmp_path):
+    import multiprocessing
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=_save_profiles, args=(str(tmp_path), 10)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert len(profiling.ProfileStore(str(tmp_path), max_entries=2).list("request")) == 2
+    assert len([name for name in tmp_path.iterdir() if name.suffix == ".prof"]) == 2
@@ -0,0 +1,31 @@
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.core.schema import upgrade_schema
+from app.models.candidate import Candidate
+from app.models.user import User
+
+
+def test_upgrade_adds_missing_columns_and_indexes(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    User.__table__.create(engine)
+    with engine.begin() as connection:
+        # candidates as first released, before the analysis columns were added
+        connection.exec_driver_sql(
+            "CREATE TABLE candidates (id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, filename VARCHAR, format VARCHAR, "
+            "upload_date DATETIME, keywords JSON, structure VARCHAR, recommendations JSON, match_score FLOAT, "
+            "missing_keywords JSON, ai_data JSON)"
+        )
+        connection.exec_driver_sql("INSERT INTO candidates (id, user_id, filename, format) VALUES (1, 1, 'old.pdf', 'PDF')")
+    Base.metadata.create_all(bind=engine)
+
+    added = upgrade_schema(engine)
+    assert {"candidates.term_vector", "candidates.blob_key", "candidates.ai_status", "ix_candidates_user_upload"} <= set(added)
+    assert "ix_candidates_user_upload" in {index["name"] for index in inspect(engine).get_indexes("candidates")}
+
+    db = sessionmaker(bind=engine)()
+    candidate = db.get(Candidate, 1)
+    assert candidate.filename == "old.pdf" and candidate.blob_key is None
+    db.close()
+    assert upgrade_schema(engine) == []
@@ -0,0 +1,39 @@
+from app.services.skill_taxonomy import SkillTaxonomy, get_skill_taxonomy, skill_key
+
+SKILLS = {
+    "React": ["react", "reactjs", "react.js"],
+    "Python": ["python", "python3"],
+    "Kubernetes": ["kubernetes", "k8s"],
+    "Go": ["golang"],
+}
+
+
+def test_aliases_resolve_to_canonical():
+    taxonomy = SkillTaxonomy(SKILLS)
+    for raw in ["ReactJS", "React.js", "react", "React JS", " react_js "]:
+        assert taxonomy.normalize(raw) == "React"
+    assert taxonomy.normalize("K8S") == "Kubernetes"
+    assert taxonomy.normalize("go") == "Go"
+
+def test_version_suffix_and_fuzzy_variants():
+    taxonomy = SkillTaxonomy(SKILLS)
+    assert taxonomy.normalize("Python 3.11") == "Python"
+    assert taxonomy.normalize("Kubernetis") == "Kubernetes"
+    # Prefixes that aren't followed by a version are different skills
+    assert taxonomy.normalize("Python Developer") == "Python Developer"
+
+def test_unknown_skills_are_kept_and_memoized():
+    taxonomy = SkillTaxonomy(SKILLS, cache_size=2)
+    assert taxonomy.normalize("  Underwater   Basket Weaving ") == "Underwater Basket Weaving"
+    taxonomy.normalize("Reactjs")
+    taxonomy.normalize("Pyhton3")
+    assert len(taxonomy._cache) == 2
+
+def test_normalize_many_dedupes_in_order():
+    taxonomy = SkillTaxonomy(SKILLS)
+    result = taxonomy.normalize_many(["ReactJS", "python3", "React", "(Ninguna keyword detectada)", ""])
+    assert result == ["React", "Python", "(Ninguna keyword detectada)"]
+
+def test_default_taxonomy_and_index_keys():
+    assert get_skill_taxonomy().normalize("Node JS") == "Node.js"
+    assert skill_key("ReactJS") == skill_key("react") == "react"
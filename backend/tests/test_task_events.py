@@ -0,0 +1,235 @@
+import json
+import asyncio
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from app.api.dependencies import get_current_user, get_stream_user, get_websocket_user
+from app.celery_app import celery_app
+from app.main import app
+from app.models.user import UserRole
+from app.services.principal_cache import Principal, principal_cache
+from app.services.task_access import TaskAccess, task_access
+from app.services.task_events import TIMEOUT, TaskEventBroker, completion_event, task_event, task_events
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def authenticated():
+    principal = Principal(id=1, role=UserRole.RECRUITER, is_active=True)
+    for dependency in (get_current_user, get_stream_user, get_websocket_user):
+        app.dependency_overrides[dependency] = lambda: principal
+    yield principal
+    for dependency in (get_current_user, get_stream_user, get_websocket_user):
+        app.dependency_overrides.pop(dependency, None)
+
+
+def _collect(broker, task_ids, keepalive=5.0):
+    async def run():
+        return [event async for event in broker.subscribe(task_ids, keepalive=keepalive)]
+    return asyncio.run(run())
+
+
+def test_subscriber_receives_events_until_all_tasks_finish():
+    broker = TaskEventBroker(None, ttl=60, max_entries=100)
+
+    def publish():
+        # Wait until the subscriber is registered, then publish from another thread
+        while not broker._subscribers:
+            pass
+        broker.publish(task_event("a", "PROGRESS", stage="analyzing"))
+        broker.publish(task_event("other", "SUCCESS", result={}))
+        broker.publish(task_event("a", "SUCCESS", result={"id": 1}))
+        broker.publish(task_event("b", "FAILURE", error="boom"))
+
+    thread = threading.Thread(target=publish)
+    thread.start()
+    events = _collect(broker, ["a", "b"])
+    thread.join()
+
+    assert [(e["task_id"], e["status"]) for e in events] == [("a", "PROGRESS"), ("a", "SUCCESS"), ("b", "FAILURE")]
+    assert events[1]["result"] == {"id": 1}
+    assert not broker._subscribers
+
+
+def test_late_subscriber_gets_the_last_event():
+    broker = TaskEventBroker(None, ttl=60, max_entries=100)
+    broker.publish(task_event("done", "SUCCESS", result={"id": 7}))
+    assert _collect(broker, ["done"]) == [task_event("done", "SUCCESS", result={"id": 7})]
+
+
+def test_keepalive_while_waiting():
+    broker = TaskEventBroker(None, ttl=60, max_entries=100)
+
+    async def run():
+        stream = broker.subscribe(["slow"], keepalive=0.01)
+        first = await stream.__anext__()
+        await stream.aclose()
+        return first
+    assert asyncio.run(run()) is None
+    assert not broker._subscribers
+
+
+def test_stream_times_out_unfinished_tasks():
+    broker = TaskEventBroker(None, ttl=60, max_entries=100)
+    broker.publish(task_event("done", "SUCCESS", result={}))
+
+    async def run():
+        return [event async for event in broker.subscribe(["done", "lost"], keepalive=5.0, max_seconds=0.05)]
+    events = asyncio.run(run())
+    assert [e for e in events if e is not None] == [task_event("done", "SUCCESS", result={}), task_event("lost", TIMEOUT)]
+    assert not broker._subscribers
+
+
+def test_redis_failure_mid_stream_fails_the_stream(monkeypatch):
+    broker = TaskEventBroker("redis://unused", ttl=60, max_entries=100)
+    monkeypatch.setattr(broker, "_client", lambda: object())
+
+    async def connect(pending):
+        return None
+
+    async def broken(connection, pending, keepalive, deadline):
+        yield None
+        raise ConnectionError("lost")
+
+    monkeypatch.setattr(broker, "_connect_redis", connect)
+    monkeypatch.setattr(broker, "_subscribe_redis", broken)
+
+    async def run():
+        received = []
+        with pytest.raises(ConnectionError):
+            async for event in broker.subscribe(["a"], keepalive=5.0):
+                received.append(event)
+        return received
+    assert asyncio.run(run()) == [None]
+    assert not broker._subscribers  # No in-process subscription was made
+
+
+def test_completion_event_reports_task_failures():
+    assert completion_event("t", "SUCCESS", {"status": "completed"})["status"] == "SUCCESS"
+    assert completion_event("t", "SUCCESS", {"status": "failed", "error": "x"})["error"] == "x"
+    assert completion_event("t", "FAILURE", ValueError("bad")) == task_event("t", "FAILURE", error="bad")
+
+
+def test_tasks_publish_start_and_completion():
+    @celery_app.task(bind=True)
+    def echo_task(self, value):
+        return {"status": "completed", "value": value}
+
+    result = echo_task.apply(args=(3,))
+    events = _collect(task_events, [result.id])
+    assert events == [task_event(result.id, "SUCCESS", result={"status": "completed", "value": 3})]
+
+
+def test_sse_stream(authenticated):
+    task_access.register(["sse-1", "sse-2"], authenticated.id)
+    task_events.publish(task_event("sse-1", "SUCCESS", result={"id": 1}))
+    task_events.publish(task_event("sse-2", "FAILURE", error="boom"))
+    response = client.get("/tasks/events", params={"ids": "sse-1,sse-2"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [json.loads(line[len("data: "):]) for line in response.text.splitlines() if line.startswith("data: ")]
+    assert {e["task_id"]: e["status"] for e in events} == {"sse-1": "SUCCESS", "sse-2": "FAILURE"}
+
+    assert client.get("/tasks/events", params={"ids": ","}).status_code == 400
+    task_access.register(["sse-other"], authenticated.id + 1)
+    assert client.get("/tasks/events", params={"ids": "sse-1,sse-other"}).status_code == 404
+    assert client.get("/tasks/events", params={"ids": "never-dispatched"}).status_code == 404
+
+
+def test_websocket_stream(authenticated):
+    task_access.register(["ws-1"], authenticated.id)
+    task_events.publish(task_event("ws-1", "SUCCESS", result={"id": 2}))
+    with client.websocket_connect("/tasks/ws?ids=ws-1") as websocket:
+        assert websocket.receive_json() == task_event("ws-1", "SUCCESS", result={"id": 2})
+
+    task_access.register(["ws-other"], authenticated.id + 1)
+    with pytest.raises(WebSocketDisconnect) as disconnect:
+        with client.websocket_connect("/tasks/ws?ids=ws-other") as websocket:
+            websocket.receive_json()
+    assert disconnect.value.code == 1008
+
+
+def test_batch_task_status(authenticated, monkeypatch):
+    from celery.backends.cache import CacheBackend
+    from app.api.v1.endpoints import tasks
+
+    backend = CacheBackend(app=celery_app, backend="memory")
+    backend.store_result("one", {"status": "completed", "id": 4, "keywords": ["Python"]}, "SUCCESS")
+    backend.store_result("batch", {"status": "completed", "items": [{"id": 5}, {"status": "failed"}]}, "SUCCESS")
+    backend.store_result("bad", ValueError("boom"), "FAILURE")
+    monkeypatch.setattr(tasks, "_result_backend", lambda: backend)
+
+    ids = ["one", "batch", "bad", "unknown"]
+    task_access.register(ids, authenticated.id)
+    response = client.post("/tasks/status", json={"task_ids": ids, "summary": True})
+    assert response.status_code == 200
+    assert response.json() == [
+        {"task_id": "one", "status": "SUCCESS", "candidate_id": 4},
+        {"task_id": "batch", "status": "SUCCESS", "candidate_ids": [5]},
+        {"task_id": "bad", "status": "FAILURE", "error": "boom"},
+        {"task_id": "unknown", "status": "PENDING"},
+    ]
+
+    full = client.post("/tasks/status", json={"task_ids": ["one"]}).json()
+    assert full[0]["result"]["keywords"] == ["Python"]
+    assert client.post("/tasks/status", json={"task_ids": []}).status_code == 422
+    task_access.register(["foreign"], authenticated.id + 1)
+    assert client.post("/tasks/status", json={"task_ids": ["one", "foreign"]}).status_code == 404
+    assert client.get("/tasks/foreign").status_code == 404
+
+
+def test_task_status_requires_authentication():
+    assert client.post("/tasks/status", json={"task_ids": ["one"]}).status_code in (401, 403)
+    assert client.get("/tasks/one").status_code in (401, 403)
+
+
+def test_streams_require_authentication():
+    assert client.get("/tasks/events", params={"ids": "x"}).status_code == 401
+    assert client.get("/tasks/events", params={"ids": "x", "ticket": "bad"}).status_code == 401
+    with pytest.raises(WebSocketDisconnect) as disconnect:
+        with client.websocket_connect("/tasks/ws?ids=x") as websocket:
+            websocket.receive_json()
+    assert disconnect.value.code == 1008
+
+
+def test_stream_ticket_is_single_use(monkeypatch):
+    principal = Principal(id=42, role=UserRole.RECRUITER, is_active=True)
+    monkeypatch.setattr(principal_cache, "ttl", 60)
+    principal_cache.set(principal)  # No user row needed
+    app.dependency_overrides[get_current_user] = lambda: principal
+    try:
+        ticket = client.post("/tasks/events/ticket").json()["ticket"]
+    finally:
+        app.dependency_overrides.pop(get_current_user, None)
+    task_access.register(["ticket-1"], principal.id)
+    task_events.publish(task_event("ticket-1", "SUCCESS", result={"id": 3}))
+
+    response = client.get("/tasks/events", params={"ids": "ticket-1", "ticket": ticket})
+    assert response.status_code == 200 and '"ticket-1"' in response.text
+    assert client.get("/tasks/events", params={"ids": "ticket-1", "ticket": ticket}).status_code == 401
+
+
+def test_task_access_local_store():
+    access = TaskAccess(None, owner_ttl=60, ticket_ttl=0, max_entries=100)
+    access.register(["a", "b"], 7)
+    assert access.owners(["a", "b", "c"]) == [7, 7, None]
+    assert access.redeem_ticket(access.issue_ticket(7)) is None  # Expired at once
+
+    access.ticket_ttl = 60
+    ticket = access.issue_ticket(7)
+    assert access.redeem_ticket(ticket) == 7
+    assert access.redeem_ticket(ticket) is None
+
+
+def test_subscriptions_share_one_async_redis_client():
+    broker = TaskEventBroker("redis://localhost:6379/0", ttl=60, max_entries=100)
+
+    async def run():
+        first = broker._async_client()
+        assert broker._async_client() is first
+        await broker.aclose()
+    asyncio.run(run())
@@ -0,0 +1,121 @@
+import io
+import time
+import threading
+
+from app.core.config import settings
+from app.services import text_extraction
+from app.services.text_extraction import extract_document, looks_like_text
+
+
+def _pdf_bytes(*pages: str) -> bytes:
+    from reportlab.pdfgen import canvas
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer)
+    for text in pages:
+        c.drawString(100, 800, text)
+        c.showPage()
+    c.save()
+    return buffer.getvalue()
+
+
+def test_pdf_uses_fast_engine():
+    extraction = extract_document(_pdf_bytes("Python developer"), "cv.pdf")
+    assert extraction.engine == "pdfium"
+    assert extraction.text.strip() == "Python developer"
+    assert extraction.pages == 1 and not extraction.truncated
+    assert extraction.info()["engine"] == "pdfium"
+    assert extraction.info()["ms"] >= 0
+
+
+def test_pdf_page_cap(monkeypatch):
+    monkeypatch.setattr(settings, "PDF_MAX_PAGES", 2)
+    extraction = extract_document(_pdf_bytes("Page one", "Page two", "Page three"), "cv.pdf")
+    assert extraction.pages == 2 and extraction.truncated
+    assert "Page three" not in extraction.text
+
+
+def test_garbage_text_layer_falls_back_to_layout_engine(monkeypatch):
+    def garbage(content, max_pages):
+        yield "(cid:12)(cid:34) ### 123"
+
+    monkeypatch.setitem(text_extraction.PDF_ENGINES, "pdfium", garbage)
+    extraction = extract_document(_pdf_bytes("Data engineer"), "cv.pdf")
+    assert extraction.engine == "pdfium+pdfplumber"
+    assert "Data engineer" in extraction.text
+
+
+def test_looks_like_text():
+    assert looks_like_text("Senior Python developer, 5 years")
+    assert not looks_like_text("")
+    assert not looks_like_text("(cid:3)(cid:4)")
+    assert not looks_like_text("§¤ 0123 ¶¶ 4567 ## ++")
+
+
+def test_non_pdf_documents():
+    extraction = extract_document(b"Plain text CV", "cv.txt")
+    assert (extraction.text, extraction.engine) == ("Plain text CV", "txt")
+
+
+def test_extracts_from_memory_mapped_blob(tmp_path, monkeypatch):
+    from app.services.blob_store import FilesystemBlobStore
+    store = FilesystemBlobStore(str(tmp_path))
+    key = store.put(_pdf_bytes("Mapped CV"))
+    for engine in ("pdfium", "pdfminer"):
+        monkeypatch.setattr(settings, "PDF_FAST_ENGINE", engine)
+        with store.open(key) as content:
+            assert extract_document(content, "cv.pdf").text.strip() == "Mapped CV"
+
+
+def _slow_engine(content, max_pages):
+    yield "First page of the CV"
+    time.sleep(5)
+    yield "Second page"
+
+
+def test_page_timeout_interrupts_a_slow_engine(monkeypatch):
+    monkeypatch.setitem(text_extraction.PDF_ENGINES, "pdfium", _slow_engine)
+    monkeypatch.setattr(settings, "PDF_PAGE_TIMEOUT_SECONDS", 0.2)
+    start = time.perf_counter()
+    extraction = extract_document(_pdf_bytes("unused"), "cv.pdf")
+    assert time.perf_counter() - start < 2
+    assert extraction.text == "First page of the CV"
+    assert extraction.pages == 1 and extraction.truncated
+
+
+def test_page_timeout_outside_the_main_thread(monkeypatch):
+    def slow(content, max_pages):
+        yield "First page of the CV"
+        time.sleep(0.3)
+        yield "Second page"
+        yield "Third page"
+
+    monkeypatch.setitem(text_extraction.PDF_ENGINES, "pdfium", slow)
+    monkeypatch.setattr(settings, "PDF_PAGE_TIMEOUT_SECONDS", 0.1)
+    results = []
+    thread = threading.Thread(target=lambda: results.append(extract_document(_pdf_bytes("unused"), "cv.pdf")))
+    thread.start()
+    thread.join()
+    # No SIGALRM there: the slow page finishes, but nothing after it is read
+    assert results[0].pages == 2 and results[0].truncated
+
+
+def test_ocr_is_bounded_and_only_named_when_it_recognises_text(monkeypatch):
+    monkeypatch.setattr(text_extraction, "_ocr_available", lambda: True)
+    monkeypatch.setattr(settings, "PDF_PAGE_TIMEOUT_SECONDS", 0.2)
+    scanned = _pdf_bytes("")
+
+    monkeypatch.setattr(text_extraction, "_ocr_page", lambda content, index: "  ")
+    assert extract_document(scanned, "cv.pdf").engine == "pdfium"
+
+    def slow_ocr(content, index):
+        time.sleep(5)
+        return "Never returned"
+    monkeypatch.setattr(text_extraction, "_ocr_page", slow_ocr)
+    start = time.perf_counter()
+    assert extract_document(scanned, "cv.pdf").engine == "pdfium"
+    assert time.perf_counter() - start < 2
+
+    monkeypatch.setattr(text_extraction, "_ocr_page", lambda content, index: "Scanned CV text")
+    extraction = extract_document(scanned, "cv.pdf")
+    assert extraction.engine == "pdfium+ocr"
+    assert extraction.text == "Scanned CV text"
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from app.services.vector_index import VectorIndex
+
+
+def unit(*values):
+    v = np.array(values, dtype=np.float32)
+    return v / np.linalg.norm(v)
+
+
+def test_search_ranks_only_the_users_candidates(tmp_path):
+    index = VectorIndex(str(tmp_path / "v.idx"), dim=3)
+    index.add([1, 2], [10, 10], np.stack([unit(1, 0, 0), unit(0, 1, 0)]))
+    index.add([3], [20], np.stack([unit(1, 0, 0)]))
+
+    hits, scored = index.search(unit(1, 0.2, 0), user_id=10, top_k=5)
+    assert scored == 2
+    assert [cid for cid, _ in hits] == [1, 2]
+    assert hits[0][1] > hits[1][1]
+
+def test_latest_vector_wins_and_appends_are_seen(tmp_path):
+    index = VectorIndex(str(tmp_path / "v.idx"), dim=3)
+    index.add([1], [10], np.stack([unit(1, 0, 0)]))
+    assert index.search(unit(0, 0, 1), user_id=10)[0][0][1] == pytest.approx(0.0)
+
+    # Another worker re-indexes the candidate
+    VectorIndex(index.path, dim=3).add([1], [10], np.stack([unit(0, 0, 1)]))
+    hits, scored = index.search(unit(0, 0, 1), user_id=10)
+    assert scored == 1
+    assert hits[0][1] == pytest.approx(1.0)
+
+def test_dimension_mismatch_starts_a_new_index(tmp_path):
+    path = str(tmp_path / "v.idx")
+    VectorIndex(path, dim=3).add([1], [10], np.stack([unit(1, 0, 0)]))
+    index = VectorIndex(path, dim=4)
+    assert index.search(np.ones(4, np.float32), user_id=10) == ([], 0)
+
+    index.add([2], [10], np.ones((1, 4), np.float32) / 2)
+    hits, scored = index.search(np.ones(4, np.float32) / 2, user_id=10)
+    assert [cid for cid, _ in hits] == [2] and scored == 1
+    assert (tmp_path / "v.idx.stale").exists()
+
+def test_torn_record_is_dropped_before_appending(tmp_path):
+    index = VectorIndex(str(tmp_path / "v.idx"), dim=3)
+    index.add([1], [10], np.stack([unit(1, 0, 0)]))
+    with open(index.path, "ab") as f:
+        f.write(b"partial")  # A writer died mid-record
+    index.add([2], [10], np.stack([unit(0, 1, 0)]))
+    hits, scored = index.search(unit(0, 1, 0), user_id=10)
+    assert scored == 2 and hits[0][0] == 2
+
+def test_missing_index_is_empty(tmp_path):
+    assert VectorIndex(str(tmp_path / "none.idx"), dim=3).search(unit(1, 0, 0), user_id=1) == ([], 0)
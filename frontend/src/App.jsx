@@ -87,42 +87,50 @@ function AppContent() {
       
       const { task_id } = await res.json();
       
-      // Poll for result
-      const pollInterval = setInterval(async () => {
-        try {
-          const taskRes = await fetch(`/tasks/${task_id}`, {
-             headers: {
-                'Authorization': `Bearer ${token}`
-             }
-          });
-          const taskData = await taskRes.json();
-          
-          if (taskData.status === 'SUCCESS' || taskData.status === 'completed') {
-             clearInterval(pollInterval);
-             setAnalysis(taskData.result);
-             setSuccess("¡Análisis completado!");
-             setLoading(false);
-          } else if (taskData.status === 'FAILURE' || taskData.status === 'failed') {
-             clearInterval(pollInterval);
-             setError("Error en el análisis: " + (taskData.error || "Desconocido"));
-             setLoading(false);
-          }
-          // If pending/processing, continue polling
-        } catch (e) {
-           clearInterval(pollInterval);
+      // Subscribe to the task's events instead of polling its status. EventSource
+      // cannot send the Authorization header: trade it for a single-use ticket
+      const ticketRes = await fetch("/tasks/events/ticket", {
+        method: "POST",
+        headers: token ? { Authorization: `Bearer ${token}` } : {}
+      });
+      if (!ticketRes.ok) throw new Error("No se pudo seguir el análisis");
+      const { ticket } = await ticketRes.json();
+      const params = new URLSearchParams({ ids: task_id, ticket });
+      const events = new EventSource(`/tasks/events?${params}`);
+      const timeout = setTimeout(() => {
+          events.close();
+          setError("Tiempo de espera agotado.");
+          setLoading(false);
+      }, 60000);
+      events.onmessage = (message) => {
+        const event = JSON.parse(message.data);
+        if (event.status === 'SUCCESS') {
+           events.close();
+           clearTimeout(timeout);
+           setAnalysis(event.result);
+           setSuccess("¡Análisis completado!");
+           setLoading(false);
+        } else if (event.status === 'FAILURE') {
+           events.close();
+           clearTimeout(timeout);
+           setError("Error en el análisis: " + (event.error || "Desconocido"));
+           setLoading(false);
+        } else if (event.status === 'TIMEOUT') {
+           events.close();
+           clearTimeout(timeout);
+           setError("Tiempo de espera agotado.");
+           setLoading(false);
+        }
+        // STARTED / PROGRESS: keep waiting
+      };
+      events.onerror = () => {
+        // The browser reconnects on its own; give up only once the stream is closed
+        if (events.readyState === EventSource.CLOSED) {
+           clearTimeout(timeout);
            setError("Error al consultar estado del análisis");
            setLoading(false);
         }
-      }, 2000);
-      
-      // Optional: Timeout checking after 1 min
-      setTimeout(() => {
-          clearInterval(pollInterval);
-          if (loading) { // if still loading
-             setError("Tiempo de espera agotado.");
-             setLoading(false);
-          }
-      }, 60000);
+      };
 
     } catch (e) {
       setError("No se pudo iniciar el análisis. Intenta de nuevo.");